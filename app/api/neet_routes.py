@@ -0,0 +1,83 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from app.services.neet_service import predict_neet_rank, predict_neet_rank_batch
+import csv
+import io
+import math
+import os
+
+router = APIRouter()
+
+NEET_BATCH_MAX_ROWS = int(os.getenv("NEET_BATCH_MAX_ROWS", "200000"))
+MARKS_COLUMNS = ("marks", "score", "neet_marks", "neet_score")
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")  # scored as "invalid"
+
+
+def _check_size(n: int):
+    if n > NEET_BATCH_MAX_ROWS:
+        raise HTTPException(413, f"At most {NEET_BATCH_MAX_ROWS} rows per request, got {n}")
+
+
+def _score_csv(text: str) -> Response:
+    """Same CSV back with a neet_rank column; marks come from a marks/score column (or the first one)"""
+    rows = list(csv.reader(io.StringIO(text)))
+    if not rows:
+        raise HTTPException(422, "Empty CSV")
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = next((header.index(name) for name in MARKS_COLUMNS if name in header), None)
+    has_header = column is not None or math.isnan(_to_float(rows[0][0] if rows[0] else ""))  # non-numeric first cell
+    if has_header and column is None:
+        raise HTTPException(422, f"CSV header needs one of the columns: {', '.join(MARKS_COLUMNS)}")
+    column = column or 0
+    body = rows[1:] if has_header else rows
+    _check_size(len(body))
+
+    ranks = predict_neet_rank_batch([_to_float(row[column]) if len(row) > column else None for row in body])
+    out = io.StringIO()
+    writer = csv.writer(out)
+    if has_header:
+        writer.writerow(rows[0] + ["neet_rank"])
+    writer.writerows(row + [rank] for row, rank in zip(body, ranks.tolist()))
+    return Response(content=out.getvalue(), media_type="text/csv",
+                    headers={"Content-Disposition": 'attachment; filename="neet_ranks.csv"'})
+
+
+@router.get("/neet/rank")
+def neet_rank(marks: float):
+    try:
+        return {"marks": marks, "rank": predict_neet_rank(marks)}
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+
+
+@router.post("/neet/rank/batch")
+async def neet_rank_batch(request: Request):
+    """Score a whole list: JSON {"marks": [...]} (or a bare list), a CSV body, or a CSV file upload"""
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(422, "Upload the CSV as the 'file' form field")
+        return _score_csv((await upload.read()).decode("utf-8-sig"))
+
+    if content_type.startswith(("text/csv", "text/plain")):
+        return _score_csv((await request.body()).decode("utf-8-sig"))
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(422, "Expected JSON {\"marks\": [...]}, a CSV body or a CSV upload")
+    marks = payload.get("marks") if isinstance(payload, dict) else payload
+    if not isinstance(marks, list):
+        raise HTTPException(422, "Expected JSON {\"marks\": [...]}")
+    _check_size(len(marks))
+    ranks = predict_neet_rank_batch([_to_float(m) for m in marks]).tolist()
+    return {"results": [{"marks": m, "rank": r} for m, r in zip(marks, ranks)]}
@@ -5,6 +5,8 @@ from app.config import BASE_URL
 import logging
 import os
 from app.services.voice_logger import log_voice_reply
+from app.services.admission import fallback_twiml, host_accepting_async
+from app.services.call_metrics import get_registry
 
 
 router = APIRouter()
@@ -31,7 +33,14 @@ async def voice():
 
 
 @router.post("/voice")
-async def voice():
+async def voice(hold: int = 0):
+    # Admission: no stream worker on this host can take the call → pre-rendered hold / call-back TwiML
+    if await host_accepting_async() is False:
+        registry = get_registry()
+        registry.inc("calls_rejected", "voice_twiml")
+        registry.write_snapshot_soon()
+        return Response(content=fallback_twiml(hold), media_type="application/xml")
+
     twiml = """
     <Response>
         <Connect>
@@ -0,0 +1,78 @@
+# File: app/asr/model_registry.py
+# Process-wide Vosk model cache + pool of reset KaldiRecognizers
+
+import gc
+import os
+import threading
+
+from vosk import KaldiRecognizer, Model
+
+# ==================== CONFIG ====================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", os.path.join(BASE_DIR, "models", "hindi"))
+VOSK_PRELOAD = os.getenv("VOSK_PRELOAD", "0") == "1"                        # load in the parent before forking
+VOSK_RECOGNIZER_POOL_SIZE = int(os.getenv("VOSK_RECOGNIZER_POOL_SIZE", "8"))  # idle recognizers kept per model/rate
+
+_lock = threading.Lock()
+_models = {}   # path → Model
+_idle = {}     # (path, sample_rate) → [KaldiRecognizer]
+_owner = {}    # id(recognizer) → (path, sample_rate)
+
+
+# ----------------- MODELS -----------------
+def get_model(path: str = None) -> Model:
+    """Load a model once per process (or inherit it from a pre-fork parent)"""
+    path = path or VOSK_MODEL_PATH
+    model = _models.get(path)
+    if model is not None:
+        return model
+
+    with _lock:
+        if path not in _models:
+            if not os.path.exists(path):
+                raise Exception(f"Vosk model not found at {path}")
+            _models[path] = Model(path)
+        return _models[path]
+
+
+def preload_models(paths=None):
+    """Load models before forking workers so they share the pages copy-on-write"""
+    for path in paths or [VOSK_MODEL_PATH]:
+        get_model(path)
+    gc.freeze()  # keep the parent's objects out of the children's GC passes (fewer dirtied pages)
+
+
+# ----------------- RECOGNIZER POOL -----------------
+def acquire_recognizer(sample_rate: int = 16000, path: str = None) -> KaldiRecognizer:
+    """Hand out a reset recognizer, creating one only when the pool is empty"""
+    key = (path or VOSK_MODEL_PATH, sample_rate)
+    with _lock:
+        idle = _idle.get(key)
+        recognizer = idle.pop() if idle else None
+    if recognizer is None:
+        recognizer = KaldiRecognizer(get_model(key[0]), sample_rate)
+    _owner[id(recognizer)] = key
+    return recognizer
+
+
+def release_recognizer(recognizer: KaldiRecognizer):
+    """Reset a recognizer at the end of a stream and keep it for the next call"""
+    key = _owner.pop(id(recognizer), None)
+    if key is None:
+        return
+    recognizer.Reset()
+    with _lock:
+        idle = _idle.setdefault(key, [])
+        if len(idle) < VOSK_RECOGNIZER_POOL_SIZE:
+            idle.append(recognizer)
+
+
+def _reset_after_fork():
+    """Children keep the shared models but not the parent's lock or recognizers"""
+    global _lock
+    _lock = threading.Lock()
+    _idle.clear()
+    _owner.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,90 @@
+# File: app/asr/vosk_stream.py
+# Feeds Vosk in coalesced chunks and fetches partial results at a fixed cadence
+
+import json
+import os
+
+# ==================== CONFIG ====================
+VOSK_CHUNK_MS = int(os.getenv("VOSK_CHUNK_MS", "100"))                        # audio per AcceptWaveform call
+VOSK_PARTIAL_INTERVAL_MS = int(os.getenv("VOSK_PARTIAL_INTERVAL_MS", "500"))  # audio between PartialResult calls
+
+
+class VoskStream:
+    """Coalesces 20 ms frames into larger AcceptWaveform chunks
+
+    Twilio delivers 50 frames/s; decoding each one separately costs a decoder
+    call plus a PartialResult JSON parse per frame. Here audio is buffered to
+    `chunk_ms`, partials are fetched only every `partial_interval_ms` of audio
+    and only reported when their text changed. Cadences are measured in audio
+    time, so behaviour is identical whether frames arrive live or in a burst.
+    """
+
+    def __init__(self, recognizer, sample_rate: int = 16000,
+                 chunk_ms: int = VOSK_CHUNK_MS, partial_interval_ms: int = VOSK_PARTIAL_INTERVAL_MS):
+        self.recognizer = recognizer
+        self.bytes_per_ms = sample_rate * 2 // 1000
+        self.chunk_bytes = max(chunk_ms, 1) * self.bytes_per_ms
+        self.partial_interval_bytes = partial_interval_ms * self.bytes_per_ms
+        self._buffer = bytearray()
+        self._since_partial = 0
+        self._last_partial = ""
+
+        # Counters for CPU accounting (see benchmarks/bench_vosk_stream.py)
+        self.frames_in = 0
+        self.audio_bytes = 0
+        self.decoder_calls = 0
+        self.json_parses = 0
+
+    def reset(self):
+        """Drop buffered audio and partial tracking (recognizer state is reset by its owner)"""
+        self._buffer.clear()
+        self._since_partial = 0
+        self._last_partial = ""
+
+    def _parse(self, raw: str) -> dict:
+        self.json_parses += 1
+        return json.loads(raw)
+
+    def _accept(self, chunk: bytes):
+        self.decoder_calls += 1
+        if self.recognizer.AcceptWaveform(chunk):
+            self._since_partial = 0
+            self._last_partial = ""
+            return self._parse(self.recognizer.Result())
+
+        self._since_partial += len(chunk)
+        if self._since_partial < self.partial_interval_bytes:
+            return None
+        self._since_partial = 0
+
+        partial = self._parse(self.recognizer.PartialResult())
+        text = partial.get("partial", "")
+        if text == self._last_partial:
+            return None
+        self._last_partial = text
+        return partial
+
+    def feed(self, pcm16: bytes) -> list:
+        """Buffer one frame; returns the final/partial results produced by any full chunks"""
+        self.frames_in += 1
+        self.audio_bytes += len(pcm16)
+        self._buffer += pcm16
+
+        results = []
+        while len(self._buffer) >= self.chunk_bytes:
+            chunk = bytes(self._buffer[:self.chunk_bytes])
+            del self._buffer[:self.chunk_bytes]
+            result = self._accept(chunk)
+            if result:
+                results.append(result)
+        return results
+
+    def flush(self) -> dict:
+        """Decode whatever is buffered and return the final result (end of stream)"""
+        if self._buffer:
+            self.decoder_calls += 1
+            self.recognizer.AcceptWaveform(bytes(self._buffer))
+            self._buffer.clear()
+        self._since_partial = 0
+        self._last_partial = ""
+        return self._parse(self.recognizer.FinalResult())
@@ -0,0 +1,173 @@
+# File: app/asr/worker_pool.py
+# Runs Vosk decoding off the event loop: one single-thread worker per slot, calls pinned to a slot
+
+import asyncio
+import collections
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# ==================== CONFIG ====================
+# Vosk's C decoder releases the GIL, so plain threads use every core.
+VOSK_WORKERS = int(os.getenv("VOSK_WORKERS", str(os.cpu_count() or 1)))
+VOSK_CALL_QUEUE_FRAMES = int(os.getenv("VOSK_CALL_QUEUE_FRAMES", "50"))  # 1 s of 20 ms frames
+VOSK_QUEUE_POLICY = os.getenv("VOSK_QUEUE_POLICY", "block")              # "block" | "drop_oldest"
+
+
+def _collapse_partials(results: list) -> list:
+    """Keep only the newest of consecutive partial results"""
+    collapsed = []
+    for result in results:
+        if "partial" in result and collapsed and "partial" in collapsed[-1]:
+            collapsed[-1] = result
+        else:
+            collapsed.append(result)
+    return collapsed
+
+
+class RecognitionSession:
+    """One call's link to its pinned worker
+
+    Audio frames go in through a bounded queue (`put`), final and partial
+    results come out of `results()`. A stale partial that the consumer has
+    not picked up yet is replaced by the newer one; finals are never dropped.
+    """
+
+    def __init__(self, pool, worker_index: int, stream, max_frames: int, policy: str):
+        self._pool = pool
+        self.worker_index = worker_index
+        self.stream = stream
+        self.max_frames = max_frames
+        self.policy = policy
+
+        self._frames = collections.deque()
+        self._frames_ready = asyncio.Event()
+        self._space_ready = asyncio.Event()
+        self._space_ready.set()
+        self._results = collections.deque()
+        self._results_ready = asyncio.Event()
+        self._closed = False
+        self._final = None
+
+        self.frames_dropped = 0
+        self.partials_dropped = 0
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._frames)
+
+    # ----------------- PRODUCER SIDE -----------------
+    async def put(self, pcm16: bytes):
+        """Queue one resampled frame; waits (block) or evicts the oldest (drop_oldest) when full
+
+        Raises the decoder's exception once the worker task has died: nothing would drain the queue.
+        """
+        while len(self._frames) >= self.max_frames and not self._closed and not self._task.done():
+            if self.policy == "drop_oldest":
+                self._frames.popleft()
+                self.frames_dropped += 1
+                break
+            self._space_ready.clear()
+            await self._space_ready.wait()
+        if self._task.done() and not self._task.cancelled() and self._task.exception():
+            raise self._task.exception()
+        self._frames.append(pcm16)
+        self._frames_ready.set()
+
+    async def close(self) -> dict:
+        """Decode everything queued, then return the stream's final result"""
+        self._closed = True
+        self._frames_ready.set()
+        await self._task
+        return self._final or {}
+
+    # ----------------- WORKER SIDE -----------------
+    def _feed_batch(self, frames: list) -> list:
+        results = []
+        for frame in frames:
+            results.extend(self.stream.feed(frame))
+        return _collapse_partials(results)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        executor = self._pool.executor(self.worker_index)
+        try:
+            while self._frames or not self._closed:
+                if not self._frames:
+                    self._frames_ready.clear()
+                    await self._frames_ready.wait()
+                    continue
+                batch = list(self._frames)
+                self._frames.clear()
+                self._space_ready.set()
+                for result in await loop.run_in_executor(executor, self._feed_batch, batch):
+                    self._publish(result)
+            self._final = await loop.run_in_executor(executor, self.stream.flush)
+        finally:
+            self._space_ready.set()
+            self._results_ready.set()
+            self._pool.release(self.worker_index)
+
+    def _publish(self, result: dict):
+        if "partial" in result and self._results and "partial" in self._results[-1]:
+            self._results[-1] = result
+            self.partials_dropped += 1
+        else:
+            self._results.append(result)
+        self._results_ready.set()
+
+    # ----------------- CONSUMER SIDE -----------------
+    async def results(self):
+        """Async iterator over results; ends once the session is closed and drained"""
+        while True:
+            while self._results:
+                yield self._results.popleft()
+            if self._task.done():
+                return
+            self._results_ready.clear()
+            await self._results_ready.wait()
+
+
+class RecognitionPool:
+    """Fixed set of single-thread executors; each call stays on one of them
+
+    Pinning keeps every AcceptWaveform for a recognizer on the same thread,
+    in order, while different calls decode in parallel.
+    """
+
+    def __init__(self, workers: int = VOSK_WORKERS):
+        self._executors = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"vosk-{i}") for i in range(max(workers, 1))
+        ]
+        self._active = [0] * len(self._executors)
+
+    def executor(self, index: int) -> ThreadPoolExecutor:
+        return self._executors[index]
+
+    def open_session(self, stream, max_frames: int = VOSK_CALL_QUEUE_FRAMES,
+                     policy: str = VOSK_QUEUE_POLICY) -> RecognitionSession:
+        """Pin a new call to the least-loaded worker"""
+        index = min(range(len(self._active)), key=self._active.__getitem__)
+        self._active[index] += 1
+        return RecognitionSession(self, index, stream, max_frames, policy)
+
+    def release(self, index: int):
+        self._active[index] -= 1
+
+    def active_calls(self) -> list:
+        return list(self._active)
+
+    def shutdown(self):
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+
+
+def get_recognition_pool() -> RecognitionPool:
+    """Process-wide pool, created on first use (after any pre-fork)"""
+    global _pool
+    if _pool is None:
+        _pool = RecognitionPool()
+    return _pool
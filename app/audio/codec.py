@@ -0,0 +1,135 @@
+# File: app/audio/codec.py
+# Table-driven G.711 μ-law codec (NumPy) — bit-exact drop-in for audioop.ulaw2lin / lin2ulaw
+#
+# The bytes API hands off to audioop while the interpreter still ships it (≤ 3.12, or the
+# audioop-lts package): per call it beats any table lookup on Twilio's 160-byte frames, and
+# decodes faster at every size. audioop encodes sample by sample, so PCM buffers above
+# AUDIOOP_ENCODE_MAX_BYTES (TTS output) still go through the NumPy table. Without audioop,
+# short buffers decode through two bytes.translate tables (NumPy's per-call overhead
+# dominates below ~640 bytes) and longer ones through the NumPy tables.
+
+import warnings
+
+import numpy as np
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:  # Python 3.13+ without audioop-lts
+        audioop = None
+
+# ----------------- LOOKUP TABLES -----------------
+ULAW_BIAS = 0x84
+ULAW_CLIP = 8159
+_SEG_UEND = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF], dtype=np.int32)
+
+
+def _build_decode_table() -> np.ndarray:
+    """256-entry μ-law → PCM16 table (same values as audioop's st_ulaw2linear16)"""
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    t = (((u & 0x0F) << 3) + ULAW_BIAS) << ((u & 0x70) >> 4)
+    return np.where(u & 0x80, ULAW_BIAS - t, t - ULAW_BIAS).astype(np.int16)
+
+
+def _build_encode_table() -> np.ndarray:
+    """65536-entry PCM16 → μ-law table indexed by the sample's uint16 bit pattern"""
+    pcm = np.arange(65536, dtype=np.uint32).astype(np.uint16).view(np.int16).astype(np.int32)
+    val = pcm >> 2  # audioop encodes from the top 14 bits
+    mask = np.where(val < 0, 0x7F, 0xFF)
+    mag = np.minimum(np.abs(val), ULAW_CLIP) + (ULAW_BIAS >> 2)
+    seg = np.searchsorted(_SEG_UEND, mag)
+    uval = (seg << 4) | ((mag >> (np.minimum(seg, 7) + 1)) & 0x0F)
+    return np.where(seg >= 8, 0x7F ^ mask, uval ^ mask).astype(np.uint8)
+
+
+def _build_pair_decode_table(decode_table: np.ndarray) -> np.ndarray:
+    """65536-entry table decoding two μ-law bytes at once (halves the lookups per buffer)"""
+    pairs = np.arange(65536, dtype=np.uint32).astype(np.uint16).view(np.uint8).reshape(-1, 2)
+    return np.ascontiguousarray(decode_table[pairs]).view(np.uint32).reshape(-1)
+
+
+ULAW_DECODE_TABLE = _build_decode_table()
+ULAW_ENCODE_TABLE = _build_encode_table()
+ULAW_PAIR_DECODE_TABLE = _build_pair_decode_table(ULAW_DECODE_TABLE)
+# byte → low / high byte of its little-endian PCM16 sample, for bytes.translate
+_DECODE_LOW = ULAW_DECODE_TABLE.view(np.uint16).astype(np.uint8).tobytes()
+_DECODE_HIGH = (ULAW_DECODE_TABLE.view(np.uint16) >> 8).astype(np.uint8).tobytes()
+TRANSLATE_MAX_BYTES = 640         # 4 Twilio frames; NumPy wins above ~800 bytes
+AUDIOOP_ENCODE_MAX_BYTES = 2048   # ~1000 samples; the NumPy table wins above
+
+
+# ----------------- ARRAY API -----------------
+def _as_ulaw_array(data) -> np.ndarray:
+    if isinstance(data, np.ndarray):
+        return data.view(np.uint8) if data.dtype != np.uint8 else data
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def _as_pcm_index(data) -> np.ndarray:
+    if isinstance(data, np.ndarray):
+        return data.view(np.uint16)
+    return np.frombuffer(data, dtype=np.uint16)
+
+
+def ulaw_decode(data, out: np.ndarray = None) -> np.ndarray:
+    """μ-law bytes/array (any shape, e.g. (frames, 160)) → int16 array of the same shape
+
+    `out` must be a C-contiguous int16 array of the input's shape.
+    """
+    ulaw = np.ascontiguousarray(_as_ulaw_array(data))
+    if out is None:
+        out = np.empty(ulaw.shape, dtype=np.int16)
+    flat_in = ulaw.reshape(-1)
+    flat_out = out.reshape(-1)
+    even = flat_in.size & ~1
+    np.take(ULAW_PAIR_DECODE_TABLE, flat_in[:even].view(np.uint16), out=flat_out[:even].view(np.uint32))
+    if even != flat_in.size:
+        flat_out[-1] = ULAW_DECODE_TABLE[flat_in[-1]]
+    return out
+
+
+def ulaw_encode(pcm, out: np.ndarray = None) -> np.ndarray:
+    """PCM16 bytes/int16 array (any shape) → uint8 μ-law array of the same shape"""
+    return np.take(ULAW_ENCODE_TABLE, _as_pcm_index(pcm), out=out)
+
+
+def ulaw_decode_frames(frames, out: np.ndarray = None) -> np.ndarray:
+    """Decode a batch of equal-size μ-law frames into a (n_frames, frame_len) int16 array"""
+    frames = list(frames)
+    if not frames:
+        return np.empty((0, 0), dtype=np.int16) if out is None else out[:0]
+    stacked = np.frombuffer(b"".join(frames), dtype=np.uint8).reshape(len(frames), -1)
+    return ulaw_decode(stacked, out=out)
+
+
+# ----------------- BYTES API (audioop compatible) -----------------
+def _ulaw2lin_table(data: bytes) -> bytes:
+    """ulaw2lin without audioop"""
+    if len(data) <= TRANSLATE_MAX_BYTES:
+        out = bytearray(2 * len(data))
+        out[0::2] = data.translate(_DECODE_LOW)
+        out[1::2] = data.translate(_DECODE_HIGH)
+        return bytes(out)
+    if len(data) % 2 == 0:
+        return np.take(ULAW_PAIR_DECODE_TABLE, np.frombuffer(data, dtype=np.uint16)).tobytes()
+    return ulaw_decode(data).tobytes()
+
+
+def _lin2ulaw_table(data: bytes) -> bytes:
+    """lin2ulaw without audioop (16-bit index: no bytes.translate shortcut)"""
+    return ulaw_encode(data).tobytes()
+
+
+def ulaw2lin(data: bytes) -> bytes:
+    """Drop-in for audioop.ulaw2lin(data, 2)"""
+    if audioop is not None:
+        return audioop.ulaw2lin(data, 2)
+    return _ulaw2lin_table(data)
+
+
+def lin2ulaw(data: bytes) -> bytes:
+    """Drop-in for audioop.lin2ulaw(data, 2)"""
+    if audioop is not None and len(data) <= AUDIOOP_ENCODE_MAX_BYTES:
+        return audioop.lin2ulaw(data, 2)
+    return _lin2ulaw_table(data)
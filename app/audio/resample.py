@@ -0,0 +1,74 @@
+# File: app/audio/resample.py
+# Stateful polyphase resampler for streamed PCM16 (Twilio 8 kHz → ASR 16/24 kHz)
+
+import functools
+from math import gcd
+
+import numpy as np
+from scipy.signal import firwin
+
+TAPS_PER_PHASE = 16
+
+
+@functools.lru_cache(maxsize=None)
+def _design_phases(up: int, down: int, taps_per_phase: int) -> np.ndarray:
+    """Low-pass FIR split into `up` polyphase branches, each reversed for a sliding dot product"""
+    h = firwin(taps_per_phase * up, 1.0 / max(up, down), window=("kaiser", 5.0)) * up
+    phases = h.reshape(taps_per_phase, up).T          # phase p = h[p::up]
+    return np.ascontiguousarray(phases[:, ::-1].T)    # (taps_per_phase, up)
+
+
+class StreamResampler:
+    """Per-stream resampler that carries filter history across frames
+
+    One instance per call: frames are filtered as one continuous signal, so
+    there are no discontinuities at 20 ms frame boundaries and the filter is
+    designed once (cached per ratio) instead of on every frame.
+    """
+
+    def __init__(self, in_rate: int = 8000, out_rate: int = 16000, taps_per_phase: int = TAPS_PER_PHASE):
+        g = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.taps_per_phase = taps_per_phase
+        self._phases = _design_phases(self.up, self.down, taps_per_phase) if in_rate != out_rate else None
+        self.reset()
+
+    def reset(self):
+        """Forget the stream history (e.g. when a recognizer is reused for a new call)"""
+        self._history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        self._offset = 0  # next upsampled index to keep when decimating
+
+    def process_array(self, samples: np.ndarray) -> np.ndarray:
+        """int16 samples at in_rate → int16 samples at out_rate"""
+        if self.up == 1 and self.down == 1:
+            return samples.astype(np.int16, copy=False)
+        if samples.size == 0:
+            return np.empty(0, dtype=np.int16)
+
+        taps = self.taps_per_phase
+        extended = np.concatenate((self._history, samples.astype(np.float32)))
+        self._history = extended[-(taps - 1):]
+
+        # windows[n] · phases[:, p] = output sample n*up + p (integer-ratio fast path)
+        windows = np.ndarray((samples.size, taps), np.float32, extended, 0, (4, 4))
+        upsampled = (windows @ self._phases).reshape(-1)
+
+        if self.down > 1:
+            kept = upsampled[self._offset::self.down]
+            self._offset = (self._offset - upsampled.size) % self.down
+            upsampled = kept
+
+        np.rint(upsampled, out=upsampled)
+        np.clip(upsampled, -32768, 32767, out=upsampled)
+        return upsampled.astype(np.int16)
+
+    def process(self, pcm16: bytes) -> bytes:
+        """PCM16 bytes at in_rate → PCM16 bytes at out_rate"""
+        return self.process_array(np.frombuffer(pcm16, dtype=np.int16)).tobytes()
+
+    def process_frames(self, frames) -> bytes:
+        """Resample several buffered frames in one call"""
+        return self.process(b"".join(frames))
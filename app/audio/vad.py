@@ -0,0 +1,43 @@
+# File: app/audio/vad.py
+# Frame-energy speech endpointer (client-side turn detection for manual-commit mode)
+
+import numpy as np
+
+from app.audio import codec
+
+
+class EnergyEndpointer:
+    """Flags speech start/stop from per-frame RMS energy of 8 kHz μ-law frames
+
+    Speech starts after `start_ms` of consecutive loud frames and stops after
+    `silence_ms` of consecutive quiet ones, so clicks and short pauses do not
+    end the turn.
+    """
+
+    def __init__(self, threshold: float = 500.0, start_ms: int = 100, silence_ms: int = 500, frame_ms: int = 20):
+        self.threshold = threshold
+        self.start_frames = max(start_ms // frame_ms, 1)
+        self.silence_frames = max(silence_ms // frame_ms, 1)
+        self.speaking = False
+        self._loud = 0
+        self._quiet = 0
+
+    def process(self, mulaw: bytes):
+        """Returns "speech_started", "speech_stopped" or None for one frame"""
+        pcm = codec.ulaw_decode(mulaw).astype(np.float32)
+        loud = pcm.size > 0 and float(np.sqrt(np.mean(pcm * pcm))) >= self.threshold
+
+        if loud:
+            self._loud += 1
+            self._quiet = 0
+        else:
+            self._quiet += 1
+            self._loud = 0
+
+        if not self.speaking and self._loud >= self.start_frames:
+            self.speaking = True
+            return "speech_started"
+        if self.speaking and self._quiet >= self.silence_frames:
+            self.speaking = False
+            return "speech_stopped"
+        return None
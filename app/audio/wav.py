@@ -0,0 +1,50 @@
+# File: app/audio/wav.py
+# Minimal RIFF/WAVE reader for the repo's μ-law (Twilio) and PCM16 fixtures
+
+import base64
+import struct
+
+from app.audio import codec
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_MULAW = 7
+
+
+def _chunks(data: bytes):
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+    pos = 12
+    while pos + 8 <= len(data):
+        cid, size = struct.unpack_from("<4sI", data, pos)
+        yield cid, data[pos + 8:pos + 8 + size]
+        pos += 8 + size + (size & 1)
+
+
+def wav_to_ulaw(data: bytes) -> bytes:
+    """8 kHz mono WAV (μ-law or PCM16) bytes → raw μ-law samples"""
+    fmt = samples = None
+    for cid, body in _chunks(data):
+        if cid == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", body)
+        elif cid == b"data":
+            samples = body
+    if fmt is None or samples is None:
+        raise ValueError("WAV file has no fmt/data chunk")
+
+    audio_format, channels, rate, _, _, bits = fmt
+    if channels != 1 or rate != 8000:
+        raise ValueError(f"Expected 8 kHz mono audio, got {rate} Hz x{channels}")
+    if audio_format == WAVE_FORMAT_MULAW:
+        return samples
+    if audio_format == WAVE_FORMAT_PCM and bits == 16:
+        return codec.lin2ulaw(samples)
+    raise ValueError(f"Unsupported WAV format {audio_format}/{bits}-bit")
+
+
+def read_ulaw(path: str) -> bytes:
+    """Load a fixture as raw 8 kHz μ-law: .wav files or base64-encoded WAV text files"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(b"RIFF"):
+        data = base64.b64decode(b"".join(data.split()))
+    return wav_to_ulaw(data)
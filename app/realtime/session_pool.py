@@ -0,0 +1,232 @@
+# File: app/realtime/session_pool.py
+# Process-wide connection manager for the OpenAI realtime API: one shared ClientSession and a
+# small pool of already-connected, already-configured sockets handed straight to incoming calls
+
+import asyncio
+import collections
+import os
+import time
+
+import aiohttp
+
+# ==================== CONFIG ====================
+# Sessions are single-use (each call gets a fresh conversation), so the pool only hides
+# the TLS + WebSocket handshake and the session.update round trip from call pickup.
+REALTIME_POOL_SIZE = int(os.getenv("REALTIME_POOL_SIZE", "2"))               # 0 disables pre-warming
+# The server limits a session's total lifetime from the moment it connects, so idle sockets
+# are recycled well before that to leave the call most of the budget.
+REALTIME_POOL_MAX_IDLE_S = float(os.getenv("REALTIME_POOL_MAX_IDLE_S", "120"))
+REALTIME_CONNECT_TIMEOUT_S = float(os.getenv("REALTIME_CONNECT_TIMEOUT_S", "10"))
+REALTIME_POOL_RETRY_MAX_S = 30.0
+
+
+class _IdleSocket:
+    """A configured socket waiting for a call; its watcher answers pings and notices server closes"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.connected_at = time.monotonic()
+        self.watcher = None
+
+
+class RealtimeSessionPool:
+    """Hands out configured realtime sockets; refills itself in the background
+
+    `acquire()` returns a socket that has already received `session.updated`.
+    On a pool miss it connects inline over the shared ClientSession, so the
+    caller never needs to know whether the pool was warm. The caller owns
+    the socket afterwards and closes it when the call ends.
+    """
+
+    def __init__(self, url: str, headers: dict, session_config: dict, size: int = REALTIME_POOL_SIZE,
+                 max_idle_s: float = REALTIME_POOL_MAX_IDLE_S,
+                 connect_timeout: float = REALTIME_CONNECT_TIMEOUT_S, log=print):
+        self.url = url
+        self.headers = headers
+        self.session_config = session_config
+        self.size = size
+        self.max_idle_s = max_idle_s
+        self.connect_timeout = connect_timeout
+        self.log = log
+
+        self._session = None
+        self._idle = collections.deque()
+        self._connecting = 0
+        self._wake = asyncio.Event()
+        self._task = None
+        self._closed = False
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.failures = 0
+        self._last_error = None
+        self._consecutive_failures = 0
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size, "idle": len(self._idle), "connecting": self._connecting,
+            "hits": self.hits, "misses": self.misses, "expired": self.expired, "failures": self.failures,
+        }
+
+    # ----------------- LIFECYCLE -----------------
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Shared ClientSession (one connector, DNS cache and TLS context for every call)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0, ttl_dns_cache=300))
+        return self._session
+
+    def start(self):
+        """Begin filling the pool; needs a running loop"""
+        if self._task is None and self.size > 0 and not self._closed:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def close(self):
+        """Stop refilling and close idle sockets and the shared session"""
+        self._closed = True
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        while self._idle:
+            await self._discard(self._idle.popleft())
+        if self._session is not None:
+            await self._session.close()
+
+    # ----------------- CONNECT -----------------
+    async def connect(self):
+        """Open one socket, send session.update and wait for the server to confirm it"""
+        return await asyncio.wait_for(self._connect(), self.connect_timeout)
+
+    async def _connect(self):
+        ws = await self.session.ws_connect(self.url, headers=self.headers)
+        try:
+            await ws.send_json({"type": "session.update", "session": self.session_config})
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                event = msg.json()
+                if event.get("type") == "session.updated":
+                    return ws
+                if event.get("type") == "error":
+                    raise ConnectionError(f"session.update rejected: {event.get('error')}")
+            raise ConnectionError(f"realtime socket closed during setup (code={ws.close_code})")
+        except BaseException:
+            await ws.close()
+            raise
+
+    async def acquire(self):
+        """Take a warm socket, or connect one now if the pool is empty"""
+        self.start()
+        while self._idle:
+            idle = self._idle.popleft()
+            if idle.watcher:
+                idle.watcher.cancel()
+                await asyncio.gather(idle.watcher, return_exceptions=True)
+            if idle.ws.closed or time.monotonic() - idle.connected_at > self.max_idle_s:
+                await self._discard(idle, expired=not idle.ws.closed)
+                continue
+            self.hits += 1
+            self._wake.set()
+            return idle.ws
+
+        self.misses += 1
+        self._wake.set()
+        return await self.connect()
+
+    # ----------------- BACKGROUND -----------------
+    async def _watch(self, idle: _IdleSocket):
+        """Read while idle so pings get answered and a server-side close drops the socket"""
+        async for _ in idle.ws:
+            pass  # session.created / session.updated echoes: nothing to do before the call
+        if idle in self._idle:
+            self._idle.remove(idle)
+            self._wake.set()
+
+    async def _discard(self, idle: _IdleSocket, expired: bool = False):
+        if expired:
+            self.expired += 1
+        if idle.watcher and not idle.watcher.done():
+            idle.watcher.cancel()
+        await idle.ws.close()
+
+    async def _fill_one(self):
+        try:
+            ws = await self.connect()
+        except Exception as e:
+            self.failures += 1
+            self._last_error = e
+            return
+        finally:
+            self._connecting -= 1
+            self._wake.set()
+        idle = _IdleSocket(ws)
+        idle.watcher = asyncio.create_task(self._watch(idle))
+        self._idle.append(idle)
+        self._consecutive_failures = 0
+
+    async def _maintain(self):
+        """Keep `size` sockets ready, recycle idle ones before the server would drop them"""
+        fills = set()
+        try:
+            while not self._closed:
+                now = time.monotonic()
+                while self._idle and now - self._idle[0].connected_at > self.max_idle_s:
+                    await self._discard(self._idle.popleft(), expired=True)
+
+                if self._last_error is not None:  # back off instead of hammering a failing endpoint
+                    self._consecutive_failures += 1
+                    delay = min(2 ** self._consecutive_failures, REALTIME_POOL_RETRY_MAX_S)
+                    self.log(f"⚠ Realtime pool: connect failed ({self._last_error!r}), retry in {delay:.0f}s")
+                    self._last_error = None
+                    await asyncio.sleep(delay)
+                    continue
+
+                # one independent task per missing socket, so a take never waits for a whole batch
+                for _ in range(self.size - len(self._idle) - self._connecting):
+                    self._connecting += 1
+                    task = asyncio.create_task(self._fill_one())
+                    fills.add(task)
+                    task.add_done_callback(fills.discard)
+
+                # sleep until a socket is taken or filled, or the oldest one is due for recycling
+                timeout = self.max_idle_s - (time.monotonic() - self._idle[0].connected_at) if self._idle else None
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in fills:
+                task.cancel()
+            await asyncio.gather(*fills, return_exceptions=True)
+
+_pool = None
+
+
+def get_realtime_pool(url: str, headers: dict, session_config: dict) -> RealtimeSessionPool:
+    """Process-wide pool, created on first use (after any pre-fork)"""
+    global _pool
+    if _pool is None:
+        _pool = RealtimeSessionPool(url, headers, session_config)
+    return _pool
+
+
+async def close_realtime_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def _reset_after_fork():
+    """Sockets and the event loop belong to the parent; children build their own pool"""
+    global _pool
+    _pool = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,219 @@
+# File: app/services/admission.py
+# Per-worker admission control: cap concurrent calls / upstream sessions, shed load when the
+# event loop lags or the worker's CPU budget is spent, and pre-rendered fallbacks for overflow
+#
+# ws_server workers admit or refuse each /twilio-stream connection and publish an
+# `accepting_calls` gauge; the /voice TwiML route reads those gauges (via call_metrics
+# snapshots) and answers with a hold / call-back TwiML instead of connecting a stream when
+# no worker on the host can take the call.
+
+import asyncio
+import base64
+import contextlib
+import os
+import time
+
+# ==================== CONFIG ====================
+MAX_CALLS_PER_WORKER = int(os.getenv("MAX_CALLS_PER_WORKER", "0"))      # 0 = unlimited
+MAX_UPSTREAM_SESSIONS = int(os.getenv("MAX_UPSTREAM_SESSIONS", "0"))    # realtime sockets in use; 0 = unlimited
+ADMISSION_MAX_LOOP_LAG_MS = float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "0"))  # 0 disables
+ADMISSION_MAX_CPU = float(os.getenv("ADMISSION_MAX_CPU", "0"))          # cores used by this worker; 0 disables
+ADMISSION_SAMPLE_S = float(os.getenv("ADMISSION_SAMPLE_S", "0.5"))
+ADMISSION_HOST_CACHE_S = float(os.getenv("ADMISSION_HOST_CACHE_S", "1.0"))  # /voice re-reads worker gauges at most this often
+
+ADMISSION_FALLBACK = os.getenv("ADMISSION_FALLBACK", "callback")        # "callback" | "hold" (TwiML route)
+FALLBACK_TEXT = os.getenv("ADMISSION_FALLBACK_TEXT", "अभी सभी लाइनें व्यस्त हैं, कृपया थोड़ी देर बाद कॉल करें।")
+HOLD_TEXT = os.getenv("ADMISSION_HOLD_TEXT", "कृपया लाइन पर बने रहें, आपकी कॉल जल्द जोड़ी जाएगी।")
+HOLD_AUDIO_URL = os.getenv("ADMISSION_HOLD_AUDIO_URL")                  # <Play> while holding; else <Pause>
+HOLD_PAUSE_S = int(os.getenv("ADMISSION_HOLD_PAUSE_S", "10"))
+HOLD_MAX_TRIES = int(os.getenv("ADMISSION_HOLD_MAX_TRIES", "6"))        # then the call-back message
+FALLBACK_WAV = os.getenv("ADMISSION_FALLBACK_WAV")                      # μ-law fixture if TTS is unavailable
+
+# Rejection reasons
+CALLS = "calls"
+UPSTREAM = "upstream"
+LOOP_LAG = "loop_lag"
+CPU = "cpu"
+DRAINING = "draining"
+
+
+class AdmissionController:
+    """One worker's call budget; `admit()` reserves a slot or returns why it cannot"""
+
+    def __init__(self, max_calls: int = MAX_CALLS_PER_WORKER, max_upstream: int = MAX_UPSTREAM_SESSIONS,
+                 max_loop_lag_ms: float = ADMISSION_MAX_LOOP_LAG_MS, max_cpu: float = ADMISSION_MAX_CPU):
+        self.max_calls = max_calls
+        self.max_upstream = max_upstream
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.max_cpu = max_cpu
+        self.active_calls = 0
+        self.upstream_sessions = 0
+        self.loop_lag_ms = 0.0
+        self.cpu = 0.0
+        self.draining = False
+        self.admitted = 0
+        self.rejections = {}      # reason → count
+
+    def overloaded(self):
+        """Reason a new call would be refused right now, or None"""
+        if self.draining:
+            return DRAINING
+        if self.max_calls and self.active_calls >= self.max_calls:
+            return CALLS
+        if self.max_upstream and self.upstream_sessions >= self.max_upstream:
+            return UPSTREAM
+        if self.max_loop_lag_ms and self.loop_lag_ms > self.max_loop_lag_ms:
+            return LOOP_LAG
+        if self.max_cpu and self.cpu > self.max_cpu:
+            return CPU
+        return None
+
+    @property
+    def accepting(self) -> bool:
+        return self.overloaded() is None
+
+    def admit(self):
+        """Reserve a call slot; returns None on success, else the rejection reason"""
+        reason = self.overloaded()
+        if reason:
+            self.rejections[reason] = self.rejections.get(reason, 0) + 1
+            return reason
+        self.active_calls += 1
+        self.admitted += 1
+        return None
+
+    def release(self):
+        self.active_calls -= 1
+
+    @contextlib.asynccontextmanager
+    async def upstream_session(self):
+        """Count an upstream (realtime) session for as long as the call holds it"""
+        self.upstream_sessions += 1
+        try:
+            yield
+        finally:
+            self.upstream_sessions -= 1
+
+    async def monitor(self, on_change=None, interval: float = ADMISSION_SAMPLE_S):
+        """Sample event-loop lag and this process's CPU use; `on_change()` runs when `accepting` flips"""
+        loop = asyncio.get_running_loop()
+        accepting = self.accepting
+        while True:
+            started, cpu_started = loop.time(), time.process_time()
+            await asyncio.sleep(interval)
+            elapsed = loop.time() - started
+            lag_ms = max(0.0, (elapsed - interval) * 1000)
+            self.loop_lag_ms = 0.5 * self.loop_lag_ms + 0.5 * lag_ms  # smooth single hiccups
+            self.cpu = (time.process_time() - cpu_started) / elapsed
+            if self.accepting != accepting:
+                accepting = self.accepting
+                if on_change:
+                    on_change()
+
+    def summary(self) -> str:
+        return (f"🚦 Admission: admitted={self.admitted} rejected={sum(self.rejections.values())} "
+                f"{self.rejections} active={self.active_calls} upstream={self.upstream_sessions}")
+
+
+_controller = None
+
+
+def get_admission() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
+
+
+def _reset_after_fork():
+    """Each worker owns its own budget"""
+    global _controller
+    _controller = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# ----------------- STREAM FALLBACK -----------------
+_fallback_payload = None
+
+
+def load_fallback_audio() -> str:
+    """Render the call-back message once per process → base64 μ-law ('' if no audio is available)
+
+    Blocking (TTS cache miss = network + ffmpeg): call from a thread at worker start-up.
+    """
+    global _fallback_payload
+    if _fallback_payload is None:
+        mulaw = b""
+        try:
+            from app.tts.cache import get_tts_cache
+            mulaw = get_tts_cache().get(FALLBACK_TEXT, lang="hi", persist=True)
+        except Exception as e:
+            print("Admission fallback TTS unavailable:", e)
+            if FALLBACK_WAV:
+                from app.audio.wav import read_ulaw
+                mulaw = read_ulaw(FALLBACK_WAV)
+        _fallback_payload = base64.b64encode(mulaw).decode("ascii")
+    return _fallback_payload
+
+
+def fallback_payload() -> str:
+    """The pre-rendered message, or '' until `load_fallback_audio` has run"""
+    return _fallback_payload or ""
+
+
+# ----------------- TWIML FALLBACK -----------------
+def _hold_twiml(attempt: int) -> str:
+    wait = f"<Play>{HOLD_AUDIO_URL}</Play>" if HOLD_AUDIO_URL else f'<Pause length="{HOLD_PAUSE_S}"/>'
+    say = f'<Say language="hi-IN">{HOLD_TEXT}</Say>' if attempt == 0 else ""
+    return f'<Response>{say}{wait}<Redirect method="POST">/voice?hold={attempt + 1}</Redirect></Response>'
+
+
+CALLBACK_TWIML = f'<Response><Say language="hi-IN">{FALLBACK_TEXT}</Say><Hangup/></Response>'
+HOLD_TWIML = [_hold_twiml(attempt) for attempt in range(HOLD_MAX_TRIES)]
+
+
+def fallback_twiml(attempt: int = 0) -> str:
+    """Pre-rendered overflow TwiML: hold and retry /voice, then (or directly) ask to call back"""
+    if ADMISSION_FALLBACK == "hold" and 0 <= attempt < HOLD_MAX_TRIES:
+        return HOLD_TWIML[attempt]
+    return CALLBACK_TWIML
+
+
+_host_state = {}  # metrics dir → (monotonic time checked, host_accepting result)
+
+
+def _cached_host_state(directory: str, max_age: float):
+    """(hit, value) from the last snapshot scan of `directory` if it is younger than max_age"""
+    checked = _host_state.get(directory)
+    if checked and time.monotonic() - checked[0] < max_age:
+        return True, checked[1]
+    return False, None
+
+
+def host_accepting(directory: str = None, max_age: float = ADMISSION_HOST_CACHE_S):
+    """Whether any live ws_server worker on this host admits calls; None if none has reported
+
+    Blocking (globs and parses every snapshot file) unless answered from the max_age cache.
+    """
+    from app.services.call_metrics import METRICS_DIR, collect
+    directory = directory or METRICS_DIR
+    hit, value = _cached_host_state(directory, max_age)
+    if hit:
+        return value
+    _, _, gauges = collect(directory)
+    states = [value for (key, _pid), value in gauges.items() if key.split("|")[0] == "accepting_calls"]
+    # no gauges: stream server not on this host / metrics dir not shared → None, fail open
+    value = any(states) if states else None
+    _host_state[directory] = (time.monotonic(), value)
+    return value
+
+
+async def host_accepting_async(directory: str = None, max_age: float = ADMISSION_HOST_CACHE_S):
+    """host_accepting for async routes: a cache miss scans the snapshots in a worker thread"""
+    from app.services.call_metrics import METRICS_DIR
+    hit, value = _cached_host_state(directory or METRICS_DIR, max_age)
+    if hit:
+        return value
+    return await asyncio.to_thread(host_accepting, directory, max_age)
@@ -0,0 +1,71 @@
+# File: app/services/barge_in.py
+# Playback tracking (Twilio mark events) and savings counters for caller interruptions
+
+from app.services.turn_telemetry import G711_BYTES_PER_MS
+
+
+class PlaybackTracker:
+    """How much of the current assistant item Twilio has sent vs actually played
+
+    Every forwarded audio delta is followed by a Twilio `mark` named
+    "<item_id>:<ms sent so far>". Twilio echoes a mark back once playback
+    reaches it, so the last echoed mark is the played position.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.item_id = None
+        self.sent_bytes = 0
+        self.played_ms = 0
+
+    def on_audio_sent(self, item_id: str, n_bytes: int) -> str:
+        """Account for forwarded audio; returns the mark name to send after it"""
+        if item_id != self.item_id:
+            self.item_id = item_id
+            self.sent_bytes = 0
+            self.played_ms = 0
+        self.sent_bytes += n_bytes
+        return f"{item_id}:{self.sent_ms}"
+
+    def on_mark(self, name: str):
+        item_id, _, ms = name.rpartition(":")
+        if item_id == self.item_id and ms.isdigit():
+            self.played_ms = max(self.played_ms, int(ms))
+
+    @property
+    def sent_ms(self) -> int:
+        return self.sent_bytes // G711_BYTES_PER_MS
+
+    @property
+    def unplayed_ms(self) -> int:
+        return max(self.sent_ms - self.played_ms, 0)
+
+
+class BargeInStats:
+    """Per-call savings from interruption handling"""
+
+    def __init__(self, max_output_tokens: int):
+        self.max_output_tokens = max_output_tokens
+        self.interruptions = 0
+        self.bytes_cleared = 0    # already sent to Twilio, dropped from its buffer by `clear`
+        self.bytes_dropped = 0    # deltas of a cancelled response never forwarded
+        self.tokens_used = 0      # output tokens billed for cancelled responses
+        self.tokens_saved = 0     # upper bound: token cap minus tokens used, per cancelled response
+
+    def on_interrupt(self, unplayed_ms: int):
+        self.interruptions += 1
+        self.bytes_cleared += unplayed_ms * G711_BYTES_PER_MS
+
+    def on_cancelled(self, usage: dict):
+        used = (usage or {}).get("output_tokens", 0)
+        self.tokens_used += used
+        self.tokens_saved += max(self.max_output_tokens - used, 0)
+
+    def summary(self) -> str:
+        return (
+            f"✂ Barge-in — interruptions={self.interruptions} bytes_cleared={self.bytes_cleared} "
+            f"bytes_dropped={self.bytes_dropped} cancelled_tokens_used={self.tokens_used} "
+            f"tokens_saved<={self.tokens_saved}"
+        )
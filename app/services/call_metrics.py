@@ -0,0 +1,384 @@
+# File: app/services/call_metrics.py
+# Per-call latency timeline + process-wide histograms, exported in Prometheus text format
+#
+# The stream handlers run in websocket/ws_server.py, /metrics is served by the FastAPI app:
+# every process writes its aggregates to METRICS_DIR/<pid>.json (atomically, off the event
+# loop, when a call ends) and /metrics merges the snapshot files of processes that are still
+# running. Each snapshot records its process identity (boot id + process start time), so files
+# left by exited workers, earlier deployments or a reused pid are recognised as stale and deleted.
+
+import asyncio
+import glob
+import json
+import os
+import threading
+import time
+
+# ==================== CONFIG ====================
+METRICS_DIR = os.getenv(
+    "METRICS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), ".cache", "metrics"),
+)
+METRICS_PREFIX = "voicebot"
+
+# Upper bounds in ms; rendered in seconds as Prometheus expects
+BUCKETS_MS = (25, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+
+HISTOGRAMS = {
+    "turn_latency": "Caller stops talking → first reply frame sent to Twilio",
+    "time_to_first_audio": "User turn committed → first reply frame sent to Twilio",
+    "upstream_rtt": "User turn committed → first audio delta from the upstream model / TTS",
+    "media_start": "Twilio stream start → first inbound media frame",
+    "intent_answer": "User turn committed → first reply frame, for turns answered by the local intent fast-path",
+}
+COUNTERS = {
+    "calls_started": "Twilio streams started",
+    "calls_finished": "Twilio streams finished",
+    "turns": "User turns observed",
+    "barge_ins": "Replies interrupted by the caller",
+    "calls_rejected": "Calls refused by admission control (overloaded or draining worker)",
+    "intent_turns": "Final user transcripts checked by the local intent fast-path",
+    "intent_answered": "User turns answered locally instead of by the model / default reply",
+}
+# Point-in-time values, reported per worker process rather than summed
+GAUGES = {
+    "active_calls": "Twilio streams currently open in this worker",
+    "accepting_calls": "1 if this worker admits new calls, 0 if at capacity, overloaded or draining",
+}
+
+# Events that start over on every user turn; everything else is once per call
+TURN_EVENTS = ("speech_started", "speech_stopped", "committed", "first_upstream_delta",
+               "first_frame_sent", "response_done", "intent_answered")
+
+
+class Histogram:
+    """Cumulative-on-render bucket counts + sum/count, in milliseconds"""
+
+    def __init__(self, counts=None, total=0.0, count=0):
+        self.counts = list(counts) if counts else [0] * (len(BUCKETS_MS) + 1)  # last slot: +Inf
+        self.sum = total
+        self.count = count
+
+    def observe(self, ms: float):
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                break
+        else:
+            i = len(BUCKETS_MS)
+        self.counts[i] += 1
+        self.sum += ms
+        self.count += 1
+
+    def merge(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def to_dict(self) -> dict:
+        return {"counts": self.counts, "sum": self.sum, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        return cls(data["counts"], data["sum"], data["count"])
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def _read_boot_id() -> str:
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+BOOT_ID = _read_boot_id()
+
+
+def process_identity(pid: int):
+    """"<boot id>:<start time>" for a running pid, None if it is not running
+
+    Without /proc (non-Linux) only liveness can be checked, so a reused pid is not detected.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+        return f"{BOOT_ID}:{stat[stat.rindex(')') + 2:].split()[19]}"  # field 22: starttime
+    except (OSError, IndexError, ValueError):
+        if os.path.isdir("/proc/self"):
+            return None
+    return "" if _alive(pid) else None
+
+
+class MetricsRegistry:
+    """One process's histograms and counters, keyed by (metric, handler)"""
+
+    def __init__(self, directory: str = METRICS_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # writers in executor threads share one tmp file
+        self._pending_write = None           # executor future of the snapshot write in flight
+        self._write_again = False            # changed while it ran: write once more after it
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.identity = process_identity(os.getpid())
+
+    def observe(self, name: str, handler: str, ms: float):
+        with self._lock:
+            self.histograms.setdefault((name, handler), Histogram()).observe(ms)
+
+    def inc(self, name: str, handler: str, n: int = 1):
+        with self._lock:
+            self.counters[(name, handler)] = self.counters.get((name, handler), 0) + n
+
+    def set_gauge(self, name: str, handler: str, value: float):
+        with self._lock:
+            self.gauges[(name, handler)] = value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "identity": self.identity,
+                "updated": time.time(),
+                "histograms": {f"{name}|{handler}": h.to_dict() for (name, handler), h in self.histograms.items()},
+                "counters": {f"{name}|{handler}": n for (name, handler), n in self.counters.items()},
+                "gauges": {f"{name}|{handler}": v for (name, handler), v in self.gauges.items()},
+            }
+
+    def write_snapshot(self):
+        """Atomically replace this process's snapshot file (blocking; safe from any thread)"""
+        try:
+            with self._write_lock:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, f"{os.getpid()}.json")
+                tmp = f"{path}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(tmp, path)
+        except OSError as e:
+            print("Metrics snapshot error:", e)
+
+    def write_snapshot_soon(self):
+        """write_snapshot off the event loop (in the default executor); without a running loop it
+        writes inline. Requests made while a write is in flight coalesce into one trailing write."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.write_snapshot()
+        pending = self._pending_write
+        if pending is not None and not pending.done() and pending.get_loop() is loop:
+            self._write_again = True
+            return
+        self._write_again = False
+        self._pending_write = loop.run_in_executor(None, self.write_snapshot)
+        self._pending_write.add_done_callback(self._after_write)
+
+    def _after_write(self, _future):
+        if self._write_again:
+            self.write_snapshot_soon()
+
+    async def snapshots_written(self):
+        """Wait out the in-flight write (and its trailing rewrite), e.g. before remove_snapshot"""
+        while self._pending_write is not None and not self._pending_write.done():
+            await asyncio.wait([self._pending_write])
+
+    def remove_snapshot(self):
+        """Process exit: its totals leave /metrics (Prometheus sees a counter reset)"""
+        try:
+            os.remove(os.path.join(self.directory, f"{os.getpid()}.json"))
+        except OSError:
+            pass
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+# ----------------- PER-CALL TIMELINE -----------------
+class CallTimeline:
+    """Timestamps of one call's milestones and the latencies derived from them
+
+    Call events: stream_start, first_media, stop. Turn events (reset by
+    speech_started): speech_stopped, committed, first_upstream_delta,
+    first_frame_sent, response_done. Only the first occurrence of an event
+    counts, so handlers can call `mark` on every frame.
+    """
+
+    def __init__(self, handler: str, log=None, registry: MetricsRegistry = None):
+        self.handler = handler
+        self.log = log
+        self.registry = registry or _registry
+        self.started_at = time.monotonic()
+        self.call_events = {}
+        self.turn = {}
+        self.turns = []       # per completed turn: event offsets + derived latencies (ms)
+        self.intent_turns = 0     # this call's final transcripts checked by the intent fast-path
+        self.intent_answered = 0  # ... and answered locally
+        self._speaking = False
+        self.registry.inc("calls_started", handler)
+
+    def _ms(self, start: float, end: float) -> float:
+        return (end - start) * 1000
+
+    def mark(self, event: str):
+        if event == "speech_started":
+            self._close_turn()
+            self.turn = {"speech_started": time.monotonic()}
+            self.registry.inc("turns", self.handler)
+            return
+        events = self.turn if event in TURN_EVENTS else self.call_events
+        if event in events:
+            return  # cheap no-op for per-frame calls
+        now = events[event] = time.monotonic()
+
+        if event == "first_media" and "stream_start" in self.call_events:
+            self.registry.observe("media_start", self.handler, self._ms(self.call_events["stream_start"], now))
+        elif event == "first_upstream_delta" and "committed" in self.turn:
+            self.registry.observe("upstream_rtt", self.handler, self._ms(self.turn["committed"], now))
+        elif event == "first_frame_sent":
+            if "speech_stopped" in self.turn:
+                self.registry.observe("turn_latency", self.handler, self._ms(self.turn["speech_stopped"], now))
+            if "committed" in self.turn:
+                name = "intent_answer" if "intent_answered" in self.turn else "time_to_first_audio"
+                self.registry.observe(name, self.handler, self._ms(self.turn["committed"], now))
+
+    def asr_result(self, result: dict):
+        """Vosk handlers: first non-empty partial starts a turn, a non-empty final ends and commits it"""
+        if result.get("text", "").strip():
+            if not self._speaking:
+                self.mark("speech_started")
+            self._speaking = False
+            self.mark("speech_stopped")
+            self.mark("committed")
+        elif result.get("partial", "").strip() and not self._speaking:
+            self._speaking = True
+            self.mark("speech_started")
+
+    def barge_in(self):
+        self.registry.inc("barge_ins", self.handler)
+
+    def _close_turn(self):
+        if not self.turn:
+            return
+        t = self.turn
+        derived = {event: round(self._ms(self.started_at, at)) for event, at in t.items()}  # offsets
+        if "speech_stopped" in t and "first_frame_sent" in t:
+            derived["turn_latency_ms"] = round(self._ms(t["speech_stopped"], t["first_frame_sent"]))
+        if "committed" in t and "first_frame_sent" in t:
+            derived["time_to_first_audio_ms"] = round(self._ms(t["committed"], t["first_frame_sent"]))
+        if "committed" in t and "first_upstream_delta" in t:
+            derived["upstream_rtt_ms"] = round(self._ms(t["committed"], t["first_upstream_delta"]))
+        self.turns.append(derived)
+        self.turn = {}
+
+    def summary(self) -> str:
+        """One structured row: call milestones as ms offsets from handler start, plus per-turn latencies"""
+        offsets = {event: round(self._ms(self.started_at, at)) for event, at in self.call_events.items()}
+        return f"⏱ Timeline {self.handler} — " + json.dumps({"events_ms": offsets, "turns": self.turns})
+
+    def finish(self):
+        """End of call: log the timeline once and publish this process's aggregates"""
+        self.mark("stop")
+        self._close_turn()
+        self.registry.inc("calls_finished", self.handler)
+        if self.log:
+            self.log(self.summary())
+        self.registry.write_snapshot_soon()  # the handler runs on the event loop
+
+
+# ----------------- EXPOSITION -----------------
+def _read_snapshots(directory: str) -> dict:
+    """pid → snapshot of every process still running; stale files are deleted on the way"""
+    snapshots = {}
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            pid = data["pid"]
+        except (OSError, ValueError, KeyError):
+            continue  # being replaced or truncated: skip this scrape
+        if data.get("identity") is None or process_identity(pid) != data["identity"]:
+            try:
+                os.remove(path)  # exited worker, earlier deployment or reused pid
+            except OSError:
+                pass
+            continue
+        snapshots[pid] = data
+    return snapshots
+
+
+def prune_snapshots(directory: str = METRICS_DIR) -> int:
+    """Delete snapshot files of processes that are gone; returns how many are left"""
+    return len(_read_snapshots(directory))
+
+
+def collect(directory: str = METRICS_DIR) -> tuple:
+    """Merge every running process's snapshot (plus this process's live registry) → (histograms, counters, gauges)
+
+    Histograms and counters are summed across processes; gauges stay per pid.
+    """
+    snapshots = _read_snapshots(directory)
+    if _registry.histograms or _registry.counters or _registry.gauges:
+        snapshots[os.getpid()] = _registry.snapshot()
+
+    histograms, counters, gauges = {}, {}, {}
+    for pid, data in snapshots.items():
+        for key, h in data.get("histograms", {}).items():
+            histograms.setdefault(key, Histogram()).merge(Histogram.from_dict(h))
+        for key, n in data.get("counters", {}).items():
+            counters[key] = counters.get(key, 0) + n
+        for key, v in data.get("gauges", {}).items():
+            gauges[(key, pid)] = v
+    return histograms, counters, gauges
+
+
+def render_prometheus(directory: str = METRICS_DIR) -> str:
+    histograms, counters, gauges = collect(directory)
+    lines = []
+    for name, help_text in COUNTERS.items():
+        metric = f"{METRICS_PREFIX}_{name}_total"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for key in sorted(k for k in counters if k.split("|")[0] == name):
+            lines.append(f'{metric}{{handler="{key.split("|")[1]}"}} {counters[key]}')
+
+    for name, help_text in GAUGES.items():
+        metric = f"{METRICS_PREFIX}_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for key, pid in sorted(k for k in gauges if k[0].split("|")[0] == name):
+            lines.append(f'{metric}{{handler="{key.split("|")[1]}",worker="{pid}"}} {gauges[(key, pid)]}')
+
+    for name, help_text in HISTOGRAMS.items():
+        metric = f"{METRICS_PREFIX}_{name}_seconds"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for key in sorted(k for k in histograms if k.split("|")[0] == name):
+            h, handler = histograms[key], key.split("|")[1]
+            cumulative = 0
+            for bound, count in zip(BUCKETS_MS + (None,), h.counts):
+                cumulative += count
+                le = "+Inf" if bound is None else f"{bound / 1000:g}"
+                lines.append(f'{metric}_bucket{{handler="{handler}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{handler="{handler}"}} {h.sum / 1000:.6f}')
+            lines.append(f'{metric}_count{{handler="{handler}"}} {h.count}')
+    return "\n".join(lines) + "\n"
+
+
+def _reset_after_fork():
+    """Forked workers start empty and publish under their own pid"""
+    global _registry
+    _registry = MetricsRegistry(_registry.directory)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,37 +1,232 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
-
-# Load model once
-tokenizer = AutoTokenizer.from_pretrained("microsoft/DialoGPT-small")
-model = AutoModelForCausalLM.from_pretrained("microsoft/DialoGPT-small")
-
-# Ensure pad token is set
-if tokenizer.pad_token is None:
-    tokenizer.pad_token = tokenizer.eos_token
-
-# Put model in eval mode for faster inference
-model.eval()
-device = "cuda" if torch.cuda.is_available() else "cpu"
-model.to(device)
-
-def reply(text: str, max_length: int = 50) -> str:
-    """Generate a response from DialoGPT-small quickly"""
-    with torch.no_grad():  # no gradient, faster
-        # Tokenize input
-        inputs = tokenizer(text, return_tensors="pt", padding=True).to(device)
-        # Generate response
-        reply_ids = model.generate(
-            **inputs,
-            max_length=max_length,
-            pad_token_id=tokenizer.eos_token_id,
-            do_sample=True,           # optional: adds variety
-            top_k=50,                 # optional: limits token choices
-            top_p=0.95,
-            temperature=0.7
-        )
-        # Decode generated ids to text
-        reply_text = tokenizer.decode(reply_ids[:, inputs['input_ids'].shape[-1]:][0], skip_special_tokens=True)
-    return reply_text
+# File: app/services/generate_reply.py
+# DialoGPT-small replies: loaded on first use (or at a warm-up hook), concurrent requests
+# collected into padded batches so they share one `generate` call
+#
+#   await reply_async("Hi!")   # from the event loop: joins the next micro-batch
+#   reply("Hi!")               # blocking, batch of one
+#
+# The batcher waits at most REPLY_BATCH_WINDOW_MS after the first request (or until
+# REPLY_BATCH_MAX requests) and runs the batch on a single generation thread; requests that
+# arrive while a batch is running form the next one. torch gets REPLY_TORCH_THREADS intra-op
+# threads, by default this worker's share of the cores (os.cpu_count() / WS_WORKERS).
+# REPLY_QUANTIZE=int8 runs an int8 dynamically quantized copy on CPU (app/services/reply_quantize.py).
+
+import asyncio
+import collections
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ==================== CONFIG ====================
+REPLY_MODEL = os.getenv("REPLY_MODEL", "microsoft/DialoGPT-small")
+REPLY_DEVICE = os.getenv("REPLY_DEVICE")                                 # default: cuda if available, else cpu
+REPLY_TORCH_THREADS = int(os.getenv("REPLY_TORCH_THREADS", "0"))         # 0 = cores / WS_WORKERS
+REPLY_BATCH_MAX = int(os.getenv("REPLY_BATCH_MAX", "8"))
+REPLY_BATCH_WINDOW_MS = float(os.getenv("REPLY_BATCH_WINDOW_MS", "5"))
+REPLY_QUANTIZE = os.getenv("REPLY_QUANTIZE", "")                         # "" = fp32 | "int8" (CPU only)
+REPLY_MAX_LENGTH = 50
+
+GENERATE_OPTIONS = {
+    "do_sample": True,           # optional: adds variety
+    "top_k": 50,                 # optional: limits token choices
+    "top_p": 0.95,
+    "temperature": 0.7,
+}
+
+
+def default_torch_threads() -> int:
+    """This process's share of the cores when ws_server forks WS_WORKERS workers"""
+    workers = max(1, int(os.getenv("WS_WORKERS", "1")))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+class ReplyEngine:
+    """One model + tokenizer, and the micro-batcher feeding it"""
+
+    def __init__(self, model_name: str = REPLY_MODEL, device: str = REPLY_DEVICE,
+                 max_batch: int = REPLY_BATCH_MAX, window_ms: float = REPLY_BATCH_WINDOW_MS,
+                 torch_threads: int = REPLY_TORCH_THREADS, generate_options: dict = None,
+                 quantize: str = REPLY_QUANTIZE, quantize_lm_head: bool = None):
+        self.model_name = model_name
+        self.device = device
+        self.max_batch = max(1, max_batch)
+        self.window_ms = window_ms
+        self.torch_threads = torch_threads or default_torch_threads()
+        self.generate_options = dict(GENERATE_OPTIONS if generate_options is None else generate_options)
+        if quantize not in ("", "int8"):
+            raise ValueError(f"REPLY_QUANTIZE must be '' or 'int8', got {quantize!r}")
+        self.quantize = quantize
+        self.quantize_lm_head = quantize_lm_head  # None: REPLY_QUANT_LM_HEAD
+        self.model = None
+        self.tokenizer = None
+        self._load_lock = threading.Lock()
+        self._generate_lock = threading.Lock()   # sync reply() callers and the batcher share one model
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reply")
+        self._pending = collections.deque()      # (text, max_length, future) waiting for a batch
+        self._ready = None                       # set when _pending grows; bound to the batcher's loop
+        self._batcher = None
+
+        self.requests = 0
+        self.batches = 0
+        self.load_s = 0.0
+
+    # ----------------- MODEL -----------------
+    def load(self):
+        """Load tokenizer + model once (blocking); safe to call from any thread"""
+        if self.model is not None:
+            return
+        with self._load_lock:
+            if self.model is not None:
+                return
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+
+            start = time.perf_counter()
+            torch.set_num_threads(self.torch_threads)
+            try:
+                torch.set_num_interop_threads(1)  # one generate at a time: inter-op parallelism only adds contention
+            except RuntimeError:
+                pass  # already fixed by earlier torch work in this process
+            if self.quantize:
+                self.device = "cpu"  # quantized kernels are CPU-only
+            self.device = self.device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            tokenizer.padding_side = "left"  # decoder-only: prompts end where generation starts
+            if self.quantize == "int8":
+                from app.services.reply_quantize import REPLY_QUANT_LM_HEAD, load_int8
+                if self.quantize_lm_head is None:
+                    self.quantize_lm_head = REPLY_QUANT_LM_HEAD
+                model = load_int8(self.model_name, lambda: AutoModelForCausalLM.from_pretrained(self.model_name),
+                                  lm_head=self.quantize_lm_head)
+            else:
+                model = AutoModelForCausalLM.from_pretrained(self.model_name)
+            model.eval()
+            model.to(self.device)
+            self.tokenizer, self.model = tokenizer, model
+            self.load_s = time.perf_counter() - start
+
+    def warm_up(self):
+        """Load and run one tiny generation, so the first caller pays neither"""
+        self.load()
+        self.generate(["Hi"], [8])
+
+    def generate(self, texts: list, max_lengths: list) -> list:
+        """Blocking: one padded `generate` for all prompts; max_length counts prompt + reply tokens"""
+        import torch
+
+        self.load()
+        # the fast tokenizer is not thread-safe either ("Already borrowed"): encode and decode under the lock
+        with self._generate_lock, torch.inference_mode():
+            inputs = self.tokenizer(texts, return_tensors="pt", padding=True).to(self.device)
+            prompt_lens = inputs["attention_mask"].sum(dim=1).tolist()
+            budgets = [max(1, limit - n) for limit, n in zip(max_lengths, prompt_lens)]
+            reply_ids = self.model.generate(
+                **inputs,
+                max_new_tokens=max(budgets),
+                pad_token_id=self.tokenizer.eos_token_id,
+                **self.generate_options,
+            )
+            new_tokens = reply_ids[:, inputs["input_ids"].shape[-1]:]
+            replies = [self.tokenizer.decode(ids[:budget], skip_special_tokens=True)
+                       for ids, budget in zip(new_tokens, budgets)]
+            self.requests += len(texts)
+            self.batches += 1
+        return replies
+
+    # ----------------- MICRO-BATCHING -----------------
+    async def submit(self, text: str, max_length: int = REPLY_MAX_LENGTH) -> str:
+        loop = asyncio.get_running_loop()
+        if self._batcher is None or self._batcher.done() or self._batcher.get_loop() is not loop:
+            self._pending = collections.deque()
+            self._ready = asyncio.Event()
+            self._batcher = loop.create_task(self._run())
+        future = loop.create_future()
+        self._pending.append((text, max_length, future))
+        self._ready.set()
+        return await future
+
+    async def _collect(self) -> list:
+        """Wait for a first request, then up to window_ms for the batch to fill"""
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        if len(self._pending) < self.max_batch and self.window_ms > 0:
+            try:
+                async with asyncio.timeout(self.window_ms / 1000):
+                    while len(self._pending) < self.max_batch:
+                        self._ready.clear()
+                        await self._ready.wait()
+            except TimeoutError:
+                pass
+        batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+        return [item for item in batch if not item[2].cancelled()]  # caller hung up while queued
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+            try:
+                replies = await loop.run_in_executor(
+                    self._executor, self.generate, [text for text, _, _ in batch], [n for _, n, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, _, future), text in zip(batch, replies):
+                if not future.done():
+                    future.set_result(text)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "torch_threads": self.torch_threads,
+            "quantize": self.quantize or "fp32",
+            "load_s": round(self.load_s, 2),
+        }
+
+
+_engine = None
+
+
+def get_reply_engine() -> ReplyEngine:
+    global _engine
+    if _engine is None:
+        _engine = ReplyEngine()
+    return _engine
+
+
+def _reset_after_fork():
+    """torch thread pools and the batcher do not survive fork: each worker loads its own engine"""
+    global _engine
+    _engine = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def warm_up():
+    """Startup hook: load the model before the first reply is needed (blocking)"""
+    get_reply_engine().warm_up()
+
+
+def reply(text: str, max_length: int = REPLY_MAX_LENGTH) -> str:
+    """Generate a response from DialoGPT-small (blocking, batch of one)"""
+    return get_reply_engine().generate([text], [max_length])[0]
+
+
+async def reply_async(text: str, max_length: int = REPLY_MAX_LENGTH) -> str:
+    """Generate a response, sharing a padded batch with concurrent callers"""
+    return await get_reply_engine().submit(text, max_length)
+
 
 # Example usage
 if __name__ == "__main__":
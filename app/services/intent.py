@@ -0,0 +1,231 @@
+# File: app/services/intent.py
+# Local intent fast-path: "marks → NEET rank" questions answered from the rank table, so those
+# turns skip the LLM round trip entirely
+#
+# `match(transcript)` runs on every final transcript (Vosk handlers, and the realtime bridge's
+# input_audio_transcription.completed). Numbers may be digits (650, ६५०), English words
+# ("six hundred fifty", "six fifty") or Hindi words ("छह सौ पचास", "साढ़े छह सौ"). Replies only
+# name the rank band, so the ~65 possible answers can be pre-rendered into the TTS cache.
+
+import os
+import re
+import unicodedata
+
+from app.services.neet_service import MAX_MARKS, RANK_RANGES, predict_neet_rank
+
+# ==================== CONFIG ====================
+INTENT_FAST_PATH = os.getenv("INTENT_FAST_PATH", "1") == "1"
+INTENT_PREWARM = os.getenv("INTENT_PREWARM", "1") == "1"   # synthesize every answer at worker start
+
+NEET_RANK = "neet_rank"
+
+# ----------------- NUMBERS -----------------
+HINDI_UNITS = {
+    "शून्य": 0, "एक": 1, "दो": 2, "तीन": 3, "चार": 4, "पांच": 5, "पाँच": 5, "छह": 6, "छः": 6, "छे": 6, "छै": 6,
+    "सात": 7, "आठ": 8, "नौ": 9, "दस": 10, "ग्यारह": 11, "बारह": 12, "तेरह": 13, "चौदह": 14, "पंद्रह": 15,
+    "पन्द्रह": 15, "सोलह": 16, "सत्रह": 17, "अठारह": 18, "उन्नीस": 19, "बीस": 20, "इक्कीस": 21, "बाईस": 22,
+    "तेईस": 23, "चौबीस": 24, "पच्चीस": 25, "छब्बीस": 26, "सत्ताईस": 27, "अट्ठाईस": 28, "अठाईस": 28,
+    "उनतीस": 29, "तीस": 30, "इकतीस": 31, "इकत्तीस": 31, "बत्तीस": 32, "तैंतीस": 33, "चौंतीस": 34, "पैंतीस": 35,
+    "छत्तीस": 36, "सैंतीस": 37, "अड़तीस": 38, "उनतालीस": 39, "चालीस": 40, "इकतालीस": 41, "बयालीस": 42,
+    "तैंतालीस": 43, "चवालीस": 44, "पैंतालीस": 45, "छियालीस": 46, "सैंतालीस": 47, "अड़तालीस": 48,
+    "उनचास": 49, "पचास": 50, "इक्यावन": 51, "बावन": 52, "तिरेपन": 53, "तिरपन": 53, "चौवन": 54, "पचपन": 55,
+    "छप्पन": 56, "सत्तावन": 57, "अट्ठावन": 58, "उनसठ": 59, "साठ": 60, "इकसठ": 61, "बासठ": 62, "तिरेसठ": 63,
+    "तिरसठ": 63, "चौंसठ": 64, "पैंसठ": 65, "छियासठ": 66, "सड़सठ": 67, "अड़सठ": 68, "उनहत्तर": 69, "सत्तर": 70,
+    "इकहत्तर": 71, "बहत्तर": 72, "तिहत्तर": 73, "चौहत्तर": 74, "पचहत्तर": 75, "छिहत्तर": 76, "सतहत्तर": 77,
+    "अठहत्तर": 78, "उन्यासी": 79, "उनासी": 79, "अस्सी": 80, "इक्यासी": 81, "बयासी": 82, "तिरासी": 83,
+    "चौरासी": 84, "पचासी": 85, "छियासी": 86, "सत्तासी": 87, "अट्ठासी": 88, "नवासी": 89, "नब्बे": 90,
+    "इक्यानवे": 91, "बानवे": 92, "तिरानवे": 93, "चौरानवे": 94, "पचानवे": 95, "छियानवे": 96, "सत्तानवे": 97,
+    "अट्ठानवे": 98, "निन्यानवे": 99,
+}
+ENGLISH_UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+    "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16,
+    "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+ENGLISH_TENS = {"twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80,
+                "ninety": 90}
+HUNDRED = {"सौ", "hundred"}
+THOUSAND = {"हज़ार", "हजार", "thousand", "hazar", "hazaar"}
+# Hindi fractional quantities: साढ़े छह सौ = 650, सवा छह सौ = 625, पौने सात सौ = 675, डेढ़ सौ = 150, ढाई सौ = 250
+FRACTION_PREFIX = {"साढ़े": 50, "साढे": 50, "सवा": 25, "पौने": -25}
+FRACTION_UNITS = {"डेढ़": 1.5, "डेढ": 1.5, "ढाई": 2.5}
+
+WORD_VALUES = {**HINDI_UNITS, **ENGLISH_UNITS, **ENGLISH_TENS}
+_DEVANAGARI_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+_TOKEN = re.compile(r"\d+|[^\s\d\-.,!?।॥:;\"'()]+")  # not \w: Devanagari matras are not alphanumeric
+NUMBER_FILLERS = {"and", "और"}  # "six hundred and fifty"
+
+# ----------------- INTENT WORDS -----------------
+RANK_WORDS = {"rank", "ranking", "रैंक", "रेंक", "रैंकिंग", "रेंकिंग", "रंक"}
+MARKS_WORDS = {"marks", "mark", "score", "scored", "नंबर", "नम्बर", "अंक", "मार्क्स", "मार्क", "स्कोर"}
+NEET_WORDS = {"neet", "नीट"}
+# "मेरे 650 आए", "I got 650", "650 मिले"
+SCORED_WORDS = {"आए", "आये", "आया", "मिले", "मिला", "got", "get", "scored", "aaye", "aye", "mile", "aaya"}
+# "कितने नंबर चाहिए", "how many marks": asking for marks, not a rank
+HOW_MANY_WORDS = {"कितने", "कितना", "कितनी", "kitne", "kitna", "kitni", "many", "much"}
+
+
+def _tokens(text: str) -> list:
+    # NFC keeps nukta letters decomposed (ज़ = ज + ़), however the ASR spelled them
+    return _TOKEN.findall(unicodedata.normalize("NFC", text).translate(_DEVANAGARI_DIGITS).lower())
+
+
+def number_spans(tokens: list) -> list:
+    """(value, first token, end token) for every number spoken or written in `tokens`"""
+    spans = []
+    big = value = current = 0
+    prefix = 0
+    first = None
+
+    def flush(end):
+        nonlocal big, value, current, prefix, first
+        if first is not None and (big or value or current or not prefix):  # a lone "सवा" is no number
+            spans.append((int(big + value + current), first, end))
+        big = value = current = prefix = 0
+        first = None
+
+    for i, token in enumerate(tokens):
+        if token.isdigit():
+            flush(i)
+            spans.append((int(token), i, i + 1))
+        elif token in FRACTION_PREFIX:
+            flush(i)
+            prefix, first = FRACTION_PREFIX[token], i
+        elif token in FRACTION_UNITS:
+            if not prefix:
+                flush(i)
+            current, first = FRACTION_UNITS[token], i if first is None else first
+        elif token in HUNDRED and first is not None:
+            value += (current or 1) * 100 + prefix
+            current, prefix = 0, 0
+        elif token in THOUSAND and first is not None and not prefix:
+            big += (value + current or 1) * 1000
+            value = current = 0
+        elif token in NUMBER_FILLERS and (big or value) and not current:
+            continue
+        elif token in WORD_VALUES:
+            n = WORD_VALUES[token]
+            if first is None or prefix and not current:
+                current, first = n, i if first is None else first
+            elif current in ENGLISH_TENS.values() and n < 10:
+                current += n                    # "fifty five"
+            elif 0 < current < 10 and 10 <= n < 100 and not value and not big:
+                value, current = current * 100, n  # "six fifty", "छह पचास"
+            elif (value or big) and not current and n < 100:
+                current = n                     # "six hundred fifty", "two thousand twenty"
+            else:
+                flush(i)
+                current, first = n, i
+        else:
+            flush(i)
+    flush(len(tokens))
+    return spans
+
+
+def parse_numbers(text: str) -> list:
+    """Every number spoken or written in `text`, in order"""
+    return [value for value, _, _ in number_spans(_tokens(text))]
+
+
+# ----------------- INTENTS -----------------
+class IntentAnswer:
+    __slots__ = ("intent", "marks", "text")
+
+    def __init__(self, intent: str, marks: int, text: str):
+        self.intent = intent
+        self.marks = marks
+        self.text = text
+
+    def __repr__(self):
+        return f"IntentAnswer({self.intent!r}, marks={self.marks}, text={self.text!r})"
+
+
+def rank_answer_text(rank: str) -> str:
+    """Spoken reply for a rank band label ("500 - 1000" or "1750199+")"""
+    if rank.endswith("+"):
+        return f"इन अंकों पर आपकी अनुमानित नीट रैंक {rank[:-1]} से ऊपर होगी।"
+    low, high = rank.split(" - ")
+    return f"इन अंकों पर आपकी अनुमानित नीट रैंक {low} से {high} के बीच होगी।"
+
+
+def answer_texts() -> list:
+    """Every reply `match` can produce (for pre-rendering)"""
+    bands = [f"{r['min_rank']} - {r['max_rank']}" for r in RANK_RANGES] + [predict_neet_rank(0)]
+    return [rank_answer_text(band) for band in dict.fromkeys(bands)]
+
+
+def _marks_in(tokens: list):
+    """The marks the caller says they scored, or None
+
+    A number counts only next to a marks word or a "got / आए" word; numbers next to a rank
+    word ("रैंक 500", "top 100 rank") are ranks, and "कितने नंबर" / "how many marks" asks for
+    marks rather than giving them.
+    """
+    for i, token in enumerate(tokens):
+        if token in MARKS_WORDS and i and tokens[i - 1] in HOW_MANY_WORDS:
+            return None
+    for value, first, end in number_spans(tokens):
+        before = tokens[first - 1] if first else None
+        after = tokens[end] if end < len(tokens) else None
+        if not 0 <= value <= MAX_MARKS or before in RANK_WORDS or after in RANK_WORDS:
+            continue
+        if before in MARKS_WORDS or after in MARKS_WORDS or before in SCORED_WORDS or after in SCORED_WORDS:
+            return value
+    return None
+
+
+def match(transcript: str):
+    """IntentAnswer for a marks → rank question, or None (the turn goes to the normal reply path)"""
+    if not INTENT_FAST_PATH or not transcript:
+        return None
+    tokens = _tokens(transcript)
+    words = set(tokens)
+    if not (words & RANK_WORDS or (words & NEET_WORDS and words & MARKS_WORDS)):
+        return None
+    marks = _marks_in(tokens)
+    if marks is None:
+        return None
+    return IntentAnswer(NEET_RANK, marks, rank_answer_text(predict_neet_rank(marks)))
+
+
+def prewarm(lang: str = "hi") -> int:
+    """Synthesize every possible answer into the TTS cache (blocking); returns answers rendered"""
+    if not (INTENT_FAST_PATH and INTENT_PREWARM):
+        return 0
+    from app.tts.cache import get_tts_cache
+    try:
+        return get_tts_cache().warm(answer_texts(), lang=lang)
+    except Exception as e:  # offline: the rest are synthesized on first use instead
+        print("Intent prewarm stopped:", e)
+        return 0
+
+
+# ----------------- STATS -----------------
+def record_turn(timeline, answer):
+    """Count one final transcript; a local answer's first frame lands in `intent_answer`, not `time_to_first_audio`"""
+    timeline.intent_turns += 1
+    timeline.registry.inc("intent_turns", timeline.handler)
+    if answer is not None:
+        timeline.intent_answered += 1
+        timeline.registry.inc("intent_answered", timeline.handler)
+        timeline.mark("intent_answered")
+
+
+def summary(timeline) -> str:
+    """This call's share of turns answered locally and first-audio latency vs its other turns
+
+    Call after `timeline.finish()`; process-wide totals are on /metrics.
+    """
+    turns, answered = timeline.intent_turns, timeline.intent_answered
+    line = f"🧭 Intent fast-path {timeline.handler}: {answered}/{turns} turns answered locally"
+    if turns:
+        line += f" ({answered / turns:.0%})"
+    local = [t["time_to_first_audio_ms"] for t in timeline.turns
+             if "time_to_first_audio_ms" in t and "intent_answered" in t]
+    other = [t["time_to_first_audio_ms"] for t in timeline.turns
+             if "time_to_first_audio_ms" in t and "intent_answered" not in t]
+    if local and other:
+        local_ms, other_ms = sum(local) / len(local), sum(other) / len(other)
+        line += (f", first audio {local_ms:.0f} ms vs {other_ms:.0f} ms otherwise"
+                 f" → ~{other_ms - local_ms:.0f} ms saved per answered turn")
+    return line
@@ -1,72 +1,122 @@
+# File: app/services/neet_service.py
+# NEET marks → expected rank band: O(1) per-mark lookup table built once at import, plus a
+# vectorized batch lookup for scoring whole student lists
+#
+# Boundary semantics: marks are floored to whole marks, and a mark belongs to the best-rank
+# band whose inclusive [min_marks, max_marks] range contains it. Bands meet at shared end
+# points (e.g. 715 and 700 each sit in two ranges), so the better band wins there. Anything
+# from MIN_MARKS up to the lowest band is "1750199+"; marks outside MIN_MARKS..MAX_MARKS are invalid.
 
-def predict_neet_rank(marks: int) -> str:
-    rank_ranges = [
-        {"min_rank": 1, "max_rank": 2, "min_marks": 715, "max_marks": 720},
-        {"min_rank": 3, "max_rank": 5, "min_marks": 700, "max_marks": 715},
-        {"min_rank": 6, "max_rank": 15, "min_marks": 691, "max_marks": 700},
-        {"min_rank": 15, "max_rank": 30, "min_marks": 681, "max_marks": 690},
-        {"min_rank": 30, "max_rank": 80, "min_marks": 671, "max_marks": 680},
-        {"min_rank": 80, "max_rank": 200, "min_marks": 661, "max_marks": 670},
-        {"min_rank": 200, "max_rank": 500, "min_marks": 651, "max_marks": 660},
-        {"min_rank": 500, "max_rank": 1000, "min_marks": 641, "max_marks": 650},
-        {"min_rank": 1000, "max_rank": 1600, "min_marks": 631, "max_marks": 640},
-        {"min_rank": 1600, "max_rank": 2300, "min_marks": 621, "max_marks": 630},
-        {"min_rank": 2300, "max_rank": 3000, "min_marks": 611, "max_marks": 620},
-        {"min_rank": 3000, "max_rank": 5000, "min_marks": 601, "max_marks": 610},
-        {"min_rank": 5000, "max_rank": 7000, "min_marks": 590, "max_marks": 600},
-        {"min_rank": 7000, "max_rank": 9000, "min_marks": 581, "max_marks": 590},
-        {"min_rank": 9000, "max_rank": 11000, "min_marks": 571, "max_marks": 580},
-        {"min_rank": 11000, "max_rank": 13000, "min_marks": 561, "max_marks": 570},
-        {"min_rank": 13000, "max_rank": 15000, "min_marks": 551, "max_marks": 560},
-        {"min_rank": 15000, "max_rank": 17000, "min_marks": 541, "max_marks": 550},
-        {"min_rank": 17000, "max_rank": 19000, "min_marks": 531, "max_marks": 540},
-        {"min_rank": 19000, "max_rank": 21000, "min_marks": 521, "max_marks": 530},
-        {"min_rank": 21000, "max_rank": 24000, "min_marks": 511, "max_marks": 520},
-        {"min_rank": 24000, "max_rank": 27000, "min_marks": 501, "max_marks": 510},
-        {"min_rank": 27000, "max_rank": 30000, "min_marks": 491, "max_marks": 500},
-        {"min_rank": 30000, "max_rank": 45000, "min_marks": 481, "max_marks": 490},
-        {"min_rank": 45000, "max_rank": 60000, "min_marks": 471, "max_marks": 480},
-        {"min_rank": 60000, "max_rank": 80000, "min_marks": 461, "max_marks": 470},
-        {"min_rank": 80000, "max_rank": 100000, "min_marks": 451, "max_marks": 460},
-        {"min_rank": 100000, "max_rank": 120000, "min_marks": 441, "max_marks": 450},
-        {"min_rank": 120000, "max_rank": 140000, "min_marks": 431, "max_marks": 440},
-        {"min_rank": 140000, "max_rank": 160000, "min_marks": 421, "max_marks": 430},
-        {"min_rank": 160000, "max_rank": 180000, "min_marks": 411, "max_marks": 420},
-        {"min_rank": 180000, "max_rank": 200000, "min_marks": 401, "max_marks": 410},
-        {"min_rank": 200000, "max_rank": 220000, "min_marks": 391, "max_marks": 400},
-        {"min_rank": 220000, "max_rank": 240000, "min_marks": 381, "max_marks": 390},
-        {"min_rank": 240000, "max_rank": 260000, "min_marks": 371, "max_marks": 380},
-        {"min_rank": 260000, "max_rank": 280000, "min_marks": 361, "max_marks": 370},
-        {"min_rank": 280000, "max_rank": 300000, "min_marks": 351, "max_marks": 360},
-        {"min_rank": 300000, "max_rank": 320000, "min_marks": 341, "max_marks": 350},
-        {"min_rank": 320000, "max_rank": 340000, "min_marks": 331, "max_marks": 340},
-        {"min_rank": 340000, "max_rank": 360000, "min_marks": 321, "max_marks": 330},
-        {"min_rank": 360000, "max_rank": 380000, "min_marks": 311, "max_marks": 320},
-        {"min_rank": 380000, "max_rank": 400000, "min_marks": 301, "max_marks": 310},
-        {"min_rank": 400000, "max_rank": 420000, "min_marks": 291, "max_marks": 300},
-        {"min_rank": 420000, "max_rank": 440000, "min_marks": 281, "max_marks": 290},
-        {"min_rank": 440000, "max_rank": 460000, "min_marks": 271, "max_marks": 280},
-        {"min_rank": 460000, "max_rank": 480000, "min_marks": 261, "max_marks": 270},
-        {"min_rank": 480000, "max_rank": 500000, "min_marks": 251, "max_marks": 260},
-        {"min_rank": 500000, "max_rank": 520000, "min_marks": 241, "max_marks": 250},
-        {"min_rank": 520000, "max_rank": 540000, "min_marks": 231, "max_marks": 240},
-        {"min_rank": 540000, "max_rank": 560000, "min_marks": 221, "max_marks": 230},
-        {"min_rank": 560000, "max_rank": 580000, "min_marks": 211, "max_marks": 220},
-        {"min_rank": 580000, "max_rank": 600000, "min_marks": 201, "max_marks": 210},
-        {"min_rank": 600000, "max_rank": 620000, "min_marks": 191, "max_marks": 200},
-        {"min_rank": 620000, "max_rank": 640000, "min_marks": 181, "max_marks": 190},
-        {"min_rank": 640000, "max_rank": 660000, "min_marks": 171, "max_marks": 180},
-        {"min_rank": 660000, "max_rank": 680000, "min_marks": 161, "max_marks": 170},
-        {"min_rank": 680000, "max_rank": 700000, "min_marks": 151, "max_marks": 160},
-        {"min_rank": 700000, "max_rank": 730000, "min_marks": 141, "max_marks": 150},
-        {"min_rank": 730000, "max_rank": 800000, "min_marks": 131, "max_marks": 140},
-        {"min_rank": 800000, "max_rank": 870000, "min_marks": 121, "max_marks": 130},
-        {"min_rank": 870000, "max_rank": 940000, "min_marks": 111, "max_marks": 120},
-        {"min_rank": 940000, "max_rank": 1030000, "min_marks": 97, "max_marks": 110},
-    ]
+import math
 
-    for r in rank_ranges:
-        if r["min_marks"] <= marks <= r["max_marks"]:
-            return f"{r['min_rank']} - {r['max_rank']}"
+import numpy as np
 
-    return "1750199+"
+MIN_MARKS = -180   # every answer wrong (-1 each for 180 questions)
+MAX_MARKS = 720
+BELOW_LABEL = "1750199+"
+INVALID_LABEL = "invalid"
+
+# Best rank first; order decides overlapping end points
+RANK_RANGES = [
+    {"min_rank": 1, "max_rank": 2, "min_marks": 715, "max_marks": 720},
+    {"min_rank": 3, "max_rank": 5, "min_marks": 700, "max_marks": 715},
+    {"min_rank": 6, "max_rank": 15, "min_marks": 691, "max_marks": 700},
+    {"min_rank": 15, "max_rank": 30, "min_marks": 681, "max_marks": 690},
+    {"min_rank": 30, "max_rank": 80, "min_marks": 671, "max_marks": 680},
+    {"min_rank": 80, "max_rank": 200, "min_marks": 661, "max_marks": 670},
+    {"min_rank": 200, "max_rank": 500, "min_marks": 651, "max_marks": 660},
+    {"min_rank": 500, "max_rank": 1000, "min_marks": 641, "max_marks": 650},
+    {"min_rank": 1000, "max_rank": 1600, "min_marks": 631, "max_marks": 640},
+    {"min_rank": 1600, "max_rank": 2300, "min_marks": 621, "max_marks": 630},
+    {"min_rank": 2300, "max_rank": 3000, "min_marks": 611, "max_marks": 620},
+    {"min_rank": 3000, "max_rank": 5000, "min_marks": 601, "max_marks": 610},
+    {"min_rank": 5000, "max_rank": 7000, "min_marks": 590, "max_marks": 600},
+    {"min_rank": 7000, "max_rank": 9000, "min_marks": 581, "max_marks": 590},
+    {"min_rank": 9000, "max_rank": 11000, "min_marks": 571, "max_marks": 580},
+    {"min_rank": 11000, "max_rank": 13000, "min_marks": 561, "max_marks": 570},
+    {"min_rank": 13000, "max_rank": 15000, "min_marks": 551, "max_marks": 560},
+    {"min_rank": 15000, "max_rank": 17000, "min_marks": 541, "max_marks": 550},
+    {"min_rank": 17000, "max_rank": 19000, "min_marks": 531, "max_marks": 540},
+    {"min_rank": 19000, "max_rank": 21000, "min_marks": 521, "max_marks": 530},
+    {"min_rank": 21000, "max_rank": 24000, "min_marks": 511, "max_marks": 520},
+    {"min_rank": 24000, "max_rank": 27000, "min_marks": 501, "max_marks": 510},
+    {"min_rank": 27000, "max_rank": 30000, "min_marks": 491, "max_marks": 500},
+    {"min_rank": 30000, "max_rank": 45000, "min_marks": 481, "max_marks": 490},
+    {"min_rank": 45000, "max_rank": 60000, "min_marks": 471, "max_marks": 480},
+    {"min_rank": 60000, "max_rank": 80000, "min_marks": 461, "max_marks": 470},
+    {"min_rank": 80000, "max_rank": 100000, "min_marks": 451, "max_marks": 460},
+    {"min_rank": 100000, "max_rank": 120000, "min_marks": 441, "max_marks": 450},
+    {"min_rank": 120000, "max_rank": 140000, "min_marks": 431, "max_marks": 440},
+    {"min_rank": 140000, "max_rank": 160000, "min_marks": 421, "max_marks": 430},
+    {"min_rank": 160000, "max_rank": 180000, "min_marks": 411, "max_marks": 420},
+    {"min_rank": 180000, "max_rank": 200000, "min_marks": 401, "max_marks": 410},
+    {"min_rank": 200000, "max_rank": 220000, "min_marks": 391, "max_marks": 400},
+    {"min_rank": 220000, "max_rank": 240000, "min_marks": 381, "max_marks": 390},
+    {"min_rank": 240000, "max_rank": 260000, "min_marks": 371, "max_marks": 380},
+    {"min_rank": 260000, "max_rank": 280000, "min_marks": 361, "max_marks": 370},
+    {"min_rank": 280000, "max_rank": 300000, "min_marks": 351, "max_marks": 360},
+    {"min_rank": 300000, "max_rank": 320000, "min_marks": 341, "max_marks": 350},
+    {"min_rank": 320000, "max_rank": 340000, "min_marks": 331, "max_marks": 340},
+    {"min_rank": 340000, "max_rank": 360000, "min_marks": 321, "max_marks": 330},
+    {"min_rank": 360000, "max_rank": 380000, "min_marks": 311, "max_marks": 320},
+    {"min_rank": 380000, "max_rank": 400000, "min_marks": 301, "max_marks": 310},
+    {"min_rank": 400000, "max_rank": 420000, "min_marks": 291, "max_marks": 300},
+    {"min_rank": 420000, "max_rank": 440000, "min_marks": 281, "max_marks": 290},
+    {"min_rank": 440000, "max_rank": 460000, "min_marks": 271, "max_marks": 280},
+    {"min_rank": 460000, "max_rank": 480000, "min_marks": 261, "max_marks": 270},
+    {"min_rank": 480000, "max_rank": 500000, "min_marks": 251, "max_marks": 260},
+    {"min_rank": 500000, "max_rank": 520000, "min_marks": 241, "max_marks": 250},
+    {"min_rank": 520000, "max_rank": 540000, "min_marks": 231, "max_marks": 240},
+    {"min_rank": 540000, "max_rank": 560000, "min_marks": 221, "max_marks": 230},
+    {"min_rank": 560000, "max_rank": 580000, "min_marks": 211, "max_marks": 220},
+    {"min_rank": 580000, "max_rank": 600000, "min_marks": 201, "max_marks": 210},
+    {"min_rank": 600000, "max_rank": 620000, "min_marks": 191, "max_marks": 200},
+    {"min_rank": 620000, "max_rank": 640000, "min_marks": 181, "max_marks": 190},
+    {"min_rank": 640000, "max_rank": 660000, "min_marks": 171, "max_marks": 180},
+    {"min_rank": 660000, "max_rank": 680000, "min_marks": 161, "max_marks": 170},
+    {"min_rank": 680000, "max_rank": 700000, "min_marks": 151, "max_marks": 160},
+    {"min_rank": 700000, "max_rank": 730000, "min_marks": 141, "max_marks": 150},
+    {"min_rank": 730000, "max_rank": 800000, "min_marks": 131, "max_marks": 140},
+    {"min_rank": 800000, "max_rank": 870000, "min_marks": 121, "max_marks": 130},
+    {"min_rank": 870000, "max_rank": 940000, "min_marks": 111, "max_marks": 120},
+    {"min_rank": 940000, "max_rank": 1030000, "min_marks": 97, "max_marks": 110},]
+
+
+def _build_tables():
+    labels = [f"{r['min_rank']} - {r['max_rank']}" for r in RANK_RANGES] + [BELOW_LABEL, INVALID_LABEL]
+    below, invalid = len(RANK_RANGES), len(RANK_RANGES) + 1
+    band_by_mark = np.full(MAX_MARKS - MIN_MARKS + 1, below, dtype=np.int16)
+    for band in range(len(RANK_RANGES) - 1, -1, -1):  # worst first, so better bands overwrite shared marks
+        r = RANK_RANGES[band]
+        band_by_mark[r["min_marks"] - MIN_MARKS:r["max_marks"] - MIN_MARKS + 1] = band
+    return labels, band_by_mark, invalid
+
+
+LABELS, BAND_BY_MARK, INVALID_BAND = _build_tables()
+_LABEL_BY_MARK = [LABELS[band] for band in BAND_BY_MARK]  # plain list: fastest scalar lookup
+_LABELS_NP = np.array(LABELS)
+
+
+def predict_neet_rank(marks) -> str:
+    """Rank band for one score, e.g. "500 - 1000"; ValueError outside MIN_MARKS..MAX_MARKS"""
+    if not math.isfinite(marks):  # inf / NaN: floor() would raise OverflowError / a conversion error
+        raise ValueError(f"NEET marks must be between {MIN_MARKS} and {MAX_MARKS}, got {marks}")
+    index = math.floor(marks) - MIN_MARKS
+    if not 0 <= index < len(_LABEL_BY_MARK):
+        raise ValueError(f"NEET marks must be between {MIN_MARKS} and {MAX_MARKS}, got {marks}")
+    return _LABEL_BY_MARK[index]
+
+
+def rank_bands(marks) -> np.ndarray:
+    """Band index per score (index into RANK_RANGES; len(RANK_RANGES) = below the table, INVALID_BAND = out of range / NaN)"""
+    values = np.asarray(marks, dtype=np.float64)
+    index = np.floor(np.nan_to_num(values, nan=MAX_MARKS + 1)) - MIN_MARKS
+    valid = (index >= 0) & (index < len(BAND_BY_MARK))
+    bands = np.full(values.shape, INVALID_BAND, dtype=np.int16)
+    bands[valid] = BAND_BY_MARK[index[valid].astype(np.intp)]
+    return bands
+
+
+def predict_neet_rank_batch(marks) -> np.ndarray:
+    """Rank band labels for an array of scores; out-of-range or missing scores get INVALID_LABEL"""
+    return _LABELS_NP[rank_bands(marks)]
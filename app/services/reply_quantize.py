@@ -0,0 +1,93 @@
+# File: app/services/reply_quantize.py
+# Int8 dynamic quantization of the reply model for CPU-only servers, cached on disk
+#
+# GPT-2 / DialoGPT projections are transformers' Conv1D (x @ W + b), which quantize_dynamic
+# does not recognise, so they are first rewritten as nn.Linear with the transposed weight.
+# Every linear layer becomes int8 (weights int8, activations quantized per batch at run time),
+# lm_head included: the 768 × 50257 output projection is about a third of DialoGPT-small's
+# weights and the largest matmul per generated token. It gets its own int8 copy of the weight it
+# shares with the token embedding; the embedding lookup and layer norms stay fp32.
+# REPLY_QUANT_LM_HEAD=0 keeps lm_head fp32 (decoder body only), for comparing the two in
+# benchmarks/bench_reply_quant.py. The converted module is pickled under REPLY_QUANT_CACHE_DIR,
+# keyed by model, variant and library versions, so later starts load it directly instead of
+# converting again.
+
+import os
+import time
+
+# ==================== CONFIG ====================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPLY_QUANT_CACHE_DIR = os.getenv("REPLY_QUANT_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "reply_models"))
+REPLY_QUANT_LM_HEAD = os.getenv("REPLY_QUANT_LM_HEAD", "1") == "1"   # 0: lm_head stays fp32
+
+
+def conv1d_to_linear(model):
+    """Replace every transformers Conv1D with an equivalent nn.Linear, in place"""
+    from torch import nn
+    from transformers.pytorch_utils import Conv1D
+
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = nn.Linear(in_features, out_features)
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(module, name, linear)
+    return model
+
+
+def quantize_int8(model, lm_head: bool = REPLY_QUANT_LM_HEAD):
+    """fp32 model → int8 dynamically quantized linear layers (CPU only); lm_head=False keeps it fp32"""
+    import torch
+    from torch import nn
+
+    model = conv1d_to_linear(model).to("cpu").eval()
+    torch.ao.quantization.quantize_dynamic(model if lm_head else model.base_model, {nn.Linear},
+                                           dtype=torch.qint8, inplace=True)
+    return model
+
+
+def cache_path(model_name: str, directory: str = REPLY_QUANT_CACHE_DIR, lm_head: bool = REPLY_QUANT_LM_HEAD) -> str:
+    import torch
+    import transformers
+
+    name = model_name.replace("/", "--")
+    variant = "int8" if lm_head else "int8body"  # int8body: lm_head fp32
+    return os.path.join(directory, f"{name}-{variant}-torch{torch.__version__}-tf{transformers.__version__}.pt")
+
+
+def load_int8(model_name: str, load_fp32, directory: str = REPLY_QUANT_CACHE_DIR, lm_head: bool = REPLY_QUANT_LM_HEAD):
+    """Quantized model from the disk cache, or `load_fp32()` converted (and cached) on a miss"""
+    import torch
+
+    path = cache_path(model_name, directory, lm_head)
+    if os.path.exists(path):
+        try:
+            return torch.load(path, weights_only=False).eval()  # our own cache file: full module pickle
+        except Exception as e:
+            print("Quantized reply model cache unreadable, converting again:", e)
+
+    start = time.perf_counter()
+    model = quantize_int8(load_fp32(), lm_head)
+    print(f"Quantized {model_name} to int8{'' if lm_head else ' (lm_head fp32)'} "
+          f"in {time.perf_counter() - start:.1f} s")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        torch.save(model, tmp)
+        os.replace(tmp, path)  # atomic: another worker never loads a partial file
+    except OSError as e:
+        print("Quantized reply model cache write error:", e)
+    return model
+
+
+def model_bytes(model) -> int:
+    """Serialized state_dict size: counts packed int8 weights, which parameters() does not"""
+    import io
+
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
@@ -0,0 +1,131 @@
+# File: app/services/turn_state.py
+# Per-call turn orchestration for the realtime bridge: exactly one response per user turn
+
+import os
+import time
+
+from app.services.turn_telemetry import VOICE_LOG_VERBOSITY
+
+# ==================== CONFIG ====================
+# "server_vad" → the server commits the buffer and creates the response; we never send either.
+# "manual"     → no server turn detection; the bridge endpoints locally and commits once per turn.
+REALTIME_TURN_MODE = os.getenv("REALTIME_TURN_MODE", "server_vad")
+
+LISTENING = "listening"      # caller's turn, nothing committed yet
+COMMITTED = "committed"      # user audio committed, waiting for response.created
+GENERATING = "generating"    # response created, no audio yet
+PLAYING = "playing"          # audio deltas flowing to Twilio
+INTERRUPTED = "interrupted"  # caller barged in; the old response is being cancelled
+
+SERVER_VAD = {
+    "type": "server_vad",
+    "threshold": 0.5,
+    "prefix_padding_ms": 300,
+    "silence_duration_ms": 400,
+}
+
+
+def turn_detection(mode: str = REALTIME_TURN_MODE):
+    """turn_detection block for session.update (None: manual mode, the bridge endpoints itself)"""
+    return dict(SERVER_VAD) if mode == "server_vad" else None
+
+
+class TurnStateMachine:
+    """listening → committed → generating → playing → listening (or → interrupted on barge-in)
+
+    Guarantees one response per user turn: in server_vad mode the client
+    never commits or creates responses itself, in manual mode it does so at
+    most once per turn, and any extra response.created in the same turn is
+    cancelled. Records speech_stopped → first audio delta latency per turn.
+    """
+
+    def __init__(self, send, log, mode: str = REALTIME_TURN_MODE, response_options: dict = None,
+                 verbosity: str = VOICE_LOG_VERBOSITY):
+        self.send = send            # coroutine fn posting a JSON event upstream
+        self.log = log
+        self.trace_transitions = verbosity == "chunk"
+        self.mode = mode
+        self.response_options = response_options or {}
+        self.state = LISTENING
+        self.turn = 0
+        self.response_id = None
+        self.responses_this_turn = 0
+        self.duplicates_cancelled = 0
+        self.answered_locally = False   # this turn was answered by the intent fast-path
+        self.latencies_ms = []      # speech_stopped → first audio delta, per turn
+        self._speech_stopped_at = None
+
+    @property
+    def generating(self) -> bool:
+        return self.state in (GENERATING, PLAYING)
+
+    def _to(self, state: str):
+        if state != self.state:
+            if self.trace_transitions:
+                self.log(f"🔀 Turn {self.turn}: {self.state} → {state}")
+            self.state = state
+
+    # ----------------- CALLER SPEECH -----------------
+    def on_speech_started(self) -> bool:
+        """New user turn; returns True if it interrupts a response in progress"""
+        interrupted = self.generating
+        self.turn += 1
+        self.responses_this_turn = 0
+        self.answered_locally = False
+        self._speech_stopped_at = None
+        self._to(INTERRUPTED if interrupted else LISTENING)
+        return interrupted
+
+    async def on_speech_stopped(self):
+        self._speech_stopped_at = time.monotonic()
+        if self.mode == "manual" and self.state in (LISTENING, INTERRUPTED) and self.responses_this_turn == 0:
+            await self.send({"type": "input_audio_buffer.commit"})
+            await self.send({"type": "response.create", "response": self.response_options})
+        self._to(COMMITTED)
+
+    def on_committed(self):
+        if self.state in (LISTENING, INTERRUPTED):
+            self._to(COMMITTED)
+
+    # ----------------- RESPONSES -----------------
+    async def on_response_created(self, response_id: str):
+        if self.answered_locally:
+            self.log(f"🧭 Turn {self.turn} answered locally — cancelling response {response_id}")
+            await self.send({"type": "response.cancel", "response_id": response_id})
+            return
+        if self.responses_this_turn >= 1:
+            self.duplicates_cancelled += 1
+            self.log(f"♻ Duplicate response {response_id} in turn {self.turn} — cancelling")
+            await self.send({"type": "response.cancel", "response_id": response_id})
+            return
+        self.responses_this_turn += 1
+        self.response_id = response_id
+        self._to(GENERATING)
+
+    def is_current(self, response_id: str) -> bool:
+        """False for deltas of a cancelled (barge-in) or duplicate response"""
+        return response_id is None or response_id == self.response_id
+
+    def on_audio_delta(self, response_id: str):
+        if self.state == GENERATING and self.is_current(response_id):
+            if self._speech_stopped_at is not None:
+                latency = (time.monotonic() - self._speech_stopped_at) * 1000
+                self.latencies_ms.append(latency)
+                self.log(f"⏱ Turn {self.turn}: speech_stopped → first audio {latency:.0f} ms")
+            self._to(PLAYING)
+
+    def on_response_done(self, response_id: str):
+        if self.is_current(response_id) and self.generating:
+            self._to(LISTENING)
+
+    def on_interrupt_sent(self):
+        """The bridge cancelled the current response (barge-in)"""
+        self.response_id = None
+
+    async def on_local_answer(self):
+        """The bridge answered this turn itself: cancel the model's response, now or once it is created"""
+        if self.generating:
+            await self.send({"type": "response.cancel"})
+            self.on_interrupt_sent()
+        self.answered_locally = True
+        self._to(LISTENING)
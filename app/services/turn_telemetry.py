@@ -0,0 +1,85 @@
+# File: app/services/turn_telemetry.py
+# Per-response accumulator for the realtime bridge: one log row per turn instead of one per delta
+
+import os
+import time
+
+# ==================== CONFIG ====================
+# "turn"  → one summary row per response (default)
+# "chunk" → additionally log every audio/text delta (debugging only)
+VOICE_LOG_VERBOSITY = os.getenv("VOICE_LOG_VERBOSITY", "turn")
+G711_BYTES_PER_MS = 8  # 8 kHz, 1 byte per sample
+
+
+def b64_decoded_len(payload: str) -> int:
+    """Decoded size of a base64 payload without decoding it"""
+    padding = 2 if payload.endswith("==") else 1 if payload.endswith("=") else 0
+    return len(payload) * 3 // 4 - padding
+
+
+class TurnTelemetry:
+    """Collects the deltas of one response and emits a single summary record"""
+
+    def __init__(self, log, verbosity: str = VOICE_LOG_VERBOSITY):
+        self.log = log
+        self.trace_chunks = verbosity == "chunk"
+        self.reset()
+
+    def reset(self):
+        self.response_id = None
+        self.audio_chunks = 0
+        self.audio_bytes = 0
+        self.text_deltas = 0
+        self.text_parts = []
+        self.started_at = None
+        self.first_audio_at = None
+        self.last_delta_at = None
+
+    def _touch(self, response_id):
+        now = time.monotonic()
+        if self.started_at is None:
+            self.started_at = now
+        if response_id and not self.response_id:
+            self.response_id = response_id
+        self.last_delta_at = now
+        return now
+
+    def add_audio(self, payload: str, response_id: str = None):
+        now = self._touch(response_id)
+        if self.first_audio_at is None:
+            self.first_audio_at = now
+        size = b64_decoded_len(payload)
+        self.audio_chunks += 1
+        self.audio_bytes += size
+        if self.trace_chunks:
+            self.log(f"🔊 Sending audio chunk ({size} bytes)")
+
+    def add_text(self, delta: str, response_id: str = None):
+        self._touch(response_id)
+        if not delta:
+            return
+        self.text_deltas += 1
+        self.text_parts.append(delta)
+        if self.trace_chunks:
+            self.log(f"💬 AI (text): {delta}")
+
+    @property
+    def text(self) -> str:
+        return "".join(self.text_parts)
+
+    def summary(self, status: str = "completed") -> str:
+        duration_ms = (self.last_delta_at - self.started_at) * 1000 if self.started_at else 0.0
+        first_audio_ms = (self.first_audio_at - self.started_at) * 1000 if self.first_audio_at else 0.0
+        return (
+            f"🧾 Turn {status} — response={self.response_id or '-'} "
+            f"audio_chunks={self.audio_chunks} audio_bytes={self.audio_bytes} "
+            f"audio_ms={self.audio_bytes // G711_BYTES_PER_MS} text_deltas={self.text_deltas} "
+            f"first_audio_ms={first_audio_ms:.0f} stream_ms={duration_ms:.0f} "
+            f"text={self.text!r}"
+        )
+
+    def finish(self, status: str = "completed"):
+        """Emit one summary row for the response and start a new turn"""
+        if self.started_at is not None:
+            self.log(self.summary(status))
+        self.reset()
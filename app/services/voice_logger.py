@@ -1,14 +1,108 @@
 from sqlalchemy import text
 from app.database import engine
+import atexit
+import collections
+import os
+import threading
 import traceback
 
+# ==================== CONFIG ====================
+# Rows are queued in-process and written by a background flusher thread, so
+# callers on the asyncio loop never wait for a MySQL round trip.
+LOG_QUEUE_SIZE = int(os.getenv("VOICE_LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("VOICE_LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL = float(os.getenv("VOICE_LOG_FLUSH_INTERVAL", "1.0"))  # seconds
+LOG_OVERFLOW_POLICY = os.getenv("VOICE_LOG_OVERFLOW", "drop_oldest")       # "drop_oldest" | "block"
 
-def log_voice_reply(speech: str):
+INSERT_QUERY = text("INSERT INTO voice_logs (speech_text) VALUES (:speech)")
+
+_queue = collections.deque()
+_cond = threading.Condition()
+_flusher = None
+_closed = False
+dropped_count = 0
+
+
+# ----------------- DB WRITER -----------------
+def _insert_batch(batch: list):
+    """Write queued rows with a single multi-row executemany"""
     try:
-        query = text("INSERT INTO voice_logs (speech_text) VALUES (:speech)")
         with engine.begin() as conn:
-            conn.execute(query, {"speech": speech})
-        print("LOG INSERTED")
+            conn.execute(INSERT_QUERY, [{"speech": speech} for speech in batch])
+        print(f"LOG INSERTED ({len(batch)} rows)")
     except Exception as e:
         print("DB Logging Error:", e)
-        print(traceback.format_exc())
\ No newline at end of file
+        print(traceback.format_exc())
+
+
+def _flush_loop():
+    """Background flusher: writes on batch size or flush interval, drains on shutdown"""
+    while True:
+        with _cond:
+            if len(_queue) < LOG_BATCH_SIZE and not _closed:
+                _cond.wait_for(lambda: len(_queue) >= LOG_BATCH_SIZE or _closed, LOG_FLUSH_INTERVAL)
+            batch = [_queue.popleft() for _ in range(min(LOG_BATCH_SIZE, len(_queue)))]
+            done = _closed and not _queue
+            _cond.notify_all()  # wake producers blocked on a full queue
+
+        if batch:
+            _insert_batch(batch)
+        if done:
+            return
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is None or not _flusher.is_alive():
+        _flusher = threading.Thread(target=_flush_loop, name="voice-log-flusher", daemon=True)
+        _flusher.start()
+
+
+# ----------------- PUBLIC API -----------------
+def log_voice_reply(speech: str):
+    """Queue a voice log row; the background flusher inserts it in batches"""
+    global dropped_count
+    with _cond:
+        if len(_queue) >= LOG_QUEUE_SIZE and not _closed:
+            if LOG_OVERFLOW_POLICY == "block":
+                _cond.wait_for(lambda: len(_queue) < LOG_QUEUE_SIZE or _closed)
+            else:
+                _queue.popleft()
+                dropped_count += 1
+
+        if _closed:
+            _insert_batch([speech])  # logger already shut down: write through
+            return
+
+        _queue.append(speech)
+        _ensure_flusher()
+        if len(_queue) >= LOG_BATCH_SIZE:
+            _cond.notify_all()
+
+
+def shutdown_voice_logger(timeout: float = 10.0):
+    """Flush every queued row and stop the flusher thread"""
+    global _closed
+    with _cond:
+        _closed = True
+        _cond.notify_all()
+        flusher = _flusher
+
+    if flusher is not None:
+        flusher.join(timeout)
+    elif _queue:
+        _insert_batch(list(_queue))
+        _queue.clear()
+
+
+def _reset_after_fork():
+    """Forked workers start with an empty queue and their own flusher"""
+    global _cond, _flusher, _closed
+    _queue.clear()
+    _cond = threading.Condition()
+    _flusher = None
+    _closed = False
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(shutdown_voice_logger)
@@ -1,20 +1,21 @@
 import base64
 import json
+import asyncio
 import websockets
-import audioop
-from vosk import Model, KaldiRecognizer
+from app.audio import codec
+from app.audio.resample import StreamResampler
+from app.asr.vosk_stream import VoskStream
+from app.asr.worker_pool import get_recognition_pool
+from app.asr.model_registry import acquire_recognizer, release_recognizer
 from app.services.voice_logger import log_voice_reply
-from gtts import gTTS
-from pydub import AudioSegment
-import io
-import os
+from app.services.call_metrics import CallTimeline
+from app.services import intent
+from app.tts.cache import get_tts_cache
+from app.streaming.sender import PacedSender
+from app.tts.pipeline import speak
+from app.streaming import protocol
 
-# ==================== CONFIG ====================
-VOSK_MODEL_PATH = "/var/www/voice-bot.v4edu.in/models/hindi"
-if not os.path.exists(VOSK_MODEL_PATH):
-    raise Exception(f"Vosk model not found at {VOSK_MODEL_PATH}")
-
-vosk_model = Model(VOSK_MODEL_PATH)
+FINAL_REPLY_TIMEOUT_S = 5.0  # after `stop`: longest the last utterance's reply may hold up cleanup
 
 # ----------------- AUDIO UTILITIES -----------------
 def decode_base64_audio(payload: str) -> bytes:
@@ -26,16 +27,18 @@ def decode_base64_audio(payload: str) -> bytes:
 
 def mulaw_to_pcm16(mulaw_bytes: bytes) -> bytes:
     """Convert μ-law 8-bit → PCM16"""
-    return audioop.ulaw2lin(mulaw_bytes, 2)
+    return codec.ulaw2lin(mulaw_bytes)
 
-def resample_audio(pcm16: bytes, in_rate=8000, out_rate=16000) -> bytes:
-    """Resample audio from 8kHz → 16kHz"""
-    return audioop.ratecv(pcm16, 2, 1, in_rate, out_rate, None)[0]
+def resample_audio(pcm16: bytes, in_rate=8000, out_rate=16000, resampler=None) -> bytes:
+    """Resample audio from 8kHz → 16kHz; pass the call's StreamResampler to keep filter state across frames"""
+    if resampler is None:
+        resampler = StreamResampler(in_rate, out_rate)
+    return resampler.process(pcm16)
 
 # ----------------- SPEECH RECOGNITION -----------------
 def init_recognizer(sample_rate=16000):
-    """Initialize Vosk recognizer"""
-    return KaldiRecognizer(vosk_model, sample_rate)
+    """Take a reset recognizer from the shared model's pool"""
+    return acquire_recognizer(sample_rate)
 
 def recognize_audio(recognizer, audio_chunk: bytes) -> dict:
     """Recognize audio chunk; returns final or partial transcript"""
@@ -45,104 +48,109 @@ def recognize_audio(recognizer, audio_chunk: bytes) -> dict:
 
 # ----------------- TEXT TO SPEECH -----------------
 def text_to_ws_audio(text: str) -> str:
-    """Convert text → μ-law Base64 audio for Twilio WS streaming"""
-    tts = gTTS(text=text, lang="hi")
-    mp3_fp = io.BytesIO()
-    tts.write_to_fp(mp3_fp)
-    mp3_fp.seek(0)
-
-    audio = AudioSegment.from_file(mp3_fp, format="mp3")
-    audio = audio.set_frame_rate(8000).set_channels(1).set_sample_width(2)
-    pcm16 = audio.raw_data
-    mulaw = audioop.lin2ulaw(pcm16, 2)
+    """Convert text → μ-law Base64 audio for Twilio WS streaming (cached: repeats skip gTTS and transcoding)"""
+    mulaw = get_tts_cache().get(text, lang="hi")
     return base64.b64encode(mulaw).decode("utf-8")
 
 # ----------------- WS RESPONSE SENDER -----------------
-async def send_ws_response(websocket, stream_sid, text, sequence_number, chunk_number, timestamp):
-    """Send a Twilio MediaStream-compliant audio message"""
-    audio_b64 = text_to_ws_audio(text)
-    await websocket.send(json.dumps({
-        "event": "media",
-        "streamSid": stream_sid,
-        "media": {
-            "payload": audio_b64,
-            "track": "outbound",
-            "chunk": str(chunk_number),
-            "timestamp": str(timestamp)
-        },
-        "sequenceNumber": str(sequence_number)
-    }))
-    sequence_number += 1
-    chunk_number += 1
-    timestamp += 20
-    return sequence_number, chunk_number, timestamp
+async def send_ws_response(sender: PacedSender, text: str, timeline: CallTimeline = None):
+    """Synthesize the reply sentence by sentence off the loop; each segment plays as paced 20 ms frames"""
+    on_first_audio = (lambda: timeline.mark("first_upstream_delta")) if timeline else None
+    first_audio = await speak(sender, text, lang="hi", on_first_audio=on_first_audio)
+    log_voice_reply(f"Reply queued, time-to-first-audio={first_audio * 1000:.0f} ms")
 
 # ----------------- PROCESS RECOGNITION RESULT -----------------
-async def process_recognition_result(websocket, stream_sid, result, sequence_number, chunk_number, timestamp):
+async def process_recognition_result(sender: PacedSender, result: dict, timeline: CallTimeline = None):
     """
     Handles Vosk recognition result.
     Sends TTS reply only for final transcript, partials are logged.
     """
     partial = result.get("partial", "").strip()
     final = result.get("text", "").strip()
+    if timeline:
+        timeline.asr_result(result)
 
     if partial and not final:
         log_voice_reply(f"Partial: {partial}")
 
     if final:
         log_voice_reply(f"User: {final}")
-        reply_text = f"आपने कहा: {final}"
-        sequence_number, chunk_number, timestamp = await send_ws_response(
-            websocket,
-            stream_sid,
-            reply_text,
-            sequence_number,
-            chunk_number,
-            timestamp
-        )
-
-    return sequence_number, chunk_number, timestamp
+        answer = intent.match(final)
+        if timeline:
+            intent.record_turn(timeline, answer)
+        if answer:
+            log_voice_reply(f"Intent {answer.intent}: marks={answer.marks} → answered locally")
+            reply_text = answer.text
+        else:
+            reply_text = f"आपने कहा: {final}"
+        await send_ws_response(sender, reply_text, timeline)
+
+# ----------------- CALL END -----------------
+async def close_session(session) -> dict:
+    """Decode what is still queued; a failed decoder must not skip the rest of the cleanup"""
+    try:
+        return await session.close()
+    except Exception as e:
+        log_voice_reply(f"Recognizer failed: {e}")
+        return {}
+
+async def finish_replies(reply_task: asyncio.Task):
+    """Let the reply task handle the results still coming out of the closed session, within limits"""
+    await asyncio.wait([reply_task], timeout=FINAL_REPLY_TIMEOUT_S)
+    reply_task.cancel()
+    if reply_task.done() and not reply_task.cancelled() and reply_task.exception():
+        log_voice_reply(f"Reply failed: {reply_task.exception()}")
 
 # ----------------- WEBSOCKET HANDLER -----------------
 async def handle_ws_service(websocket: websockets.WebSocketServerProtocol):
     log_voice_reply("Client connected (Twilio)")
-    stream_sid = None
     recognizer = init_recognizer()
-    sequence_number = 1
-    chunk_number = 1
-    timestamp = 0
-
-    async for message in websocket:
-        try:
-            data = json.loads(message)
-        except json.JSONDecodeError:
-            continue
-
-        event = data.get("event")
-
-        if event == "start":
-            stream_sid = data.get("start", {}).get("streamSid")
-            log_voice_reply(f"Stream started, stream_sid={stream_sid}")
-            continue
-
-        if event == "media":
-            audio_bytes = decode_base64_audio(data["media"]["payload"])
-            pcm16 = mulaw_to_pcm16(audio_bytes)
-            resampled = resample_audio(pcm16)
-
-            result = recognize_audio(recognizer, resampled)
-
-            sequence_number, chunk_number, timestamp = await process_recognition_result(
-                websocket,
-                stream_sid,
-                result,
-                sequence_number,
-                chunk_number,
-                timestamp
-            )
-
-        elif event == "stop":
-            log_voice_reply("Twilio stream stopped")
-            break
+    session = get_recognition_pool().open_session(VoskStream(recognizer))  # decoding runs off the loop
+    resampler = StreamResampler(8000, 16000)
+    timeline = CallTimeline("vosk_repeat", log_voice_reply)
+    # owns sequence numbers / timestamps for outbound audio
+    sender = PacedSender(websocket, on_frame_sent=lambda: timeline.mark("first_frame_sent"))
+
+    async def reply_to_results():
+        async for result in session.results():
+            await process_recognition_result(sender, result, timeline)
+
+    reply_task = asyncio.create_task(reply_to_results())
+    stopped = False
+
+    try:
+        async for message in websocket:
+            event = protocol.parse_event(message)  # media: payload sliced out, no full JSON parse
+            if event is None:
+                continue
+
+            if event.event == "start":
+                sender.stream_sid = event.stream_sid
+                timeline.mark("stream_start")
+                log_voice_reply(f"Stream started, stream_sid={sender.stream_sid}")
+                continue
+
+            if event.event == "media":
+                timeline.mark("first_media")
+                audio_bytes = decode_base64_audio(event.payload)
+                pcm16 = mulaw_to_pcm16(audio_bytes)
+                resampled = resample_audio(pcm16, resampler=resampler)
+                await session.put(resampled)
+
+            elif event.event == "stop":
+                log_voice_reply("Twilio stream stopped")
+                stopped = True
+                break
+    finally:
+        if not stopped:
+            reply_task.cancel()  # hang-up / error: nobody left to answer
+        final = (await close_session(session)).get("text", "").strip()
+        release_recognizer(recognizer)
+        await finish_replies(reply_task)  # stop: the last queued frames may still hold a final
+        await sender.cancel(clear=False)  # the call is gone: just stop sending
+        if final:
+            log_voice_reply(f"User (final): {final}")
+        timeline.finish()
+        log_voice_reply(intent.summary(timeline))
 
     log_voice_reply("Client disconnected")
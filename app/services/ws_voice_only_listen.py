@@ -1,18 +1,14 @@
 import base64
-import json
+import asyncio
 import websockets
-import audioop
-from vosk import Model, KaldiRecognizer
+from app.audio import codec
+from app.audio.resample import StreamResampler
+from app.asr.vosk_stream import VoskStream
+from app.asr.worker_pool import get_recognition_pool
+from app.asr.model_registry import acquire_recognizer, release_recognizer
 from app.services.voice_logger import log_voice_reply
-
-# ==================== CONFIG ====================
-VOSK_MODEL_PATH = "/var/www/voice-bot.v4edu.in/models/hindi"
-
-import os
-if not os.path.exists(VOSK_MODEL_PATH):
-    raise Exception(f"Vosk model not found at {VOSK_MODEL_PATH}")
-
-vosk_model = Model(VOSK_MODEL_PATH)
+from app.services.call_metrics import CallTimeline
+from app.streaming import protocol
 
 
 def decode_base64(payload: str) -> bytes:
@@ -27,44 +23,57 @@ async def handle_ws_service(websocket: websockets.WebSocketServerProtocol):
     log_voice_reply("Client connected (Twilio)")
 
     # --- Initialize Vosk recognizer ---
-    recognizer = KaldiRecognizer(vosk_model, 16000)  # 16 kHz sampling for user speech
-
-    async for message in websocket:
-        try:
-            data = json.loads(message)
-        except:
-            continue
-
-        event = data.get("event")
-        if event == "start":
-            log_voice_reply("Twilio stream started")
-            continue
-
-        if event == "media":
-            payload_b64 = data["media"]["payload"]
-            mulaw_8khz = decode_base64(payload_b64)
-
-            # Convert μ-law → linear PCM16
-            linear = audioop.ulaw2lin(mulaw_8khz, 2)
-
-            # Resample 8kHz → 16kHz for Vosk
-            resampled = audioop.ratecv(linear, 2, 1, 8000, 16000, None)[0]
-
-            # Recognize speech
-            if recognizer.AcceptWaveform(resampled):
-                result = json.loads(recognizer.Result())
-                text = result.get("text", "").strip()
-                if text:
-                    log_voice_reply(f"User: {text}")
-            else:
-                # partial result if needed
-                partial = json.loads(recognizer.PartialResult())
-                if partial.get("partial", "").strip():
-                    log_voice_reply(f"User (partial): {partial['partial']}")
-
-        elif event == "stop":
-            log_voice_reply("Twilio stream stopped")
-            break
+    recognizer = acquire_recognizer(16000)           # 16 kHz, shared model, pooled recognizer
+    session = get_recognition_pool().open_session(VoskStream(recognizer))  # decoded on a pinned worker thread
+    resampler = StreamResampler(8000, 16000)          # keeps filter state across frames
+    timeline = CallTimeline("vosk_listen", log_voice_reply)
+
+    async def log_results():
+        async for result in session.results():
+            timeline.asr_result(result)
+            text = result.get("text", "").strip()
+            if text:
+                log_voice_reply(f"User: {text}")
+            elif result.get("partial", "").strip():
+                log_voice_reply(f"User (partial): {result['partial']}")
+
+    results_task = asyncio.create_task(log_results())
+
+    try:
+        async for message in websocket:
+            event = protocol.parse_event(message)  # media: payload sliced out, no full JSON parse
+            if event is None:
+                continue
+
+            if event.event == "start":
+                timeline.mark("stream_start")
+                log_voice_reply("Twilio stream started")
+                continue
+
+            if event.event == "media":
+                timeline.mark("first_media")
+                payload_b64 = event.payload
+                mulaw_8khz = decode_base64(payload_b64)
+
+                # Convert μ-law → linear PCM16
+                linear = codec.ulaw2lin(mulaw_8khz)
+
+                # Resample 8kHz → 16kHz for Vosk
+                resampled = resampler.process(linear)
+
+                # Recognize speech (queued; backpressure if the worker falls behind)
+                await session.put(resampled)
+
+            elif event.event == "stop":
+                log_voice_reply("Twilio stream stopped")
+                break
+    finally:
+        text = (await session.close()).get("text", "").strip()
+        await results_task  # drain results decoded before the stop
+        release_recognizer(recognizer)
+        if text:
+            log_voice_reply(f"User: {text}")
+        timeline.finish()
 
     print("Client disconnected")
-    log_voice_reply("Client disconnected")
\ No newline at end of file
+    log_voice_reply("Client disconnected")
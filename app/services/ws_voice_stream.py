@@ -3,128 +3,247 @@
 
 import os
 import json
+import uuid
+import base64
 import asyncio
 import aiohttp
+import websockets
 from app.services.voice_logger import log_voice_reply
+from app.services.turn_telemetry import TurnTelemetry, b64_decoded_len
+from app.services.barge_in import BargeInStats, PlaybackTracker
+from app.services.call_metrics import CallTimeline
+from app.services.turn_state import TurnStateMachine, turn_detection
+from app.realtime.session_pool import get_realtime_pool
+from app.services.admission import get_admission
+from app.services import intent
+from app.tts.pipeline import synthesize_segments
+from app.audio.vad import EnergyEndpointer
+from app.streaming import protocol
+from app.streaming.writer import TwilioWriter
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise Exception("❌ OPENAI_API_KEY missing from environment")
 
+# Point at websocket/fake_realtime_server.py to run the bridge offline (any API key works there)
+OPENAI_REALTIME_URL = os.getenv("OPENAI_REALTIME_URL", "wss://api.openai.com/v1/realtime")
+REALTIME_MODEL = os.getenv("REALTIME_MODEL", "gpt-4o-realtime-preview")
 # URL = "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01"
-URL = "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview"
+URL = f"{OPENAI_REALTIME_URL}?model={REALTIME_MODEL}"
+MAX_OUTPUT_TOKENS = 150
+LOCAL_ITEM_PREFIX = "intent_"  # conversation items the bridge answered itself
+HEADERS = {
+    "Authorization": f"Bearer {OPENAI_API_KEY}",
+    "OpenAI-Beta": "realtime=v1",
+}
+
+# 🔥 Real-Time Speech-to-Speech session config, applied by the pool before a call picks the socket up
+SESSION_CONFIG = {
+    "modalities": ["audio", "text"],   # REQUIRED
+    "instructions": (
+        "तुम एक दोस्ताना हिंदी बोलने वाले असिस्टेंट हो। "
+        "हमेशा सिर्फ हिंदी में जवाब दो, आवाज में। "
+        "जवाब छोटा, मीठा और मददगार हो।"
+    ),
+    "voice": "coral",                   # Works if speech is enabled
+    "input_audio_format": "g711_ulaw",
+    "output_audio_format": "g711_ulaw", # Twilio compatible
+    "turn_detection": turn_detection(),  # REALTIME_TURN_MODE; None: manual mode
+    "max_response_output_tokens": MAX_OUTPUT_TOKENS,  # also caps server-created responses
+    "input_audio_transcription": {      # Whisper ASR
+        "model": "gpt-4o-mini-transcribe",
+        "language": "hi",
+    },
+}
+
+
+def realtime_pool():
+    """Process-wide pool of connected, configured realtime sockets"""
+    return get_realtime_pool(URL, HEADERS, SESSION_CONFIG)
 
 
 async def handle_ws_service(websocket):
     log = lambda msg: log_voice_reply(f"[VOICE-AI] {msg}")
 
     stream_sid = None
-    is_generating = False
+    turn = TurnTelemetry(log)
+    playback = PlaybackTracker()
+    barge_in = BargeInStats(MAX_OUTPUT_TOKENS)
+    timeline = CallTimeline("realtime", log)  # stream/turn milestones → /metrics histograms
 
     log("📞 Twilio call connected")
 
-    async with aiohttp.ClientSession() as session:
-        async with session.ws_connect(
-            URL,
-            headers={
-                "Authorization": f"Bearer {OPENAI_API_KEY}",
-                "OpenAI-Beta": "realtime=v1",
-            },
-        ) as oai:
-
-            # 🔥 Configure Real-Time Speech-to-Speech Mode
-            await oai.send_json({
-                "type": "session.update",
-                "session": {
-                    "modalities": ["audio", "text"],   # REQUIRED
-                    "instructions": (
-                        "तुम एक दोस्ताना हिंदी बोलने वाले असिस्टेंट हो। "
-                        "हमेशा सिर्फ हिंदी में जवाब दो, आवाज में। "
-                        "जवाब छोटा, मीठा और मददगार हो।"
-                    ),
-                    "voice": "coral",                   # Works if speech is enabled
-                    "input_audio_format": "g711_ulaw",
-                    "output_audio_format": "g711_ulaw", # Twilio compatible
-                    "turn_detection": {
-                        "type": "server_vad",
-                        "threshold": 0.5,
-                        "prefix_padding_ms": 300,
-                        "silence_duration_ms": 400,
-                    },
-                    "input_audio_transcription": {      # Whisper ASR
-                        "model": "gpt-4o-mini-transcribe",
-                        "language": "hi",
-                    },
-                }
+    # Warm socket from the pool: already connected and configured, no handshake on pickup
+    async with get_admission().upstream_session(), await realtime_pool().acquire() as oai:
+
+        turns = TurnStateMachine(oai.send_json, log, response_options={
+            "modalities": ["audio", "text"],
+            "max_output_tokens": MAX_OUTPUT_TOKENS,
+        })
+        endpointer = EnergyEndpointer() if turns.mode == "manual" else None
+        # Outbound queue + writer task: a slow Twilio socket never stalls the OpenAI read loop
+        def on_media_sent(item_id, n_bytes):
+            timeline.mark("first_frame_sent")
+            return playback.on_audio_sent(item_id, n_bytes)
+
+        writer = TwilioWriter(websocket, on_media_sent=on_media_sent, log=log)
+
+        # ✂ Caller talked over the reply: stop generating, flush Twilio, trim history to what was heard
+        async def interrupt(cancel: bool):
+            if cancel:
+                await oai.send_json({"type": "response.cancel"})
+                turns.on_interrupt_sent()  # later deltas of that response are no longer current
+            barge_in.bytes_dropped += writer.clear()  # queued audio never sent + Twilio `clear`
+            if playback.item_id and not playback.item_id.startswith(LOCAL_ITEM_PREFIX):  # ours: not upstream
+                await oai.send_json({
+                    "type": "conversation.item.truncate",
+                    "item_id": playback.item_id,
+                    "content_index": 0,
+                    "audio_end_ms": playback.played_ms,
+                })
+            barge_in.on_interrupt(playback.unplayed_ms)
+            timeline.barge_in()
+            log(f"✂ Barge-in at {playback.played_ms} ms, {playback.unplayed_ms} ms unplayed audio cleared")
+            playback.reset()
+
+        # 🔄 Handle OpenAI → Twilio streaming
+        async def on_speech_started():
+            log("🎙 User started speaking")
+            timeline.mark("speech_started")
+            interrupted = turns.on_speech_started()
+            if interrupted or playback.unplayed_ms or writer.queue_depth:
+                await interrupt(cancel=interrupted)
+
+        async def on_speech_stopped():
+            timeline.mark("speech_stopped")
+            await turns.on_speech_stopped()   # server_vad: server commits + responds on its own
+
+        # 🧭 Marks → rank question: answer from the rank table, the model's response is cancelled
+        async def on_transcript(text: str):
+            log(f"📝 User: {text}")
+            answer = intent.match(text)
+            intent.record_turn(timeline, answer)
+            if answer is None or not stream_sid:
+                return
+            log(f"🧭 Intent {answer.intent}: marks={answer.marks} → answered locally")
+            await turns.on_local_answer()
+            if playback.unplayed_ms or writer.queue_depth:
+                barge_in.bytes_dropped += writer.clear()  # model audio that slipped out before the transcript
+                playback.reset()
+            item_id = f"{LOCAL_ITEM_PREFIX}{uuid.uuid4().hex[:16]}"
+            await oai.send_json({  # keep the model's context in step with what the caller heard
+                "type": "conversation.item.create",
+                "item": {"id": item_id, "type": "message", "role": "assistant",
+                         "content": [{"type": "text", "text": answer.text}]},
             })
-
-            # 🔄 Handle OpenAI → Twilio streaming
-            async def openai_to_twilio():
-                nonlocal is_generating
-
-                async for msg in oai:
-                    if msg.type != aiohttp.WSMsgType.TEXT:
-                        continue
-
-                    data = json.loads(msg.data)
-                    event_type = data.get("type")
-
-                    if event_type == "input_audio_buffer.speech_started":
-                        log("🎙 User started speaking")
-
-                    elif event_type == "input_audio_buffer.speech_stopped":
-                        await oai.send_json({"type": "input_audio_buffer.commit"})   # 🔥 flush instantly
-                        await oai.send_json({
-                            "type": "response.create",
-                            "response": {
-                                "modalities": ["audio", "text"],
-                                "stream": True,                     # ⚡ Start speaking before full answer generated
-                                "max_output_tokens": 150,
-                            }
-                        })
-                        is_generating = True
-
-                    elif event_type == "response.audio.delta":
-                        if stream_sid:
-                            await websocket.send(json.dumps({
-                                "event": "media",
-                                "streamSid": stream_sid,
-                                "media": {"payload": data["delta"]}
-                            }))
-                            log(f"🔊 Sending audio chunk ({len(data['delta'])} bytes)")
-
-                    elif event_type == "response.text.delta":
-                        log(f"💬 AI (text): {data.get('delta')}")
-
-                    elif event_type == "response.completed":
-                        log("✔ OpenAI finished speaking")
-                        is_generating = False
-
-                    elif event_type == "error":
-                        log(f"🚨 OPENAI ERROR: {json.dumps(data.get('error'), ensure_ascii=False)}")
-
-            forward_task = asyncio.create_task(openai_to_twilio())
-
-            # 🎯 Handle Twilio → OpenAI audio incoming
+            segments = synthesize_segments(answer.text, lang="hi")  # pre-rendered: cache hit
+            try:
+                async for mulaw in segments:
+                    writer.write_audio(mulaw, item_id)
+            finally:
+                await segments.aclose()
+            writer.flush()
+
+        local_answers = set()  # transcript handlers run beside the read loop (a TTS miss must not stall it)
+
+        async def openai_to_twilio():
+            async for msg in oai:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+
+                data = protocol.loads(msg.data)
+                event_type = data.get("type")
+
+                if event_type == "input_audio_buffer.speech_started":
+                    await on_speech_started()
+
+                elif event_type == "input_audio_buffer.speech_stopped":
+                    await on_speech_stopped()
+
+                elif event_type == "input_audio_buffer.committed":
+                    timeline.mark("committed")
+                    turns.on_committed()
+
+                elif event_type == "conversation.item.input_audio_transcription.completed":
+                    task = asyncio.create_task(on_transcript(data.get("transcript", "").strip()))
+                    local_answers.add(task)
+                    task.add_done_callback(local_answers.discard)
+
+                elif event_type == "response.created":
+                    await turns.on_response_created(data.get("response", {}).get("id"))
+
+                elif event_type == "response.audio.delta":
+                    if not turns.is_current(data.get("response_id")):  # cancelled or duplicate response
+                        barge_in.bytes_dropped += b64_decoded_len(data["delta"])
+                    elif stream_sid:
+                        timeline.mark("first_upstream_delta")
+                        turns.on_audio_delta(data.get("response_id"))
+                        writer.write_audio(base64.b64decode(data["delta"]), data.get("item_id"))
+                        turn.add_audio(data["delta"], data.get("response_id"))
+
+                elif event_type in ("response.text.delta", "response.audio_transcript.delta"):
+                    turn.add_text(data.get("delta"), data.get("response_id"))
+
+                elif event_type in ("response.completed", "response.done"):
+                    response = data.get("response", {})
+                    status = response.get("status", "completed")
+                    if status == "cancelled":
+                        barge_in.on_cancelled(response.get("usage"))
+                    writer.flush()  # last partial frame of the reply
+                    turn.finish(status)
+                    turns.on_response_done(response.get("id"))
+                    timeline.mark("response_done")
+
+                elif event_type == "error":
+                    log(f"🚨 OPENAI ERROR: {json.dumps(data.get('error'), ensure_ascii=False)}")
+
+        forward_task = asyncio.create_task(openai_to_twilio())
+
+        # 🎯 Handle Twilio → OpenAI audio incoming
+        try:
             async for message in websocket:
-                data = json.loads(message)
-                event = data.get("event")
-
-                if event == "start":
-                    stream_sid = data["start"]["streamSid"]
+                event = protocol.parse_event(message)  # media: payload sliced out, no full JSON parse
+                if event is None:
+                    continue
+
+                if event.event == "media":
+                    timeline.mark("first_media")
+                    await oai.send_str(protocol.realtime_append(event.payload))
+                    if endpointer:  # manual mode: we decide when the caller's turn ends
+                        vad_event = endpointer.process(event.audio)
+                        if vad_event == "speech_started":
+                            await on_speech_started()
+                        elif vad_event == "speech_stopped":
+                            await on_speech_stopped()
+
+                elif event.event == "start":
+                    stream_sid = writer.stream_sid = event.stream_sid
+                    timeline.mark("stream_start")
                     log(f"🟢 Twilio Stream Started — SID={stream_sid}")
 
-                elif event == "media":
-                    await oai.send_json({
-                        "type": "input_audio_buffer.append",
-                        "audio": data["media"]["payload"],
-                    })
+                elif event.event == "mark":
+                    playback.on_mark(event.name)
 
-                elif event == "stop":
-                    await oai.send_json({"type": "input_audio_buffer.commit"})
+                elif event.event == "stop":
                     log("📵 Call ended")
                     break
-
+        except websockets.exceptions.ConnectionClosed:
+            log("📵 Twilio socket closed without a stop event")
+        finally:  # dropped calls too: stop the tasks, flush telemetry, count the call as finished
             forward_task.cancel()
+            for task in local_answers:
+                task.cancel()
+            await writer.close(drain=False)  # the call is gone: just stop sending
+            log(writer.summary())
+            turn.finish("interrupted")  # flush a response cut off by hang-up
+            if barge_in.interruptions:
+                log(barge_in.summary())
+            if turns.latencies_ms:
+                avg = sum(turns.latencies_ms) / len(turns.latencies_ms)
+                log(f"⏱ {len(turns.latencies_ms)} turns, avg speech_stopped → first audio {avg:.0f} ms, "
+                    f"duplicate responses cancelled={turns.duplicates_cancelled}")
+
+            timeline.finish()
+            log(intent.summary(timeline))
 
     log("🏁 Call session closed")
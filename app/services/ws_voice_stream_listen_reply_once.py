@@ -1,22 +1,20 @@
 import base64
 import json
+import asyncio
 import websockets
-import audioop
-from vosk import Model, KaldiRecognizer
+from app.audio import codec
+from app.audio.resample import StreamResampler
+from app.asr.vosk_stream import VoskStream
+from app.asr.worker_pool import get_recognition_pool
+from app.asr.model_registry import acquire_recognizer, release_recognizer
 from app.services.voice_logger import log_voice_reply
-from gtts import gTTS
-from pydub import AudioSegment
-import os
-import io
+from app.services.call_metrics import CallTimeline
+from app.services import intent
+from app.tts.cache import get_tts_cache
 from app.config import client
+from app.streaming import protocol
 
-# ==================== CONFIG ====================
-VOSK_MODEL_PATH = "/var/www/voice-bot.v4edu.in/models/hindi"
-if not os.path.exists(VOSK_MODEL_PATH):
-    raise Exception(f"Vosk model not found at {VOSK_MODEL_PATH}")
-
-vosk_model = Model(VOSK_MODEL_PATH)
-
+FINAL_REPLY_TIMEOUT_S = 5.0  # after `stop`: longest the last utterance's reply may hold up cleanup
 
 # ----------------- AUDIO UTILITIES -----------------
 def decode_base64_audio(payload: str) -> bytes:
@@ -29,18 +27,20 @@ def decode_base64_audio(payload: str) -> bytes:
 
 def mulaw_to_pcm16(mulaw_bytes: bytes) -> bytes:
     """Convert μ-law 8-bit → PCM16"""
-    return audioop.ulaw2lin(mulaw_bytes, 2)
+    return codec.ulaw2lin(mulaw_bytes)
 
 
-def resample_audio(pcm16: bytes, in_rate=8000, out_rate=16000) -> bytes:
-    """Resample audio from 8kHz → 16kHz for ASR"""
-    return audioop.ratecv(pcm16, 2, 1, in_rate, out_rate, None)[0]
+def resample_audio(pcm16: bytes, in_rate=8000, out_rate=16000, resampler=None) -> bytes:
+    """Resample audio from 8kHz → 16kHz for ASR; pass the call's StreamResampler to keep filter state across frames"""
+    if resampler is None:
+        resampler = StreamResampler(in_rate, out_rate)
+    return resampler.process(pcm16)
 
 
 # ----------------- SPEECH RECOGNITION -----------------
 def init_recognizer(sample_rate=16000):
-    """Initialize Vosk recognizer"""
-    return KaldiRecognizer(vosk_model, sample_rate)
+    """Take a reset recognizer from the shared model's pool"""
+    return acquire_recognizer(sample_rate)
 
 
 def recognize_audio(recognizer, audio_chunk: bytes) -> dict:
@@ -52,16 +52,8 @@ def recognize_audio(recognizer, audio_chunk: bytes) -> dict:
 
 # ----------------- TEXT TO SPEECH -----------------
 def text_to_twilio_audio(text: str) -> str:
-    """Generate μ-law 8-bit Base64 audio for Twilio from text"""
-    tts = gTTS(text=text, lang="hi")
-    mp3_fp = io.BytesIO()
-    tts.write_to_fp(mp3_fp)
-    mp3_fp.seek(0)
-
-    audio = AudioSegment.from_file(mp3_fp, format="mp3")
-    audio = audio.set_frame_rate(8000).set_channels(1).set_sample_width(2)
-    pcm16 = audio.raw_data
-    mulaw = audioop.lin2ulaw(pcm16, 2)
+    """Generate μ-law 8-bit Base64 audio for Twilio from text (cached: repeats skip gTTS and transcoding)"""
+    mulaw = get_tts_cache().get(text, lang="hi")
     return base64.b64encode(mulaw).decode("utf-8")
 
 
@@ -73,44 +65,79 @@ def reply_call_twilio(call_sid: str, text: str):
     client.calls(call_sid).update(twiml=twiml)
 
 
+# ----------------- CALL END -----------------
+async def close_session(session) -> dict:
+    """Decode what is still queued; a failed decoder must not skip the rest of the cleanup"""
+    try:
+        return await session.close()
+    except Exception as e:
+        log_voice_reply(f"Recognizer failed: {e}")
+        return {}
+
+async def finish_replies(reply_task: asyncio.Task):
+    """Let the reply task handle the results still coming out of the closed session, within limits"""
+    await asyncio.wait([reply_task], timeout=FINAL_REPLY_TIMEOUT_S)
+    reply_task.cancel()
+    if reply_task.done() and not reply_task.cancelled() and reply_task.exception():
+        log_voice_reply(f"Reply failed: {reply_task.exception()}")
+
+
 # ----------------- WEBSOCKET HANDLER -----------------
 async def handle_ws_service(websocket: websockets.WebSocketServerProtocol):
     log_voice_reply("Client connected (Twilio)")
     call_sid = None
     recognizer = init_recognizer()
-
-    async for message in websocket:
-        try:
-            data = json.loads(message)
-        except:
-            continue
-
-        event = data.get("event")
-
-        if event == "start":
-            call_sid = data.get("start", {}).get("callSid")
-            log_voice_reply(f"Stream started, call_sid={call_sid}")
-            continue
-
-        if event == "media":
-            audio_bytes = decode_base64_audio(data["media"]["payload"])
-            pcm16 = mulaw_to_pcm16(audio_bytes)
-            resampled = resample_audio(pcm16)
-
-            result = recognize_audio(recognizer, resampled)
-
-            if result.get("text"):
-                log_voice_reply(f"User: {text.strip()}")
-                text = result.get("text")
-                if text and text.strip():
-                    if call_sid:
-                        reply_call_twilio(call_sid, f"आपने कहा: {text.strip()}")
-            else:
-                text = result.get("partial")
-                log_voice_reply(f"Partial: {text.strip()}")
-
-        elif event == "stop":
-            log_voice_reply("Twilio stream stopped")
-            break
+    session = get_recognition_pool().open_session(VoskStream(recognizer))  # decoding runs off the loop
+    resampler = StreamResampler(8000, 16000)
+    timeline = CallTimeline("vosk_reply_once", log_voice_reply)
+
+    async def reply_to_results():
+        async for result in session.results():
+            timeline.asr_result(result)
+            text = result.get("text", "").strip()
+            if text:
+                log_voice_reply(f"User: {text}")
+                answer = intent.match(text)
+                intent.record_turn(timeline, answer)
+                if call_sid:
+                    reply_call_twilio(call_sid, answer.text if answer else f"आपने कहा: {text}")
+                    timeline.mark("response_done")  # <Say> handed to Twilio; its audio is not ours to time
+            elif result.get("partial", "").strip():
+                log_voice_reply(f"Partial: {result['partial'].strip()}")
+
+    reply_task = asyncio.create_task(reply_to_results())
+    stopped = False
+
+    try:
+        async for message in websocket:
+            event = protocol.parse_event(message)  # media: payload sliced out, no full JSON parse
+            if event is None:
+                continue
+
+            if event.event == "start":
+                call_sid = event.call_sid
+                timeline.mark("stream_start")
+                log_voice_reply(f"Stream started, call_sid={call_sid}")
+                continue
+
+            if event.event == "media":
+                timeline.mark("first_media")
+                audio_bytes = decode_base64_audio(event.payload)
+                pcm16 = mulaw_to_pcm16(audio_bytes)
+                resampled = resample_audio(pcm16, resampler=resampler)
+                await session.put(resampled)
+
+            elif event.event == "stop":
+                log_voice_reply("Twilio stream stopped")
+                stopped = True
+                break
+    finally:
+        if not stopped:
+            reply_task.cancel()  # hang-up / error: nobody left to answer
+        await close_session(session)
+        release_recognizer(recognizer)
+        await finish_replies(reply_task)  # stop: the last queued frames may still hold a final
+        timeline.finish()
+        log_voice_reply(intent.summary(timeline))
 
     log_voice_reply("Client disconnected")
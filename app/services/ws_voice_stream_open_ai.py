@@ -2,13 +2,17 @@ import base64
 import json
 import asyncio
 import websockets
-import audioop
+from app.audio import codec
+from app.audio.resample import StreamResampler
 from openai import OpenAI
 from app.services.voice_logger import log_voice_reply
+from app.services.call_metrics import CallTimeline
+from app.streaming import protocol
 import os
 
 # ==================== CONFIG ====================
 REALTIME_MODEL = "gpt-4o-realtime-preview-2024-10-01"
+OPENAI_REALTIME_URL = os.getenv("OPENAI_REALTIME_URL", "wss://api.openai.com/v1/realtime")  # or the local fake server
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=OPENAI_API_KEY)
 
@@ -24,13 +28,15 @@ def decode_base64(payload: str) -> bytes:
 async def handle_ws_service(websocket: websockets.WebSocketServerProtocol):
     log_voice_reply("Client connected (Twilio)")
 
-    ws_url = f"wss://api.openai.com/v1/realtime?model={REALTIME_MODEL}"
+    ws_url = f"{OPENAI_REALTIME_URL}?model={REALTIME_MODEL}"
     headers = {
         "Authorization": f"Bearer {OPENAI_API_KEY}",
         "OpenAI-Beta": "realtime=v1",
     }
 
     conn = None
+    resampler = StreamResampler(8000, 24000)  # keeps filter state across frames
+    timeline = CallTimeline("openai_pcm", log_voice_reply)
     try:
         conn = await websockets.connect(
             ws_url,
@@ -61,12 +67,14 @@ async def handle_ws_service(websocket: websockets.WebSocketServerProtocol):
                     typ = event.get("type")
 
                     if typ == "response.audio.delta":
+                        timeline.mark("first_upstream_delta")
                         audio_b64 = event.get("delta")
                         if audio_b64:
                             await websocket.send(json.dumps({
                                 "event": "media",
                                 "media": {"payload": audio_b64}
                             }))
+                            timeline.mark("first_frame_sent")
 
                     elif typ == "response.output_text.delta":
                         text = event.get("text")
@@ -75,6 +83,7 @@ async def handle_ws_service(websocket: websockets.WebSocketServerProtocol):
                             log_voice_reply(f"AI: {text}")
 
                     elif typ == "response.done":
+                        timeline.mark("response_done")
                         log_voice_reply("AI finished speaking")
 
             except Exception as e:
@@ -84,25 +93,25 @@ async def handle_ws_service(websocket: websockets.WebSocketServerProtocol):
 
         # Twilio → OpenAI
         async for message in websocket:
-            try:
-                data = json.loads(message)
-            except:
+            event = protocol.parse_event(message)  # media: payload sliced out, no full JSON parse
+            if event is None:
                 continue
 
-            event = data.get("event")
-            if event == "start":
+            if event.event == "start":
+                timeline.mark("stream_start")
                 log_voice_reply("Twilio stream started")
                 continue
 
-            if event == "media":
-                payload_b64 = data["media"]["payload"]
+            if event.event == "media":
+                timeline.mark("first_media")
+                payload_b64 = event.payload
                 mulaw_8khz = decode_base64(payload_b64)
 
                 # μ-law → PCM16
-                linear = audioop.ulaw2lin(mulaw_8khz, 2)
+                linear = codec.ulaw2lin(mulaw_8khz)
 
                 # Resample 8kHz → 24kHz
-                resampled = audioop.ratecv(linear, 2, 1, 8000, 24000, None)[0]
+                resampled = resampler.process(linear)
 
                 # Optional: log transcript via Whisper
                 try:
@@ -121,7 +130,7 @@ async def handle_ws_service(websocket: websockets.WebSocketServerProtocol):
                     "audio": resampled.hex()
                 }))
 
-            elif event == "stop":
+            elif event.event == "stop":
                 log_voice_reply("Twilio stream stopped")
                 break
 
@@ -130,6 +139,7 @@ async def handle_ws_service(websocket: websockets.WebSocketServerProtocol):
     finally:
         if conn:
             await conn.close()
+        timeline.finish()
         log_voice_reply("Client disconnected")
 
 
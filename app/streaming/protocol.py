@@ -0,0 +1,161 @@
+# File: app/streaming/protocol.py
+# Twilio Media Streams wire format: cheap inbound parsing and pre-encoded outbound messages
+#
+# Inbound `media` events (50/s per call) are recognised by their fixed prefix and only the
+# base64 payload is sliced out; everything else goes through a full JSON parse. Outbound
+# messages are built by string concatenation around a per-stream template instead of
+# json.dumps on a nested dict per frame.
+
+import base64
+import json
+
+try:  # optional: several times faster than the stdlib for the slow-path events
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+else:
+    loads = json.loads
+
+    def dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+# Twilio sends compact JSON with `event` first; any other layout takes the full parse
+_MEDIA_PREFIX = '{"event":"media"'
+_PAYLOAD_KEY = '"payload":"'
+
+
+# ----------------- INBOUND EVENTS -----------------
+class TwilioEvent:
+    """Any Twilio stream event; `data` is the parsed message (None on the media fast path)"""
+    __slots__ = ("event", "data")
+
+    def __init__(self, event: str, data: dict = None):
+        self.event = event
+        self.data = data
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.event!r})"
+
+
+class MediaEvent(TwilioEvent):
+    __slots__ = ("payload",)
+
+    def __init__(self, payload: str, data: dict = None):
+        self.event = "media"  # no super() call: this runs 50 times a second per call
+        self.data = data
+        self.payload = payload  # base64 μ-law, forwarded as-is where possible
+
+    @property
+    def audio(self) -> bytes:
+        """Decoded μ-law bytes (tolerates missing base64 padding)"""
+        payload = self.payload
+        missing = len(payload) % 4
+        if missing:
+            payload += "=" * (4 - missing)
+        return base64.b64decode(payload)
+
+
+class StartEvent(TwilioEvent):
+    __slots__ = ("stream_sid", "call_sid", "custom_parameters", "media_format")
+
+    def __init__(self, data: dict):
+        super().__init__("start", data)
+        start = data.get("start") or {}
+        self.stream_sid = start.get("streamSid") or data.get("streamSid")
+        self.call_sid = start.get("callSid")
+        self.custom_parameters = start.get("customParameters") or {}
+        self.media_format = start.get("mediaFormat") or {}
+
+
+class MarkEvent(TwilioEvent):
+    __slots__ = ("name",)
+
+    def __init__(self, data: dict):
+        super().__init__("mark", data)
+        self.name = (data.get("mark") or {}).get("name", "")
+
+
+class StopEvent(TwilioEvent):
+    __slots__ = ("stream_sid",)
+
+    def __init__(self, data: dict):
+        super().__init__("stop", data)
+        self.stream_sid = data.get("streamSid")
+
+
+_EVENT_TYPES = {"start": StartEvent, "mark": MarkEvent, "stop": StopEvent}
+
+
+def parse_event(message):
+    """Typed event for one inbound message, or None if it is not valid JSON"""
+    if not isinstance(message, str):
+        message = bytes(message).decode("utf-8")
+
+    if message.startswith(_MEDIA_PREFIX):
+        start = message.find(_PAYLOAD_KEY, len(_MEDIA_PREFIX))
+        if start != -1:
+            start += len(_PAYLOAD_KEY)
+            payload = message[start:message.find('"', start)]
+            if "\\" not in payload:  # plain base64; anything escaped takes the full parse
+                return MediaEvent(payload)
+
+    try:
+        data = loads(message)
+    except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError both subclass it
+        return None
+    if not isinstance(data, dict):
+        return None
+    event = data.get("event")
+    if event == "media":
+        return MediaEvent((data.get("media") or {}).get("payload", ""), data)
+    event_type = _EVENT_TYPES.get(event)
+    return event_type(data) if event_type else TwilioEvent(event, data)
+
+
+# ----------------- OUTBOUND MESSAGES -----------------
+class StreamMessages:
+    """Outbound messages for one stream, pre-encoded around the (JSON-escaped) streamSid"""
+    __slots__ = ("stream_sid", "clear", "_media_prefix", "_sequenced_prefix", "_mark_prefix")
+
+    def __init__(self, stream_sid: str):
+        sid = dumps(stream_sid)
+        self.stream_sid = stream_sid
+        self.clear = '{"event":"clear","streamSid":' + sid + "}"
+        self._media_prefix = '{"event":"media","streamSid":' + sid + ',"media":{"payload":"'
+        self._sequenced_prefix = '{"event":"media","streamSid":' + sid + ',"sequenceNumber":"'
+        self._mark_prefix = '{"event":"mark","streamSid":' + sid + ',"mark":{"name":'
+
+    def media(self, payload: str) -> str:
+        """media message around an already base64-encoded payload"""
+        return self._media_prefix + payload + '"}}'
+
+    def media_audio(self, mulaw: bytes) -> str:
+        return self._media_prefix + base64.b64encode(mulaw).decode("ascii") + '"}}'
+
+    def media_sequenced(self, mulaw: bytes, sequence_number: int, chunk: int, timestamp: int) -> str:
+        """media message with the outbound sequenceNumber / chunk / timestamp counters"""
+        return (
+            f'{self._sequenced_prefix}{sequence_number}","media":{{"track":"outbound",'
+            f'"chunk":"{chunk}","timestamp":"{timestamp}",'
+            f'"payload":"{base64.b64encode(mulaw).decode("ascii")}"}}}}'
+        )
+
+    def mark(self, name: str) -> str:
+        return self._mark_prefix + dumps(name) + "}}"
+
+
+# OpenAI realtime: the per-frame append is just as fixed as Twilio's media message
+_APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+
+
+def realtime_append(payload: str) -> str:
+    """input_audio_buffer.append around a base64 payload (e.g. MediaEvent.payload, forwarded as-is)"""
+    return _APPEND_PREFIX + payload + '"}'
@@ -0,0 +1,139 @@
+# File: app/streaming/sender.py
+# Paced outbound audio to Twilio: 160-byte μ-law frames at real time with a small lead buffer
+
+import asyncio
+import base64
+import os
+
+from app.streaming.protocol import StreamMessages
+
+# ==================== CONFIG ====================
+FRAME_BYTES = 160                                        # 20 ms of 8 kHz μ-law
+FRAME_MS = 20
+TWILIO_LEAD_MS = int(os.getenv("TWILIO_LEAD_MS", "100"))  # how far ahead of real time we may send
+
+
+class MediaSequence:
+    """Outbound media counters for one stream: sequenceNumber, chunk and audio timestamp (ms)"""
+
+    def __init__(self):
+        self.sequence_number = 1
+        self.chunk = 1
+        self.timestamp = 0
+
+    def message(self, stream_sid: str, frame: bytes) -> dict:
+        """Build the media message for one frame and advance the counters by its duration"""
+        message = {
+            "event": "media",
+            "streamSid": stream_sid,
+            "sequenceNumber": str(self.sequence_number),
+            "media": {
+                "track": "outbound",
+                "chunk": str(self.chunk),
+                "timestamp": str(self.timestamp),
+                "payload": base64.b64encode(frame).decode("ascii"),
+            },
+        }
+        self.sequence_number += 1
+        self.chunk += 1
+        self.timestamp += len(frame) * 1000 // 8000
+        return message
+
+    def encode(self, messages: StreamMessages, frame: bytes) -> str:
+        """Same message as `message`, serialized from the stream's pre-encoded template"""
+        encoded = messages.media_sequenced(frame, self.sequence_number, self.chunk, self.timestamp)
+        self.sequence_number += 1
+        self.chunk += 1
+        self.timestamp += len(frame) * 1000 // 8000
+        return encoded
+
+
+def split_frames(mulaw) -> list:
+    """Cut μ-law audio into 20 ms frames (the last one may be shorter)"""
+    return [mulaw[i:i + FRAME_BYTES] for i in range(0, len(mulaw), FRAME_BYTES)]
+
+
+async def stream_ulaw(websocket, stream_sid: str, mulaw, sequence: MediaSequence,
+                      lead_ms: int = TWILIO_LEAD_MS, start: float = None, on_frame_sent=None) -> int:
+    """Send audio frame by frame, never more than `lead_ms` ahead of playback; returns frames sent
+
+    `start` is the loop time at which this audio begins playing (default: now).
+    `on_frame_sent()` runs after every frame (e.g. call timeline instrumentation).
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time() if start is None else start
+    messages = StreamMessages(stream_sid)
+    sent = 0
+    for frame in split_frames(mulaw):
+        due = start + (sent * FRAME_MS - lead_ms) / 1000
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await websocket.send(sequence.encode(messages, frame))
+        if on_frame_sent:
+            on_frame_sent()
+        sent += 1
+    return sent
+
+
+class PacedSender:
+    """Per-call playback: utterances play back to back and can be cut off mid-stream"""
+
+    def __init__(self, websocket, stream_sid: str = None, lead_ms: int = TWILIO_LEAD_MS, on_frame_sent=None):
+        self.websocket = websocket
+        self.stream_sid = stream_sid
+        self.lead_ms = lead_ms
+        self.on_frame_sent = on_frame_sent
+        self.sequence = MediaSequence()
+        self._task = None         # newest utterance; each one waits for its predecessor
+        self._tasks = set()       # every utterance not finished yet, so cancel() reaches all of them
+        self._playback_end = 0.0  # loop time at which audio already sent finishes playing
+
+    @property
+    def playing(self) -> bool:
+        return bool(self._tasks)
+
+    def play(self, audio) -> asyncio.Task:
+        """Queue audio behind whatever is already playing; returns the playback task
+
+        `audio` is μ-law bytes, or an async iterable of μ-law chunks (e.g. TTS segments) that
+        play back to back inside this one task; its `aclose()` runs when playback ends or is cancelled.
+        """
+        self._task = asyncio.create_task(self._play_after(self._task, audio))
+        self._tasks.add(self._task)
+        self._task.add_done_callback(self._tasks.discard)
+        return self._task
+
+    async def _play_after(self, previous, audio):
+        try:
+            if previous is not None:
+                try:
+                    await previous
+                except asyncio.CancelledError:
+                    if asyncio.current_task().cancelling():
+                        raise  # we were cancelled too, not just the utterance before us
+            if hasattr(audio, "__aiter__"):
+                async for chunk in audio:
+                    await self._stream(chunk)
+            else:
+                await self._stream(audio)
+        finally:
+            if hasattr(audio, "aclose"):
+                await audio.aclose()
+
+    async def _stream(self, mulaw):
+        loop = asyncio.get_running_loop()
+        start = max(loop.time(), self._playback_end)  # back-to-back audio shares one clock
+        self._playback_end = start + (len(mulaw) + FRAME_BYTES - 1) // FRAME_BYTES * FRAME_MS / 1000
+        await stream_ulaw(self.websocket, self.stream_sid, mulaw, self.sequence, self.lead_ms, start,
+                          self.on_frame_sent)
+
+    async def cancel(self, clear: bool = True):
+        """Stop sending everything queued and (optionally) tell Twilio to drop the lead audio it has buffered"""
+        tasks, self._task = list(self._tasks), None
+        self._playback_end = 0.0
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if clear and self.stream_sid:
+            await self.websocket.send(StreamMessages(self.stream_sid).clear)
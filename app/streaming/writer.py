@@ -0,0 +1,231 @@
+# File: app/streaming/writer.py
+# Per-call outbound writer toward Twilio: a bounded queue drained by one task, so a slow
+# Twilio socket never stalls the code producing audio (e.g. the OpenAI read loop)
+
+import asyncio
+import collections
+import contextlib
+import os
+import time
+
+from app.streaming.protocol import StreamMessages
+from app.streaming.sender import FRAME_BYTES, FRAME_MS
+
+# ==================== CONFIG ====================
+TWILIO_WRITER_QUEUE_MS = int(os.getenv("TWILIO_WRITER_QUEUE_MS", "10000"))     # audio allowed to wait unsent
+TWILIO_WRITER_MAX_FRAMES = int(os.getenv("TWILIO_WRITER_MAX_FRAMES", "10"))     # frames coalesced per message
+# What happens when the queue is full because Twilio is not keeping up:
+#   "drop_oldest" → discard the oldest queued frames (the caller hears a skip, the call survives)
+#   "close"       → hang up the stream; a call that far behind is not recoverable
+TWILIO_WRITER_POLICY = os.getenv("TWILIO_WRITER_POLICY", "drop_oldest")
+ULAW_SILENCE = b"\xff"
+
+_EVENT = "event"
+_FRAME = "frame"
+
+
+class TwilioWriter:
+    """Queue outbound messages for one Twilio stream and send them from a dedicated task
+
+    Audio written with `write_audio` is re-cut into 160-byte frames; a tail
+    shorter than a frame waits for the next delta (or `flush`). The writer
+    task coalesces up to `max_frames` consecutive frames of the same item
+    into one media message. `on_media_sent(item_id, n_bytes)` runs after each
+    media message and may return a mark name to send right behind it.
+    Nothing here awaits the socket except the writer task itself.
+    """
+
+    def __init__(self, websocket, stream_sid: str = None, on_media_sent=None,
+                 max_queue_ms: int = TWILIO_WRITER_QUEUE_MS, max_frames: int = TWILIO_WRITER_MAX_FRAMES,
+                 policy: str = TWILIO_WRITER_POLICY, log=print):
+        self.websocket = websocket
+        self.messages = None
+        self.stream_sid = stream_sid
+        self.on_media_sent = on_media_sent
+        self.max_queue_frames = max(max_queue_ms // FRAME_MS, 1)
+        self.max_frames = max(max_frames, 1)
+        self.policy = policy
+        self.log = log
+
+        self._queue = collections.deque()  # (kind, item_id | None, frame | message, enqueued_at)
+        self._frames_queued = 0
+        self._ready = asyncio.Event()
+        self._tail = bytearray()
+        self._tail_item = None
+        self._closed = False
+        self._sending = False
+        self.failed = False
+
+        self.messages_sent = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.max_depth = 0
+        self.send_latency_ms_max = 0.0
+        self._send_latency_ms_total = 0.0
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def stream_sid(self) -> str:
+        return self.messages.stream_sid if self.messages else None
+
+    @stream_sid.setter
+    def stream_sid(self, stream_sid: str):
+        """Known once Twilio's `start` arrives; pre-encodes this stream's message templates"""
+        self.messages = StreamMessages(stream_sid) if stream_sid else None
+
+    # ----------------- METRICS -----------------
+    @property
+    def queue_depth(self) -> int:
+        """Audio frames waiting to be sent"""
+        return self._frames_queued
+
+    @property
+    def queue_ms(self) -> int:
+        return self._frames_queued * FRAME_MS
+
+    @property
+    def send_latency_ms_avg(self) -> float:
+        """Enqueue → socket write completed, averaged over media messages"""
+        return self._send_latency_ms_total / self.messages_sent if self.messages_sent else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"📤 Writer — messages={self.messages_sent} frames={self.frames_sent} "
+            f"dropped_frames={self.frames_dropped} max_depth={self.max_depth} "
+            f"send_latency_avg={self.send_latency_ms_avg:.1f} ms max={self.send_latency_ms_max:.1f} ms"
+        )
+
+    # ----------------- PRODUCER SIDE (never blocks) -----------------
+    def write_audio(self, mulaw: bytes, item_id: str = None):
+        """Queue μ-law audio of any size; whole frames are queued now, the remainder is carried"""
+        if self._closed:
+            return
+        if item_id != self._tail_item:
+            self.flush()
+            self._tail_item = item_id
+        self._tail += mulaw
+        whole = len(self._tail) - len(self._tail) % FRAME_BYTES
+        now = time.monotonic()
+        for i in range(0, whole, FRAME_BYTES):
+            self._queue.append((_FRAME, item_id, bytes(self._tail[i:i + FRAME_BYTES]), now))
+        del self._tail[:whole]
+        self._frames_queued += whole // FRAME_BYTES
+        self._enforce_limit()
+        self._wake()
+
+    def flush(self):
+        """Queue the carried partial frame, padded with μ-law silence to a whole frame"""
+        if self._tail and not self._closed:
+            frame = bytes(self._tail) + ULAW_SILENCE * (FRAME_BYTES - len(self._tail))
+            self._queue.append((_FRAME, self._tail_item, frame, time.monotonic()))
+            self._frames_queued += 1
+            self._wake()
+        self._tail.clear()
+
+    def send_event(self, message: str):
+        """Queue an encoded non-audio message (mark, ...) in order with the audio"""
+        if not self._closed:
+            self._queue.append((_EVENT, None, message, time.monotonic()))
+            self._wake()
+
+    def clear(self) -> int:
+        """Barge-in: drop everything unsent and tell Twilio to flush its buffer; returns bytes dropped"""
+        dropped = self._frames_queued * FRAME_BYTES + len(self._tail)
+        self._queue.clear()
+        self._frames_queued = 0
+        self._tail.clear()
+        self._tail_item = None
+        if self.stream_sid and not self._closed:
+            self._queue.append((_EVENT, None, self.messages.clear, time.monotonic()))
+            self._wake()
+        return dropped
+
+    def _enforce_limit(self):
+        """Apply the slow-consumer policy once queued audio exceeds the bound"""
+        self.max_depth = max(self.max_depth, self._frames_queued)
+        if self._frames_queued <= self.max_queue_frames:
+            return
+        if self.policy == "close":
+            self.log(f"🐢 Twilio not keeping up ({self.queue_ms} ms queued), closing the stream")
+            self.failed = True
+            self._closed = True
+            self._queue.clear()
+            self._frames_queued = 0
+            self._task.cancel()
+            asyncio.create_task(self.websocket.close())
+            return
+        kept = collections.deque()
+        while self._frames_queued > self.max_queue_frames and self._queue:
+            entry = self._queue.popleft()
+            if entry[0] is _FRAME:
+                self._frames_queued -= 1
+                self.frames_dropped += 1
+            else:
+                kept.append(entry)  # marks / clears are tiny and keep playback tracking consistent
+        self._queue.extendleft(reversed(kept))
+
+    def _wake(self):
+        self._ready.set()
+
+    # ----------------- WRITER TASK -----------------
+    async def _run(self):
+        try:
+            await self._send_loop()
+        except Exception as e:  # socket gone: stop accepting audio instead of queueing forever
+            self.failed = True
+            self._closed = True
+            self._queue.clear()
+            self._frames_queued = 0
+            self.log(f"📤 Twilio writer stopped: {e!r}")
+
+    async def _send_loop(self):
+        while True:
+            while not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+
+            self._sending = True
+            try:
+                await self._send_next()
+            finally:
+                self._sending = False
+
+    async def _send_next(self):
+        kind, item_id, payload, enqueued_at = self._queue.popleft()
+        if kind is _EVENT:
+            await self.websocket.send(payload)
+            return
+
+        frames = [payload]
+        while (len(frames) < self.max_frames and self._queue
+               and self._queue[0][0] is _FRAME and self._queue[0][1] == item_id):
+            frames.append(self._queue.popleft()[2])
+        self._frames_queued -= len(frames)
+        audio = b"".join(frames)
+
+        await self.websocket.send(self.messages.media_audio(audio))
+        latency_ms = (time.monotonic() - enqueued_at) * 1000
+        self.messages_sent += 1
+        self.frames_sent += len(frames)
+        self._send_latency_ms_total += latency_ms
+        self.send_latency_ms_max = max(self.send_latency_ms_max, latency_ms)
+
+        if self.on_media_sent:
+            mark = self.on_media_sent(item_id, len(audio))
+            if mark:
+                await self.websocket.send(self.messages.mark(mark))
+
+    async def close(self, drain: bool = True, timeout: float = 2.0):
+        """Stop the writer; with `drain`, first send what is queued (bounded by `timeout`)"""
+        if drain and not self._closed:
+            self.flush()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._drained(), timeout)
+        self._closed = True
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await self._task
+
+    async def _drained(self):
+        while (self._queue or self._sending) and not self._task.done():
+            await asyncio.sleep(FRAME_MS / 1000)
@@ -0,0 +1,205 @@
+# File: app/tts/cache.py
+# Content-addressed cache of synthesized μ-law audio: in-memory LRU + memory-mapped disk tier
+#
+#   python -m app.tts.cache warm assets/tts_phrases.txt [--lang hi] [--voice com]
+#   python -m app.tts.cache stats
+
+import argparse
+import collections
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+
+from app.tts.synth import DEFAULT_LANG, DEFAULT_VOICE, OUTPUT_FORMAT, synthesize_ulaw
+
+# ==================== CONFIG ====================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "tts"))
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_DISK = os.getenv("TTS_CACHE_DISK", "1") == "1"
+
+
+def cache_key(text: str, lang: str, voice: str, fmt: str) -> str:
+    """Stable content address for one rendering of a phrase"""
+    raw = json.dumps([text, lang, voice, fmt], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Final μ-law bytes keyed by (text, language, voice, output format)
+
+    Memory tier: LRU bounded by total bytes. Disk tier: one file per key,
+    memory-mapped on read so worker processes share the page cache. A hit
+    in either tier skips gTTS and the whole MP3 → μ-law transcode.
+
+    Only fixed prompts reach the disk tier: phrases pre-rendered with `warm()`
+    and `get(..., persist=True)`. Free-form text (echoed caller speech, model
+    replies) stays in memory, so the disk neither keeps what callers said nor
+    grows with call volume.
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+                 use_disk: bool = TTS_CACHE_DISK, synthesize=synthesize_ulaw):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.use_disk = use_disk
+        self.synthesize = synthesize
+        self._lru = collections.OrderedDict()  # key → bytes | mmap
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ----------------- MEMORY TIER -----------------
+    def _remember(self, key: str, audio):
+        size = len(audio)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._lru:
+                return
+            self._lru[key] = audio
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._lru.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                self.evictions += 1
+
+    def _lookup(self, key: str):
+        with self._lock:
+            audio = self._lru.get(key)
+            if audio is not None:
+                self._lru.move_to_end(key)
+            return audio
+
+    # ----------------- DISK TIER -----------------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.ulaw")
+
+    def _load(self, key: str):
+        try:
+            with open(self._path(key), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+    def _store(self, key: str, audio: bytes):
+        """Best effort: a full or read-only disk only costs the next process a re-synthesis"""
+        path = self._path(key)
+        tmp = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)  # atomic: concurrent readers never see a partial file
+        except OSError as e:
+            print("TTS cache write error:", e)
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    # ----------------- PUBLIC API -----------------
+    def get(self, text: str, lang: str = DEFAULT_LANG, voice: str = DEFAULT_VOICE, fmt: str = OUTPUT_FORMAT,
+            persist: bool = False):
+        """μ-law audio for `text` (bytes or a read-only mmap); synthesizes only on a miss
+
+        `persist=True` also writes a miss to the disk tier: for fixed prompts only.
+        """
+        key = cache_key(text, lang, voice, fmt)
+
+        audio = self._lookup(key)
+        if audio is not None:
+            self.memory_hits += 1
+            return audio
+
+        if self.use_disk:
+            audio = self._load(key)
+            if audio is not None:
+                self.disk_hits += 1
+                self._remember(key, audio)
+                return audio
+
+        self.misses += 1
+        audio = self.synthesize(text, lang, voice)
+        if self.use_disk and persist:
+            self._store(key, audio)
+        self._remember(key, audio)
+        return audio
+
+    def warm(self, phrases, lang: str = DEFAULT_LANG, voice: str = DEFAULT_VOICE) -> int:
+        """Pre-render phrases so their first live use is already a hit"""
+        count = 0
+        for phrase in phrases:
+            phrase = phrase.strip()
+            if phrase:
+                self.get(phrase, lang, voice, persist=True)
+                count += 1
+        return count
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate, 4),
+            "memory_entries": len(self._lru),
+            "memory_bytes": self._memory_bytes,
+        }
+
+
+_cache = None
+
+
+def get_tts_cache() -> TTSCache:
+    """Process-wide cache instance"""
+    global _cache
+    if _cache is None:
+        _cache = TTSCache()
+    return _cache
+
+
+def _disk_usage(directory: str) -> tuple:
+    files = size = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith(".ulaw"):
+                files += 1
+                size += os.path.getsize(os.path.join(root, name))
+    return files, size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TTS cache maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm = sub.add_parser("warm", help="pre-render a phrase list (one phrase per line)")
+    warm.add_argument("phrases_file")
+    warm.add_argument("--lang", default=DEFAULT_LANG)
+    warm.add_argument("--voice", default=DEFAULT_VOICE)
+    sub.add_parser("stats", help="show disk tier usage")
+    args = parser.parse_args()
+
+    if args.command == "warm":
+        cache = get_tts_cache()
+        with open(args.phrases_file, encoding="utf-8") as f:
+            rendered = cache.warm(f, args.lang, args.voice)
+        print(f"Warmed {rendered} phrases: {cache.stats()}")
+    else:
+        files, size = _disk_usage(TTS_CACHE_DIR)
+        print(f"{TTS_CACHE_DIR}: {files} entries, {size / 1024:.0f} kB")
@@ -0,0 +1,93 @@
+# File: app/tts/pipeline.py
+# Sentence-pipelined TTS: split the reply, synthesize segments concurrently off the loop, play in order
+
+import asyncio
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from app.tts.cache import get_tts_cache
+from app.tts.synth import DEFAULT_LANG
+
+# ==================== CONFIG ====================
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))  # concurrent gTTS requests + transcodes per process
+
+# Break after sentence enders (।, ॥, ?, !) always, and after , . : only when whitespace follows
+# (keeps "6.5" intact; makes fixed prefixes like "आपने कहा:" their own cacheable segment).
+_SEGMENT_RE = re.compile(r"(?<=[।॥?!])\s*|(?<=[,.:])\s+")
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+    return _executor
+
+
+def split_segments(text: str) -> list:
+    """Split reply text into sentence/clause segments on Hindi and Latin punctuation"""
+    return [segment.strip() for segment in _SEGMENT_RE.split(text) if segment and segment.strip()]
+
+
+class SegmentStream:
+    """μ-law audio per segment, in order; every segment is already submitted to the TTS executor
+
+    Iterate with `async for`. `aclose()` (run by PacedSender when playback ends or is
+    cancelled) drops segments that have not started synthesizing yet.
+    """
+
+    def __init__(self, futures: list):
+        self.futures = futures
+        self._next = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._next >= len(self.futures):
+            raise StopAsyncIteration
+        future = self.futures[self._next]
+        self._next += 1
+        return await future
+
+    async def aclose(self):
+        for future in self.futures:
+            future.cancel()  # barge-in / hang-up: skip unstarted segments
+
+
+def synthesize_segments(text: str, lang: str = DEFAULT_LANG, cache=None) -> SegmentStream:
+    """Submit every segment to the TTS executor now and stream the audio back in order
+
+    Segment N+1 is synthesized while segment N plays. Blocking gTTS/ffmpeg work never
+    runs on the event loop.
+    """
+    cache = cache or get_tts_cache()
+    loop = asyncio.get_running_loop()
+    return SegmentStream([loop.run_in_executor(_get_executor(), cache.get, segment, lang)
+                          for segment in split_segments(text)])
+
+
+async def speak(sender, text: str, lang: str = DEFAULT_LANG, on_first_audio=None) -> float:
+    """Queue a reply on a PacedSender as one playback task; returns seconds until the first audio was ready
+
+    All segments play inside that single task, so `sender.cancel()` stops the whole reply.
+    `on_first_audio()` runs as soon as the first segment is synthesized.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    segments = synthesize_segments(text, lang)
+    if not segments.futures:
+        return 0.0
+    playback = sender.play(segments)
+    try:
+        await asyncio.shield(segments.futures[0])
+    except Exception:
+        playback.cancel()
+        playback.add_done_callback(lambda task: task.cancelled() or task.exception())  # reported once, here
+        raise
+    first_audio = loop.time() - start
+    if on_first_audio:
+        on_first_audio()
+    return first_audio
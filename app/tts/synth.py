@@ -0,0 +1,25 @@
+# File: app/tts/synth.py
+# Text → 8 kHz μ-law bytes for Twilio (gTTS MP3 → PCM16 → G.711)
+
+import io
+
+from gtts import gTTS
+from pydub import AudioSegment
+
+from app.audio import codec
+
+OUTPUT_FORMAT = "ulaw_8000"
+DEFAULT_LANG = "hi"
+DEFAULT_VOICE = "com"  # gTTS tld, selects the regional Google voice
+
+
+def synthesize_ulaw(text: str, lang: str = DEFAULT_LANG, voice: str = DEFAULT_VOICE) -> bytes:
+    """Synthesize text and transcode to raw 8 kHz mono μ-law (blocking: network + ffmpeg)"""
+    tts = gTTS(text=text, lang=lang, tld=voice)
+    mp3_fp = io.BytesIO()
+    tts.write_to_fp(mp3_fp)
+    mp3_fp.seek(0)
+
+    audio = AudioSegment.from_file(mp3_fp, format="mp3")
+    audio = audio.set_frame_rate(8000).set_channels(1).set_sample_width(2)
+    return codec.lin2ulaw(audio.raw_data)
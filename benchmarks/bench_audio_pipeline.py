@@ -0,0 +1,294 @@
+# File: benchmarks/bench_audio_pipeline.py
+# Per-frame cost of every stage on the audio path, with a stored baseline and a regression gate
+#
+#   python -m benchmarks.bench_audio_pipeline                      # compare against the baseline
+#   python -m benchmarks.bench_audio_pipeline --save-baseline      # record a new baseline
+#   python -m benchmarks.bench_audio_pipeline --threshold 0.15 --stage-threshold vosk_accept=0.5
+#
+# Inbound stages run on the twilio.wav / output.wav / twilio_base64.txt fixtures cut into 20 ms
+# Twilio frames; reply stages run on assets/greet.mp3 and output.wav. Functions come from
+# ws_voice_listen_repeat_multiple.py when it imports, otherwise from the modules it delegates to,
+# so the gate keeps working as the handler helpers move. Exits 1 if any stage got slower than
+# its threshold allows relative to the baseline. A stage is only compared against a baseline
+# recorded for the same implementation on the same machine; a stage that ran without one exits
+# 2 (record it with --save-baseline on this machine) unless --allow-missing-baseline is given.
+
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+from app.audio import codec
+from app.audio.resample import StreamResampler
+from app.audio.wav import read_ulaw
+from app.streaming.protocol import MediaEvent
+from app.streaming.sender import FRAME_BYTES
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baselines", "audio_pipeline.json")
+INBOUND_FIXTURES = ("twilio.wav", "output.wav", "twilio_base64.txt")
+REPLY_MP3 = os.path.join("assets", "greet.mp3")
+DEFAULT_THRESHOLD = 0.20  # fail when a stage is more than 20% slower than its baseline
+
+
+class Skip(Exception):
+    """Stage cannot run here (optional dependency or model missing)"""
+
+
+def _handler():
+    """The Vosk listen/repeat handler module, or None if its dependencies are not installed"""
+    try:
+        from app.services import ws_voice_listen_repeat_multiple
+        return ws_voice_listen_repeat_multiple
+    except Exception as e:  # ImportError, or the DB driver / model config failing at import
+        print(f"handler module not importable ({type(e).__name__}: {e}); timing the functions it delegates to")
+        return None
+
+
+def _inbound_frames() -> list:
+    ulaw = b"".join(read_ulaw(os.path.join(REPO_ROOT, name)) for name in INBOUND_FIXTURES)
+    return [ulaw[i:i + FRAME_BYTES] for i in range(0, len(ulaw) - FRAME_BYTES + 1, FRAME_BYTES)]
+
+
+# ----------------- STAGES -----------------
+# Each setup returns (implementation label, per-frame function, frame inputs)
+def _b64_decode(h, frames):
+    payloads = [base64.b64encode(f).decode("ascii").rstrip("=") for f in frames]  # padding fix exercised
+    if h:
+        return "handler.decode_base64_audio", h.decode_base64_audio, payloads
+    return "protocol.MediaEvent.audio", lambda p: MediaEvent(p).audio, payloads
+
+
+def _ulaw_to_pcm16(h, frames):
+    if h:
+        return "handler.mulaw_to_pcm16", h.mulaw_to_pcm16, frames
+    return "codec.ulaw2lin", codec.ulaw2lin, frames
+
+
+def _resample_8k_16k(h, frames):
+    pcm = [codec.ulaw2lin(f) for f in frames]
+    resampler = StreamResampler(8000, 16000)  # one call's resampler: filter state carries over
+    if h:
+        return "handler.resample_audio", lambda p: h.resample_audio(p, resampler=resampler), pcm
+    return "StreamResampler.process", resampler.process, pcm
+
+
+def _vosk_accept(h, frames):
+    try:
+        from app.asr.model_registry import acquire_recognizer
+        recognizer = acquire_recognizer(16000)
+    except Exception as e:  # vosk not installed / model not downloaded
+        raise Skip(f"{type(e).__name__}: {e}")
+    resampler = StreamResampler(8000, 16000)
+    pcm16k = [resampler.process(codec.ulaw2lin(f)) for f in frames]
+    if h:
+        return "handler.recognize_audio", lambda p: h.recognize_audio(recognizer, p), pcm16k
+    return "KaldiRecognizer.AcceptWaveform", recognizer.AcceptWaveform, pcm16k
+
+
+def _mp3_decode(h, frames):
+    try:
+        from pydub import AudioSegment
+        from pydub.utils import which
+    except ImportError as e:
+        raise Skip(str(e))
+    if not which("ffmpeg") and not which("avconv"):
+        raise Skip("ffmpeg not found")
+    with open(os.path.join(REPO_ROOT, REPLY_MP3), "rb") as f:
+        mp3 = f.read()
+
+    def decode(data):
+        audio = AudioSegment.from_file(io.BytesIO(data), format="mp3")
+        return audio.set_frame_rate(8000).set_channels(1).set_sample_width(2).raw_data
+
+    # one decode of the whole file per "frame" input; normalised to 20 ms output frames below
+    out_frames = len(decode(mp3)) // (FRAME_BYTES * 2)
+    return "pydub.AudioSegment (mp3 → 8 kHz PCM16)", decode, [mp3], out_frames
+
+
+def _ulaw_encode(h, frames):
+    pcm = [codec.ulaw2lin(f) for f in frames]  # reply-sized PCM16 frames
+    return "codec.lin2ulaw", codec.lin2ulaw, pcm
+
+
+STAGES = [
+    ("b64_decode", _b64_decode),
+    ("ulaw_to_pcm16", _ulaw_to_pcm16),
+    ("resample_8k_16k", _resample_8k_16k),
+    ("vosk_accept", _vosk_accept),
+    ("mp3_decode", _mp3_decode),
+    ("ulaw_encode", _ulaw_encode),
+]
+
+
+def _measure(fn, inputs: list, frames_per_pass: int, min_seconds: float, repeat: int) -> float:
+    """Best-of-`repeat` CPU ns per 20 ms frame; each pass loops over the inputs for at least `min_seconds`"""
+    best = None
+    for _ in range(repeat):
+        done = 0
+        start = time.process_time_ns()
+        while True:
+            for item in inputs:
+                fn(item)
+            done += frames_per_pass
+            elapsed = time.process_time_ns() - start
+            if elapsed >= min_seconds * 1e9:
+                break
+        ns = elapsed / done
+        best = ns if best is None else min(best, ns)
+    return best
+
+
+def run_stages(min_seconds: float, repeat: int, only=None) -> dict:
+    handler = _handler()
+    frames = _inbound_frames()
+    results = {}
+    for name, setup in STAGES:
+        if only and name not in only:
+            continue
+        try:
+            impl, fn, inputs, *per_pass = setup(handler, frames)
+        except Skip as e:
+            results[name] = {"skipped": str(e)}
+            continue
+        frames_per_pass = per_pass[0] if per_pass else len(inputs)
+        ns = _measure(fn, inputs, frames_per_pass, min_seconds, repeat)
+        results[name] = {"impl": impl, "ns_per_frame": round(ns, 1), "frames_per_s": round(1e9 / ns)}
+    return results
+
+
+# ----------------- BASELINE -----------------
+def machine_info() -> dict:
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "processor": platform.processor() or platform.machine(), "system": platform.system()}
+
+
+def load_baseline(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path: str, results: dict):
+    """Write this run as the baseline; stages skipped here keep their previously recorded numbers
+
+    Every measured stage records the machine it ran on, so kept entries stay attributed to theirs.
+    """
+    baseline = load_baseline(path) or {}
+    stages = dict(baseline.get("stages", {}))
+    for name, r in results.items():
+        if "skipped" not in r:
+            stages[name] = dict(r, machine=machine_info(), recorded=time.strftime("%Y-%m-%d"))
+        elif name not in stages:
+            stages[name] = r
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"stages": stages}, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def not_comparable(name: str, r: dict, baseline: dict):
+    """Why stage `name`'s result cannot be held against the baseline, or None if it can"""
+    base = (baseline or {}).get("stages", {}).get(name, {})
+    if "ns_per_frame" not in base:
+        return "no baseline"
+    if base.get("impl") != r["impl"]:
+        return f"baseline is {base.get('impl')}"
+    if base.get("machine", baseline.get("machine")) != machine_info():
+        return "baseline from another machine"
+    return None
+
+
+def regressed(results: dict, baseline: dict, threshold: float, stage_thresholds: dict) -> list:
+    """Comparable stages slower than their baseline by more than their threshold"""
+    base_stages = (baseline or {}).get("stages", {})
+    out = []
+    for name, r in results.items():
+        if "ns_per_frame" not in r or not_comparable(name, r, baseline):
+            continue
+        base = base_stages[name]["ns_per_frame"]
+        if r["ns_per_frame"] / base - 1 > stage_thresholds.get(name, threshold):
+            out.append(name)
+    return out
+
+
+def unchecked(results: dict, baseline: dict) -> list:
+    """Stages that ran but have no comparable baseline: the gate says nothing about them"""
+    return [name for name, r in results.items() if "ns_per_frame" in r and not_comparable(name, r, baseline)]
+
+
+def report(results: dict, baseline: dict, threshold: float, stage_thresholds: dict):
+    base_stages = (baseline or {}).get("stages", {})
+    failed = regressed(results, baseline, threshold, stage_thresholds)
+    print(f"{'stage':<17}{'ns/frame':>12}{'frames/s/core':>15}{'baseline':>12}{'change':>9}{'limit':>8}  implementation")
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"{name:<17}{'skipped':>12}  {r['skipped']}")
+            continue
+        reason = not_comparable(name, r, baseline)
+        if reason is None:
+            base = base_stages[name]["ns_per_frame"]
+            cols = f"{base:>12,.0f}{r['ns_per_frame'] / base - 1:>+8.0%}{stage_thresholds.get(name, threshold):>+8.0%}"
+        else:
+            cols = f"{'-':>12}{'-':>9}{'-':>8}"
+        status = "  REGRESSED" if name in failed else f"  NOT COMPARED ({reason})" if reason and baseline else ""
+        print(f"{name:<17}{r['ns_per_frame']:>12,.0f}{r['frames_per_s']:>15,}{cols}  {r['impl']}{status}")
+
+
+def _parse_stage_thresholds(items: list) -> dict:
+    out = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        out[name] = float(value)
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_REGRESSION_THRESHOLD", DEFAULT_THRESHOLD)),
+                        help="allowed slowdown vs baseline (0.20 = 20%%)")
+    parser.add_argument("--stage-threshold", action="append", metavar="STAGE=FRACTION",
+                        help="per-stage override, e.g. vosk_accept=0.5")
+    parser.add_argument("--stages", nargs="*", help="run only these stages")
+    parser.add_argument("--seconds", type=float, default=0.3, help="minimum time per pass")
+    parser.add_argument("--repeat", type=int, default=9, help="passes per stage (best is kept)")
+    parser.add_argument("--retries", type=int, default=2, help="re-measure a regressed stage before failing")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="do not fail on stages without a baseline for this implementation and machine")
+    args = parser.parse_args()
+
+    results = run_stages(args.seconds, args.repeat, args.stages)
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+    stage_thresholds = _parse_stage_thresholds(args.stage_threshold)
+    for _ in range(args.retries):  # a noisy neighbour slows one pass, not every re-run
+        again = regressed(results, baseline, args.threshold, stage_thresholds)
+        if not again:
+            break
+        for name, r in run_stages(args.seconds, args.repeat, again).items():
+            if r.get("ns_per_frame", float("inf")) < results[name]["ns_per_frame"]:
+                results[name] = r
+    report(results, baseline, args.threshold, stage_thresholds)
+    regressions = regressed(results, baseline, args.threshold, stage_thresholds)
+    missing = [] if args.save_baseline else unchecked(results, baseline)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline written to {os.path.relpath(args.baseline, REPO_ROOT)}")
+    elif baseline is None:
+        print(f"no baseline at {os.path.relpath(args.baseline, REPO_ROOT)}; run with --save-baseline to record one")
+    if regressions:
+        print(f"FAIL: {', '.join(regressions)} slower than the allowed threshold")
+        sys.exit(1)
+    if missing:
+        print(f"{'WARNING' if args.allow_missing_baseline else 'FAIL'}: {', '.join(missing)} not gated "
+              f"(no baseline for this implementation on {machine_info()}); record one with --save-baseline")
+        if not args.allow_missing_baseline:
+            sys.exit(2)
@@ -0,0 +1,72 @@
+# File: benchmarks/bench_codec.py
+# μ-law codec throughput: app.audio.codec's table paths (used without audioop) vs audioop
+# on Twilio frames and TTS-sized buffers
+#
+#   python -m benchmarks.bench_codec
+
+import os
+import timeit
+import warnings
+
+import numpy as np
+from app.audio import codec
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:  # Python 3.13+ without audioop-lts
+        audioop = None
+
+TWILIO_FRAME = 160          # 20 ms @ 8 kHz
+BATCH_FRAMES = 50           # 1 s of buffered Twilio frames
+TTS_SECONDS = 5
+
+
+def _rate(fn, n_bytes: int, number: int) -> float:
+    """Best-of-5 throughput in MB/s"""
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    return n_bytes * number / best / 1e6
+
+
+def run():
+    ulaw_frame = os.urandom(TWILIO_FRAME)
+    ulaw_tts = os.urandom(8000 * TTS_SECONDS)
+    pcm_frame = codec.ulaw2lin(ulaw_frame)
+    pcm_tts = codec.ulaw2lin(ulaw_tts)
+    frame_out = np.empty(TWILIO_FRAME, dtype=np.int16)
+    batch = [os.urandom(TWILIO_FRAME) for _ in range(BATCH_FRAMES)]
+    batch_bytes = b"".join(batch)
+    batch_out = np.empty((BATCH_FRAMES, TWILIO_FRAME), dtype=np.int16)
+
+    cases = [
+        ("decode 160 B frame", ulaw_frame, 20000,
+         lambda: codec._ulaw2lin_table(ulaw_frame), lambda: audioop.ulaw2lin(ulaw_frame, 2)),
+        ("decode 160 B frame (prealloc out)", ulaw_frame, 20000,
+         lambda: codec.ulaw_decode(ulaw_frame, out=frame_out), None),
+        (f"decode {BATCH_FRAMES}x160 B frames (batch)", batch_bytes, 2000,
+         lambda: codec.ulaw_decode_frames(batch, out=batch_out),
+         lambda: [audioop.ulaw2lin(frame, 2) for frame in batch]),
+        (f"decode {TTS_SECONDS} s buffer", ulaw_tts, 200,
+         lambda: codec._ulaw2lin_table(ulaw_tts), lambda: audioop.ulaw2lin(ulaw_tts, 2)),
+        ("encode 160 B frame", pcm_frame, 20000,
+         lambda: codec._lin2ulaw_table(pcm_frame), lambda: audioop.lin2ulaw(pcm_frame, 2)),
+        (f"encode {TTS_SECONDS} s buffer", pcm_tts, 200,
+         lambda: codec._lin2ulaw_table(pcm_tts), lambda: audioop.lin2ulaw(pcm_tts, 2)),
+    ]
+
+    print(f"audioop {'available' if codec.audioop else 'missing'}: codec.ulaw2lin uses "
+          f"{'audioop' if codec.audioop else 'the tables'}, codec.lin2ulaw "
+          f"{f'audioop up to {codec.AUDIOOP_ENCODE_MAX_BYTES} B' if codec.audioop else 'the table'}")
+    print(f"{'case':<36}{'tables MB/s':>12}{'audioop MB/s':>14}{'ratio':>8}")
+    for name, data, number, ours, theirs in cases:
+        ours_rate = _rate(ours, len(data), number)
+        if theirs is not None and audioop is not None:
+            theirs_rate = _rate(theirs, len(data), number)
+            print(f"{name:<36}{ours_rate:>12.1f}{theirs_rate:>14.1f}{ours_rate / theirs_rate:>8.2f}")
+        else:
+            print(f"{name:<36}{ours_rate:>12.1f}{'-':>14}{'-':>8}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,100 @@
+# File: benchmarks/bench_generate_reply.py
+# generate_reply throughput and latency vs concurrency: one generate per request vs micro-batching
+#
+#   python -m benchmarks.bench_generate_reply                  # DialoGPT-small on this machine (CPU)
+#   python -m benchmarks.bench_generate_reply --offline        # simulated generate cost, no torch needed
+#
+# --offline numbers come from SimulatedEngine's made-up cost model: they check the batcher's
+# mechanics, they are not a measurement of DialoGPT and must not be quoted as one.
+#   python -m benchmarks.bench_generate_reply --concurrency 1,4,16 --batch-max 8 --window-ms 5
+
+import argparse
+import asyncio
+import time
+
+from app.services.generate_reply import REPLY_BATCH_MAX, REPLY_BATCH_WINDOW_MS, ReplyEngine
+
+PROMPTS = [
+    "Hi!",
+    "What rank can I get with 650 marks in NEET?",
+    "How should I prepare for the exam in the last month?",
+    "Can you call me back tomorrow?",
+    "Which colleges accept a rank around twenty thousand?",
+    "Thanks, that helps a lot.",
+]
+
+
+class SimulatedEngine(ReplyEngine):
+    """Invented cost model of a CPU decoder (not measured): fixed call overhead + per step, each extra row cheaper than a call"""
+
+    CALL_MS = 15.0
+    STEP_MS = 4.0
+    ROW_STEP_MS = 0.6
+
+    def load(self):
+        self.model = self.tokenizer = object()
+
+    def generate(self, texts: list, max_lengths: list) -> list:
+        steps = max(max_lengths)
+        time.sleep((self.CALL_MS + steps * (self.STEP_MS + self.ROW_STEP_MS * (len(texts) - 1))) / 1000)
+        self.requests += len(texts)
+        self.batches += 1
+        return [f"reply to {text}" for text in texts]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+async def _load(engine: ReplyEngine, concurrency: int, requests: int, max_length: int) -> tuple:
+    """`concurrency` callers issue `requests` replies in total; returns (replies/s, latencies ms)"""
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def caller():
+        for i in remaining:
+            start = time.perf_counter()
+            await engine.submit(PROMPTS[i % len(PROMPTS)], max_length)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start), latencies
+
+
+def run(concurrency_levels: list, requests_per_caller: int, max_length: int, batch_max: int,
+        window_ms: float, offline: bool):
+    engine_cls = SimulatedEngine if offline else ReplyEngine
+    # greedy decoding: both engines do the same work per request
+    unbatched = engine_cls(max_batch=1, window_ms=0, generate_options={"do_sample": False})
+    batched = engine_cls(max_batch=batch_max, window_ms=window_ms, generate_options={"do_sample": False})
+    for engine in (unbatched, batched):
+        engine.warm_up()
+    if offline:
+        print("SIMULATED: generate() is a sleep from an invented cost model, not DialoGPT. "
+              "Do not quote these figures as measurements.")
+    print(f"torch threads={batched.torch_threads} batch_max={batch_max} window={window_ms} ms "
+          f"max_length={max_length}{' (simulated)' if offline else ''}")
+
+    print(f"{'callers':>7}{'engine':>11}{'replies/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'avg batch':>11}")
+    for concurrency in concurrency_levels:
+        requests = concurrency * requests_per_caller
+        for name, engine in (("unbatched", unbatched), ("batched", batched)):
+            engine.requests = engine.batches = 0
+            rate, latencies = asyncio.run(_load(engine, concurrency, requests, max_length))
+            print(f"{concurrency:>7}{name:>11}{rate:>11.1f}{percentile(latencies, 50):>9.0f}"
+                  f"{percentile(latencies, 99):>9.0f}{engine.stats()['avg_batch']:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="comma-separated caller counts")
+    parser.add_argument("--requests", type=int, default=4, help="replies per caller at each level")
+    parser.add_argument("--max-length", type=int, default=50, help="prompt + reply tokens, as reply()")
+    parser.add_argument("--batch-max", type=int, default=REPLY_BATCH_MAX)
+    parser.add_argument("--window-ms", type=float, default=REPLY_BATCH_WINDOW_MS)
+    parser.add_argument("--offline", action="store_true", help="simulate generate instead of loading the model")
+    args = parser.parse_args()
+    run([int(c) for c in args.concurrency.split(",")], args.requests, args.max_length,
+        args.batch_max, args.window_ms, args.offline)
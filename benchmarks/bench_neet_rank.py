@@ -0,0 +1,60 @@
+# File: benchmarks/bench_neet_rank.py
+# NEET rank lookups/sec: the old per-call list-of-dicts scan vs the lookup table, scalar and batch
+#
+#   python -m benchmarks.bench_neet_rank [--batch 100000]
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.neet_service import RANK_RANGES, predict_neet_rank, predict_neet_rank_batch
+
+
+def _linear_scan(marks: int) -> str:
+    """The previous implementation: rebuild the band list on every call, first match wins"""
+    rank_ranges = [dict(r) for r in RANK_RANGES]
+    for r in rank_ranges:
+        if r["min_marks"] <= marks <= r["max_marks"]:
+            return f"{r['min_rank']} - {r['max_rank']}"
+    return "1750199+"
+
+
+def _rate(fn, items: list, seconds: float = 0.5) -> float:
+    done = 0
+    start = time.perf_counter()
+    while True:
+        for item in items:
+            fn(item)
+        done += len(items)
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return done / elapsed
+
+
+def run(batch: int):
+    rng = np.random.default_rng(0)
+    marks = rng.integers(-180, 721, size=batch)
+    scalar_marks = marks[:10000].tolist()
+
+    assert [_linear_scan(m) for m in scalar_marks] == [predict_neet_rank(m) for m in scalar_marks]
+
+    old = _rate(_linear_scan, scalar_marks)
+    new = _rate(predict_neet_rank, scalar_marks)
+    start = time.perf_counter()
+    repeats = 0
+    while time.perf_counter() - start < 0.5:
+        predict_neet_rank_batch(marks)
+        repeats += 1
+    vectorized = batch * repeats / (time.perf_counter() - start)
+
+    print(f"{'lookup':<36}{'lookups/s':>14}{'speedup':>9}")
+    print(f"{'linear scan (old, per call)':<36}{old:>14,.0f}{1:>8.1f}x")
+    print(f"{'predict_neet_rank (table)':<36}{new:>14,.0f}{new / old:>8.1f}x")
+    print(f"{f'predict_neet_rank_batch ({batch:,})':<36}{vectorized:>14,.0f}{vectorized / old:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=100000, help="marks per batch call")
+    run(parser.parse_args().batch)
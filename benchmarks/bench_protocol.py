@@ -0,0 +1,87 @@
+# File: benchmarks/bench_protocol.py
+# Twilio message handling throughput on one core: full json.loads / json.dumps vs app.streaming.protocol
+#
+#   python -m benchmarks.bench_protocol [--seconds 1.0]
+
+import argparse
+import base64
+import json
+import os
+import time
+
+from app.streaming import protocol
+from app.streaming.sender import MediaSequence
+
+STREAM_SID = "MZ18ad3ab5a668481ce02b83e7395059f0"
+FRAME = os.urandom(160)
+
+
+def _inbound_media() -> str:
+    """A media event exactly as Twilio sends it (compact, `event` first)"""
+    return json.dumps({
+        "event": "media",
+        "sequenceNumber": "4",
+        "media": {"track": "inbound", "chunk": "2", "timestamp": "5",
+                  "payload": base64.b64encode(FRAME).decode("ascii")},
+        "streamSid": STREAM_SID,
+    }, separators=(",", ":"))
+
+
+def _rate(fn, seconds: float) -> float:
+    """Calls per second of `fn`, measured in batches until `seconds` of CPU time elapse"""
+    calls = 0
+    start = time.process_time()
+    while True:
+        for _ in range(1000):
+            fn()
+        calls += 1000
+        elapsed = time.process_time() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+
+
+def run(seconds: float):
+    message = _inbound_media()
+    payload = base64.b64encode(FRAME).decode("ascii")
+    messages = protocol.StreamMessages(STREAM_SID)
+    seq_a, seq_b = MediaSequence(), MediaSequence()
+
+    def stdlib_inbound():
+        data = json.loads(message)
+        if data.get("event") == "media":
+            return data["media"]["payload"]
+
+    def fast_inbound():
+        event = protocol.parse_event(message)
+        if event.event == "media":
+            return event.payload
+
+    cases = [
+        ("inbound media", "json.loads → dict", stdlib_inbound, "parse_event (fast path)", fast_inbound),
+        ("outbound media", "json.dumps(nested dict)",
+         lambda: json.dumps({"event": "media", "streamSid": STREAM_SID, "media": {"payload": payload}}),
+         "StreamMessages.media", lambda: messages.media(payload)),
+        ("outbound sequenced", "json.dumps(MediaSequence.message)",
+         lambda: json.dumps(seq_a.message(STREAM_SID, FRAME)),
+         "MediaSequence.encode", lambda: seq_b.encode(messages, FRAME)),
+        ("realtime append", "json.dumps(append dict)",
+         lambda: json.dumps({"type": "input_audio_buffer.append", "audio": payload}),
+         "realtime_append", lambda: protocol.realtime_append(payload)),
+    ]
+
+    print(f"JSON backend for slow-path events: {protocol.JSON_BACKEND}")
+    print(f"{'case':<20}{'baseline':<36}{'msg/s':>12}   {'protocol':<26}{'msg/s':>12}{'speedup':>9}")
+    for name, base_name, base_fn, fast_name, fast_fn in cases:
+        base = _rate(base_fn, seconds)
+        fast = _rate(fast_fn, seconds)
+        print(f"{name:<20}{base_name:<36}{base:>12,.0f}   {fast_name:<26}{fast:>12,.0f}{fast / base:>8.1f}x")
+
+    # per-call budget: each call is 50 inbound + 50 outbound media messages per second
+    per_call = 50 / _rate(fast_inbound, seconds) + 50 / _rate(lambda: messages.media(payload), seconds)
+    print(f"protocol CPU per call-second: {per_call * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1.0, help="CPU time per case")
+    run(parser.parse_args().seconds)
@@ -0,0 +1,86 @@
+# File: benchmarks/bench_realtime_pool.py
+# Call-setup latency (call arrives → configured realtime socket in hand): per-call connect vs the warm pool
+#
+#   python -m benchmarks.bench_realtime_pool [--calls 50] [--handshake-ms 150] [--config-ms 80] [--gap-ms 300]
+#
+# Runs against websocket/fake_realtime_server.py, delaying the upgrade (TLS + WS handshake over a
+# real WAN) and the session.updated reply, so the numbers do not depend on network access.
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+from app.realtime.session_pool import RealtimeSessionPool
+from websocket.fake_realtime_server import FakeRealtimeServer
+
+SESSION_CONFIG = {"modalities": ["audio", "text"], "input_audio_format": "g711_ulaw"}
+
+
+async def _per_call(url: str) -> float:
+    """What the bridge did before the pool: new ClientSession, handshake, session.update"""
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(url) as ws:
+            await ws.send_json({"type": "session.update", "session": SESSION_CONFIG})
+            async for msg in ws:
+                if msg.json().get("type") == "session.updated":
+                    break
+            elapsed = time.perf_counter() - start
+    return elapsed
+
+
+async def _pooled(pool: RealtimeSessionPool) -> float:
+    start = time.perf_counter()
+    ws = await pool.acquire()
+    elapsed = time.perf_counter() - start
+    await ws.close()
+    return elapsed
+
+
+def _report(name: str, samples: list):
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"{name:<10}{statistics.median(ms):>10.1f}{p95:>10.1f}{ms[-1]:>10.1f}")
+
+
+async def run(calls: int, handshake_ms: float, config_ms: float, gap_ms: float, pool_size: int):
+    server = FakeRealtimeServer(handshake_ms=handshake_ms, config_ms=config_ms)
+    url = await server.start()
+
+    baseline = []
+    for _ in range(calls):
+        baseline.append(await _per_call(url))
+        await asyncio.sleep(gap_ms / 1000)
+
+    pool = RealtimeSessionPool(url, {}, SESSION_CONFIG, size=pool_size)
+    pool.start()
+    while pool.idle_count < pool_size:
+        await asyncio.sleep(0.01)
+    pooled = []
+    for _ in range(calls):
+        pooled.append(await _pooled(pool))
+        await asyncio.sleep(gap_ms / 1000)  # calls arrive spaced out; the pool refills in between
+    stats = pool.stats()
+    await pool.close()
+    await server.stop()
+
+    print(f"stand-in: handshake={handshake_ms:.0f} ms, session.updated after {config_ms:.0f} ms, "
+          f"{calls} calls every {gap_ms:.0f} ms")
+    print(f"{'setup':<10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    _report("per-call", baseline)
+    _report("pooled", pooled)
+    print(f"pool: hits={stats['hits']} misses={stats['misses']} expired={stats['expired']} failures={stats['failures']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--handshake-ms", type=float, default=150.0, help="simulated TLS + WebSocket upgrade time")
+    parser.add_argument("--config-ms", type=float, default=80.0, help="simulated session.update round trip")
+    parser.add_argument("--gap-ms", type=float, default=300.0, help="time between call arrivals")
+    parser.add_argument("--pool-size", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.handshake_ms, args.config_ms, args.gap_ms, args.pool_size))
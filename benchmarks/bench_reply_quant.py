@@ -0,0 +1,165 @@
+# File: benchmarks/bench_reply_quant.py
+# Reply model fp32 vs int8 (REPLY_QUANTIZE=int8) on CPU: tokens/s, model size and output divergence
+# against fp32, for both int8 variants: every linear layer ("int8", the default) and lm_head kept
+# fp32 ("int8body", REPLY_QUANT_LM_HEAD=0)
+#
+#   python -m benchmarks.bench_reply_quant [--max-new-tokens 40] [--repeats 3] [--json]
+#
+# Greedy decoding on a fixed prompt set, one prompt at a time. Divergence is measured twice:
+# on the generated replies (exact match, share of matching token positions, first position
+# where they differ) and teacher-forced on the prompts (top-1 next-token agreement at every
+# position, mean KL(fp32 ‖ int8) of the next-token distribution).
+
+import argparse
+import json
+import time
+
+from app.services.generate_reply import REPLY_MODEL, ReplyEngine
+from app.services.reply_quantize import model_bytes
+
+PROMPTS = [
+    "Hi!",
+    "What rank can I get with 650 marks in NEET?",
+    "How should I prepare for the exam in the last month?",
+    "Can you call me back tomorrow?",
+    "Which colleges accept a rank around twenty thousand?",
+    "Thanks, that helps a lot.",
+    "I am nervous about the result.",
+    "Do you think I should take a drop year?",
+]
+
+
+def _generate(engine: ReplyEngine, prompt: str, max_new_tokens: int) -> tuple:
+    """Greedy reply token ids and seconds taken"""
+    import torch
+
+    tokenizer = engine.tokenizer
+    inputs = tokenizer(prompt, return_tensors="pt")  # as reply() sends it
+    start = time.perf_counter()
+    with torch.inference_mode():
+        ids = engine.model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=False,
+                                    pad_token_id=tokenizer.eos_token_id)
+    elapsed = time.perf_counter() - start
+    reply = ids[0, inputs["input_ids"].shape[-1]:].tolist()
+    while reply and reply[-1] == tokenizer.eos_token_id:  # trailing eos / padding is not output
+        reply.pop()
+    return reply, elapsed
+
+
+def _teacher_forced(fp32: ReplyEngine, int8: ReplyEngine, prompt: str) -> tuple:
+    """(positions, top-1 agreements, summed KL) over every next-token prediction in the prompt"""
+    import torch
+    import torch.nn.functional as F
+
+    inputs = fp32.tokenizer(prompt, return_tensors="pt")
+    with torch.inference_mode():
+        reference = F.log_softmax(fp32.model(**inputs).logits[0].float(), dim=-1)
+        quantized = F.log_softmax(int8.model(**inputs).logits[0].float(), dim=-1)
+    agree = (reference.argmax(-1) == quantized.argmax(-1)).sum().item()
+    kl = F.kl_div(quantized, reference, log_target=True, reduction="none").sum(-1).sum().item()
+    return reference.shape[0], agree, kl
+
+
+def run(model_name: str, max_new_tokens: int, repeats: int) -> dict:
+    engines = {}
+    for name, quantize, lm_head in (("fp32", "", None), ("int8", "int8", True), ("int8body", "int8", False)):
+        engine = ReplyEngine(model_name, device="cpu", max_batch=1, window_ms=0, quantize=quantize,
+                             quantize_lm_head=lm_head)
+        engine.load()
+        engines[name] = engine
+
+    report = {"model": model_name, "torch_threads": engines["fp32"].torch_threads, "engines": {}}
+    outputs = {}
+    for name, engine in engines.items():
+        _generate(engine, PROMPTS[0], 4)  # first-call allocations out of the timing
+        tokens = seconds = 0
+        outputs[name] = []
+        for prompt in PROMPTS:
+            best = None
+            for _ in range(repeats):
+                reply, elapsed = _generate(engine, prompt, max_new_tokens)
+                best = elapsed if best is None else min(best, elapsed)
+            outputs[name].append(reply)
+            tokens += len(reply)
+            seconds += best
+        report["engines"][name] = {
+            "load_s": round(engine.load_s, 2),
+            "model_mb": round(model_bytes(engine.model) / 1e6, 1),
+            "tokens": tokens,
+            "tokens_per_s": round(tokens / seconds, 1) if seconds else 0.0,
+            "ms_per_reply": round(seconds / len(PROMPTS) * 1000, 1),
+        }
+
+    quantized = [name for name in engines if name != "fp32"]
+    report["divergence"] = {name: _divergence(engines, outputs, name) for name in quantized}
+    report["samples"] = [
+        {"prompt": prompt, **{name: engines[name].tokenizer.decode(outputs[name][i], skip_special_tokens=True)
+                              for name in engines}}
+        for i, prompt in enumerate(PROMPTS)
+    ]
+    return report
+
+
+def _divergence(engines: dict, outputs: dict, name: str) -> dict:
+    """Engine `name`'s greedy replies and next-token distributions against fp32"""
+    exact = matching = compared = 0
+    first_diffs = []
+    for ref, quant in zip(outputs["fp32"], outputs[name]):
+        exact += ref == quant
+        longest = max(len(ref), len(quant), 1)
+        same = sum(a == b for a, b in zip(ref, quant))
+        matching += same
+        compared += longest
+        diff = next((i for i, (a, b) in enumerate(zip(ref, quant)) if a != b), None)
+        if diff is None and len(ref) != len(quant):
+            diff = min(len(ref), len(quant))
+        if diff is not None:
+            first_diffs.append(diff)
+
+    positions = agree = 0
+    kl = 0.0
+    for prompt in PROMPTS:
+        n, a, k = _teacher_forced(engines["fp32"], engines[name], prompt)
+        positions, agree, kl = positions + n, agree + a, kl + k
+
+    return {
+        "exact_match": f"{exact}/{len(PROMPTS)}",
+        "token_agreement": round(matching / compared, 3) if compared else 1.0,
+        "mean_first_diff_token": round(sum(first_diffs) / len(first_diffs), 1) if first_diffs else None,
+        "next_token_top1_agreement": round(agree / positions, 3),
+        "next_token_kl_mean": round(kl / positions, 4),
+    }
+
+
+def print_report(report: dict):
+    print(f"{report['model']}, torch threads={report['torch_threads']}")
+    print(f"{'engine':<10}{'load s':>8}{'model MB':>10}{'tokens':>8}{'tokens/s':>10}{'ms/reply':>10}")
+    for name, row in report["engines"].items():
+        print(f"{name:<10}{row['load_s']:>8.2f}{row['model_mb']:>10.1f}{row['tokens']:>8}"
+              f"{row['tokens_per_s']:>10.1f}{row['ms_per_reply']:>10.1f}")
+    fp32 = report["engines"]["fp32"]
+    for name, divergence in report["divergence"].items():
+        row = report["engines"][name]
+        if fp32["tokens_per_s"]:
+            print(f"{name}: speedup {row['tokens_per_s'] / fp32['tokens_per_s']:.2f}x, "
+                  f"size {row['model_mb'] / fp32['model_mb']:.2f}x")
+        print(f"{name} divergence: " + ", ".join(f"{k}={v}" for k, v in divergence.items()))
+    for sample in report["samples"]:
+        print(f"  {sample['prompt']!r}")
+        for name in report["engines"]:
+            marker = "=" if name == "fp32" or sample[name] == sample["fp32"] else "≠"
+            print(f"    {marker} {name:<9}{sample[name]!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=REPLY_MODEL)
+    parser.add_argument("--max-new-tokens", type=int, default=40)
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per prompt, best is kept")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    result = run(args.model, args.max_new_tokens, args.repeats)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print_report(result)
@@ -0,0 +1,62 @@
+# File: benchmarks/bench_resample.py
+# CPU per call: fresh-state audioop.ratecv per 20 ms frame vs one StreamResampler per stream
+#
+#   python -m benchmarks.bench_resample [--seconds 60]
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+from app.audio.resample import StreamResampler
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:  # Python 3.13+ without audioop-lts
+        audioop = None
+
+FRAME_SAMPLES = 160  # 20 ms @ 8 kHz
+
+
+def _test_frames(seconds: int):
+    """Speech-band test signal cut into Twilio-sized PCM16 frames"""
+    t = np.arange(8000 * seconds) / 8000
+    signal = 6000 * np.sin(2 * np.pi * 300 * t) + 2000 * np.sin(2 * np.pi * 2100 * t)
+    pcm = signal.astype(np.int16).tobytes()
+    step = FRAME_SAMPLES * 2
+    return [pcm[i:i + step] for i in range(0, len(pcm), step)]
+
+
+def _cpu(fn) -> float:
+    start = time.process_time()
+    fn()
+    return time.process_time() - start
+
+
+def run(seconds: int):
+    frames = _test_frames(seconds)
+    print(f"{seconds} s of call audio ({len(frames)} frames); CPU ms per call-second\n")
+    print(f"{'approach':<44}{'8→16 kHz':>10}{'8→24 kHz':>10}")
+
+    def row(name, make_fn):
+        cols = []
+        for out_rate in (16000, 24000):
+            cols.append(_cpu(make_fn(out_rate)) * 1000 / seconds)
+        print(f"{name:<44}{cols[0]:>10.3f}{cols[1]:>10.3f}")
+
+    if audioop is not None:
+        row("audioop.ratecv, fresh state per frame (old)",
+            lambda rate: lambda: [audioop.ratecv(f, 2, 1, 8000, rate, None)[0] for f in frames])
+    row("StreamResampler, one frame per call",
+        lambda rate: lambda: [r.process(f) for r in [StreamResampler(8000, rate)] for f in frames])
+    row("StreamResampler, 5 buffered frames per call",
+        lambda rate: lambda: [r.process_frames(frames[i:i + 5])
+                              for r in [StreamResampler(8000, rate)] for i in range(0, len(frames), 5)])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=int, default=60)
+    run(parser.parse_args().seconds)
@@ -0,0 +1,55 @@
+# File: benchmarks/bench_tts_pipeline.py
+# Time-to-first-audio: single-shot text_to_ws_audio-style synthesis vs the sentence pipeline
+#
+#   python -m benchmarks.bench_tts_pipeline            # real gTTS (needs network + ffmpeg)
+#   python -m benchmarks.bench_tts_pipeline --offline  # simulated synthesis latency
+
+import argparse
+import asyncio
+import time
+
+from app.tts import pipeline
+from app.tts.cache import TTSCache
+from app.tts.synth import synthesize_ulaw
+
+REPLIES = [
+    "आपने कहा: मेरे नीट में छह सौ पचास अंक आए हैं।",
+    "नमस्ते! आपके छह सौ पचास अंक हैं, तो आपकी अनुमानित रैंक पाँच सौ से एक हज़ार के बीच है। "
+    "यह पिछले साल के आंकड़ों पर आधारित है, असली रैंक थोड़ी अलग हो सकती है। क्या आप कुछ और जानना चाहेंगे?",
+]
+
+
+def _simulated_synthesize(text: str, lang: str, voice: str) -> bytes:
+    """Rough gTTS + transcode cost model: fixed round trip plus per-character work"""
+    time.sleep(0.25 + 0.004 * len(text))
+    return b"\xff" * (len(text) * 480)  # ~60 ms of audio per character
+
+
+async def _pipelined(text: str, synthesize) -> tuple:
+    cache = TTSCache(max_memory_bytes=0, use_disk=False, synthesize=synthesize)  # every lookup is a miss
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    first = None
+    async for _ in pipeline.synthesize_segments(text, cache=cache):
+        if first is None:
+            first = loop.time() - start
+    return first, loop.time() - start
+
+
+def run(offline: bool):
+    synthesize = _simulated_synthesize if offline else synthesize_ulaw
+    print(f"{'reply chars':>11}{'segments':>10}{'single-shot TTFA ms':>21}{'pipelined TTFA ms':>19}{'pipelined total ms':>20}")
+    for text in REPLIES:
+        start = time.perf_counter()
+        synthesize(text, "hi", "com")
+        single = time.perf_counter() - start
+
+        first, total = asyncio.run(_pipelined(text, synthesize))
+        segments = len(pipeline.split_segments(text))
+        print(f"{len(text):>11}{segments:>10}{single * 1000:>21.0f}{first * 1000:>19.0f}{total * 1000:>20.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offline", action="store_true", help="simulate synthesis instead of calling gTTS")
+    run(parser.parse_args().offline)
@@ -0,0 +1,104 @@
+# File: benchmarks/bench_vosk_model.py
+# Vosk model load time, per-worker memory (RSS/PSS) and call-setup latency, before vs after the registry
+#
+#   python -m benchmarks.bench_vosk_model [--model models/hindi] [--workers 4] [--calls 200]
+
+import argparse
+import os
+import time
+
+from vosk import KaldiRecognizer, Model, SetLogLevel
+
+from app.asr import model_registry
+
+
+def _memory_kb(pid: int = None) -> tuple:
+    """(RSS, PSS) in kB; PSS splits shared copy-on-write pages between processes"""
+    base = f"/proc/{pid or os.getpid()}"
+    rss = pss = 0
+    with open(f"{base}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+    try:
+        with open(f"{base}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    return rss, pss
+
+
+def _fork_workers(n: int, load_in_child, model_path: str) -> list:
+    """Fork n idle workers and sample their memory once they are ready"""
+    pids, pipes = [], []
+    for _ in range(n):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            if load_in_child:
+                Model(model_path)
+            else:
+                model_registry.acquire_recognizer(16000, model_path)  # touch the shared model
+            os.write(write_fd, b"1")
+            time.sleep(60)
+            os._exit(0)
+        os.close(write_fd)
+        pids.append(pid)
+        pipes.append(read_fd)
+
+    for fd in pipes:
+        os.read(fd, 1)
+        os.close(fd)
+    samples = [_memory_kb(pid) for pid in pids]
+    for pid in pids:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+    return samples
+
+
+def run(model_path: str, workers: int, calls: int):
+    SetLogLevel(-1)
+
+    start = time.perf_counter()
+    model = Model(model_path)
+    load_s = time.perf_counter() - start
+    print(f"model load: {load_s:.2f} s, parent RSS after load: {_memory_kb()[0] / 1024:.0f} MB\n")
+
+    # Call setup: new KaldiRecognizer per call (before) vs pooled + Reset (after)
+    start = time.perf_counter()
+    for _ in range(calls):
+        KaldiRecognizer(model, 16000)
+    fresh_ms = (time.perf_counter() - start) * 1000 / calls
+
+    model_registry._models[model_path] = model
+    start = time.perf_counter()
+    for _ in range(calls):
+        model_registry.release_recognizer(model_registry.acquire_recognizer(16000, model_path))
+    pooled_ms = (time.perf_counter() - start) * 1000 / calls
+    print(f"call setup: new recognizer {fresh_ms:.3f} ms, pooled {pooled_ms:.3f} ms\n")
+
+    del model
+    model_registry._models.clear()
+    model_registry._idle.clear()
+
+    before = _fork_workers(workers, True, model_path)   # every worker loads its own copy
+    model_registry.preload_models([model_path])
+    after = _fork_workers(workers, False, model_path)   # loaded once before fork, shared CoW
+
+    print(f"{'per-worker memory':<28}{'RSS MB':>10}{'PSS MB':>10}")
+    for name, samples in (("load in each worker", before), ("pre-fork shared model", after)):
+        rss = sum(s[0] for s in samples) / len(samples) / 1024
+        pss = sum(s[1] for s in samples) / len(samples) / 1024
+        print(f"{name:<28}{rss:>10.0f}{pss:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=model_registry.VOSK_MODEL_PATH)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    run(args.model, args.workers, args.calls)
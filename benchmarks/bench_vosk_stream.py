@@ -0,0 +1,78 @@
+# File: benchmarks/bench_vosk_stream.py
+# Vosk CPU per call-second and final-transcript timing for different chunk / partial cadences
+#
+#   python -m benchmarks.bench_vosk_stream [--model models/hindi] [--wav twilio.wav] [--repeat 20]
+
+import argparse
+import os
+import time
+
+from vosk import KaldiRecognizer, Model, SetLogLevel
+
+from app.audio import codec
+from app.audio.resample import StreamResampler
+from app.audio.wav import read_ulaw
+from app.asr.vosk_stream import VoskStream
+
+FRAME_BYTES = 160  # 20 ms of 8 kHz μ-law
+
+# (chunk_ms, partial_interval_ms); the first row is the old per-frame behaviour
+CONFIGS = [(20, 0), (100, 0), (100, 500), (200, 500), (200, 1000)]
+
+
+def _asr_frames(wav_path: str, repeat: int) -> list:
+    """Fixture → 20 ms PCM16 frames at 16 kHz, exactly as the handlers produce them"""
+    ulaw = read_ulaw(wav_path) * repeat
+    resampler = StreamResampler(8000, 16000)
+    return [resampler.process(codec.ulaw2lin(ulaw[i:i + FRAME_BYTES]))
+            for i in range(0, len(ulaw) - FRAME_BYTES + 1, FRAME_BYTES)]
+
+
+def _run_config(model, frames, chunk_ms, partial_ms):
+    stream = VoskStream(KaldiRecognizer(model, 16000), chunk_ms=chunk_ms, partial_interval_ms=partial_ms)
+    finals = []  # audio position (ms) at which each final transcript became available
+
+    start = time.process_time()
+    for frame in frames:
+        for result in stream.feed(frame):
+            if "text" in result:
+                finals.append(stream.audio_bytes / stream.bytes_per_ms)
+    stream.flush()
+    cpu = time.process_time() - start
+    return cpu, stream, finals
+
+
+def run(model_path: str, wav_path: str, repeat: int):
+    SetLogLevel(-1)
+    model = Model(model_path)
+    frames = _asr_frames(wav_path, repeat)
+    seconds = len(frames) * 0.02
+    print(f"{seconds:.1f} s of audio, {len(frames)} frames\n")
+    print(f"{'chunk ms':>9}{'partial ms':>11}{'CPU ms/s':>10}{'saved':>8}"
+          f"{'decodes/s':>11}{'parses/s':>10}{'finals':>8}{'final delay ms':>16}")
+
+    baseline_cpu = baseline_finals = None
+    for chunk_ms, partial_ms in CONFIGS:
+        cpu, stream, finals = _run_config(model, frames, chunk_ms, partial_ms)
+        cpu_per_s = cpu * 1000 / seconds
+        if baseline_cpu is None:
+            baseline_cpu, baseline_finals = cpu_per_s, finals
+
+        saved = f"{(1 - cpu_per_s / baseline_cpu) * 100:.0f}%"
+        if len(finals) == len(baseline_finals) and finals:
+            delay = sum(a - b for a, b in zip(finals, baseline_finals)) / len(finals)
+            delay_str = f"{delay:+.0f}"
+        else:
+            delay_str = "n/a"  # segmentation changed; compare final counts instead
+        print(f"{chunk_ms:>9}{partial_ms:>11}{cpu_per_s:>10.2f}{saved:>8}"
+              f"{stream.decoder_calls / seconds:>11.1f}{stream.json_parses / seconds:>10.1f}"
+              f"{len(finals):>8}{delay_str:>16}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=os.getenv("VOSK_MODEL_PATH", "models/hindi"))
+    parser.add_argument("--wav", default="twilio.wav")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.model, args.wav, args.repeat)
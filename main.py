@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from app.api import voice_routes, call_routes
+from fastapi.responses import PlainTextResponse
+from app.api import voice_routes, call_routes, neet_routes
+from app.services.voice_logger import shutdown_voice_logger
+from app.services.call_metrics import render_prometheus
 import os
 
 
@@ -13,3 +16,15 @@ def root():
 
 app.include_router(voice_routes.router)
 app.include_router(call_routes.router)
+app.include_router(neet_routes.router)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape: call-latency histograms merged from every process's snapshot"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.on_event("shutdown")
+def flush_voice_logs():
+    shutdown_voice_logger()
@@ -0,0 +1,23 @@
+# File: tests/test_admission.py
+# host_accepting: worker gauges are read from the snapshot files at most once per cache period
+
+import asyncio
+
+from app.services import admission, call_metrics
+
+
+def _publish(directory, accepting: int):
+    registry = call_metrics.MetricsRegistry(str(directory))
+    registry.set_gauge("accepting_calls", "ws_server", accepting)
+    registry.write_snapshot()
+
+
+def test_host_accepting_is_cached(tmp_path):
+    directory = str(tmp_path)
+    assert admission.host_accepting(directory) is None  # no worker reported: fail open
+    _publish(tmp_path, 0)
+    assert admission.host_accepting(directory) is None  # still the cached answer
+    assert admission.host_accepting(directory, max_age=0) is False
+    _publish(tmp_path, 1)
+    assert asyncio.run(admission.host_accepting_async(directory)) is False
+    assert asyncio.run(admission.host_accepting_async(directory, max_age=0)) is True
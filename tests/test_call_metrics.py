@@ -0,0 +1,61 @@
+# File: tests/test_call_metrics.py
+# /metrics aggregation: only snapshots of processes that are still running are merged
+
+import json
+import os
+
+from app.services import call_metrics
+
+
+def _write(directory, name: str, data: dict):
+    with open(os.path.join(directory, name), "w") as f:
+        json.dump(data, f)
+
+
+def test_stale_snapshots_are_ignored_and_deleted(tmp_path):
+    registry = call_metrics.MetricsRegistry(str(tmp_path))
+    registry.inc("calls_started", "realtime")
+    registry.set_gauge("active_calls", "ws_server", 2)
+    registry.write_snapshot()
+    _write(tmp_path, "999999999.json", {"pid": 999999999, "identity": "boot:1",
+                                        "counters": {"calls_started|realtime": 5}})        # exited worker
+    _write(tmp_path, "old.json", {"pid": os.getpid(), "identity": "earlier-boot:1",
+                                  "counters": {"calls_started|realtime": 7},
+                                  "gauges": {"accepting_calls|ws_server": 1}})             # reused pid
+    _write(tmp_path, "legacy.json", {"pid": os.getpid(), "counters": {"calls_started|realtime": 9}})
+
+    _, counters, gauges = call_metrics.collect(str(tmp_path))
+
+    assert counters == {"calls_started|realtime": 1}
+    assert gauges == {("active_calls|ws_server", os.getpid()): 2}
+    assert os.listdir(tmp_path) == [f"{os.getpid()}.json"]
+
+    registry.remove_snapshot()
+    assert os.listdir(tmp_path) == []
+
+
+def test_snapshot_writes_leave_the_event_loop_and_coalesce(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+
+    registry = call_metrics.MetricsRegistry(str(tmp_path))
+    threads = []
+    write = registry.write_snapshot
+
+    def recording_write():
+        threads.append(threading.current_thread())
+        write()
+
+    monkeypatch.setattr(registry, "write_snapshot", recording_write)
+
+    async def scenario():
+        for n in range(20):  # one call end after another
+            registry.inc("calls_finished", "realtime")
+            call_metrics.CallTimeline("realtime", registry=registry).finish()
+        await registry.snapshots_written()
+
+    asyncio.run(scenario())
+    assert threading.main_thread() not in threads
+    assert 1 <= len(threads) <= 2
+    with open(os.path.join(tmp_path, f"{os.getpid()}.json")) as f:
+        assert json.load(f)["counters"]["calls_finished|realtime"] == 40
@@ -0,0 +1,31 @@
+# File: tests/test_codec.py
+# μ-law codec: every bytes path (audioop hand-off, translate tables, NumPy tables) is bit-exact
+
+import os
+import warnings
+
+import pytest
+
+from app.audio import codec
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    audioop = pytest.importorskip("audioop")
+
+SIZES = [0, 1, 159, 160, 161, codec.TRANSLATE_MAX_BYTES, codec.TRANSLATE_MAX_BYTES + 1, 4001]
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_decode_matches_audioop(n):
+    data = bytes(range(256)) * (n // 256) + os.urandom(n % 256)
+    expected = audioop.ulaw2lin(data, 2)
+    assert codec._ulaw2lin_table(data) == expected
+    assert codec.ulaw2lin(data) == expected
+
+
+@pytest.mark.parametrize("n", SIZES + [codec.AUDIOOP_ENCODE_MAX_BYTES // 2 + 1])
+def test_encode_matches_audioop(n):
+    pcm = os.urandom(2 * n)
+    expected = audioop.lin2ulaw(pcm, 2)
+    assert codec._lin2ulaw_table(pcm) == expected
+    assert codec.lin2ulaw(pcm) == expected
@@ -0,0 +1,68 @@
+# File: tests/test_intent.py
+# Intent fast-path: spoken number parsing and which transcripts count as "marks → rank" questions
+
+import pytest
+
+from app.services import intent
+
+
+@pytest.mark.parametrize("text, numbers", [
+    ("छह सौ पचास", [650]),
+    ("छह पचास", [650]),
+    ("साढ़े छह सौ", [650]),
+    ("सवा छह सौ", [625]),
+    ("पौने सात सौ", [675]),
+    ("डेढ़ सौ", [150]),
+    ("सात सौ बीस", [720]),
+    ("six hundred and fifty five", [655]),
+    ("six fifty", [650]),
+    ("६५०", [650]),
+    ("two thousand twenty four", [2024]),
+    ("दो हज़ार चौबीस", [2024]),
+    ("सवा", []),
+])
+def test_parse_numbers(text, numbers):
+    assert intent.parse_numbers(text) == numbers
+
+
+@pytest.mark.parametrize("text, marks", [
+    ("मेरे नीट में छह सौ पचास नंबर आए तो मेरी रैंक क्या होगी", 650),
+    ("मुझे 500 अंक मिले हैं नीट में", 500),
+    ("साढ़े पांच सौ मार्क्स पर रैंक कितनी आएगी?", 550),
+    ("what rank for 650 marks", 650),
+    ("I got 600 in neet, what rank", 600),
+    ("two thousand twenty four NEET 650 marks", 650),
+    ("neet 2024 me 600 marks", 600),
+])
+def test_marks_questions_are_answered(text, marks):
+    answer = intent.match(text)
+    assert answer is not None and answer.marks == marks
+    assert answer.text in intent.answer_texts()
+
+
+@pytest.mark.parametrize("text", [
+    "मेरी रैंक 500 है तो कितने नंबर चाहिए",   # rank given, marks asked
+    "top 100 rank ke liye kitne marks",
+    "rank 1 ke liye kitne marks",
+    "how many marks for rank 5000",
+    "मेरी रैंक क्या होगी",                      # no marks given
+    "rank for 800 marks",                       # above the maximum
+    "आज मौसम कैसा है",
+])
+def test_other_turns_go_to_the_model(text):
+    assert intent.match(text) is None
+
+
+def test_summary_reports_this_call_only(tmp_path):
+    from app.services.call_metrics import CallTimeline, MetricsRegistry
+
+    registry = MetricsRegistry(str(tmp_path))
+    earlier = CallTimeline("vosk_repeat", registry=registry)
+    for _ in range(3):
+        intent.record_turn(earlier, intent.match("मेरे 650 नंबर आए, रैंक कितनी आएगी"))
+    call = CallTimeline("vosk_repeat", registry=registry)
+    intent.record_turn(call, None)
+    intent.record_turn(call, intent.match("मेरे 650 नंबर आए, रैंक कितनी आएगी"))
+    call.finish()
+    assert "1/2 turns answered locally (50%)" in intent.summary(call)
+    assert registry.counters[("intent_turns", "vosk_repeat")] == 5  # process totals stay on /metrics
@@ -0,0 +1,19 @@
+# File: tests/test_neet_service.py
+# predict_neet_rank input checks: every invalid score is the same ValueError (422 from /neet/rank)
+
+import math
+
+import pytest
+
+from app.services.neet_service import MAX_MARKS, MIN_MARKS, predict_neet_rank
+
+
+@pytest.mark.parametrize("marks", [math.inf, -math.inf, math.nan, MAX_MARKS + 1, MIN_MARKS - 0.5])
+def test_invalid_marks_raise_range_error(marks):
+    with pytest.raises(ValueError, match="NEET marks must be between"):
+        predict_neet_rank(marks)
+
+
+def test_fractional_marks_are_floored():
+    assert predict_neet_rank(720) == predict_neet_rank(715.9) == "1 - 2"
+    assert predict_neet_rank(MIN_MARKS) == "1750199+"
@@ -0,0 +1,86 @@
+# File: tests/test_sender.py
+# PacedSender: cancel() must stop the utterance playing and everything queued behind it
+
+import asyncio
+
+from app.streaming.sender import FRAME_BYTES, PacedSender
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+def _media_count(ws: FakeWebSocket) -> int:
+    return sum('"media"' in message for message in ws.sent)
+
+
+def test_cancel_stops_every_queued_utterance():
+    async def scenario():
+        ws = FakeWebSocket()
+        sender = PacedSender(ws, "MZ1", lead_ms=0)
+        first = sender.play(b"\xff" * FRAME_BYTES * 25)   # 500 ms
+        second = sender.play(b"\xff" * FRAME_BYTES * 25)
+        third = sender.play(b"\xff" * FRAME_BYTES * 25)
+        await asyncio.sleep(0.1)
+        await sender.cancel()
+        sent_at_cancel = _media_count(ws)
+        await asyncio.sleep(0.3)
+        return ws, sender, sent_at_cancel, (first, second, third)
+
+    ws, sender, sent_at_cancel, tasks = asyncio.run(scenario())
+    assert 0 < sent_at_cancel < 25
+    assert _media_count(ws) == sent_at_cancel      # nothing queued started after the cancel
+    assert '"clear"' in ws.sent[-1]
+    assert all(task.cancelled() for task in tasks)
+    assert not sender.playing
+
+
+def test_utterances_play_back_to_back():
+    async def scenario():
+        ws = FakeWebSocket()
+        sender = PacedSender(ws, "MZ1", lead_ms=1000)
+        sender.play(b"\xff" * FRAME_BYTES * 3)
+        await sender.play(b"\xff" * FRAME_BYTES * 2)
+        return ws, sender
+
+    ws, sender = asyncio.run(scenario())
+    assert _media_count(ws) == 5
+    assert not sender.playing
+
+
+def test_cancel_stops_a_streamed_reply_between_segments():
+    class Segments:
+        def __init__(self, chunks):
+            self.chunks = list(chunks)
+            self.closed = False
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if not self.chunks:
+                raise StopAsyncIteration
+            return self.chunks.pop(0)
+
+        async def aclose(self):
+            self.closed = True
+
+    async def scenario():
+        ws = FakeWebSocket()
+        sender = PacedSender(ws, "MZ1", lead_ms=0)
+        segments = Segments([b"\xff" * FRAME_BYTES * 10] * 3)  # three 200 ms sentences, one task
+        sender.play(segments)
+        await asyncio.sleep(0.25)                               # into the second sentence
+        await sender.cancel()
+        sent_at_cancel = _media_count(ws)
+        await asyncio.sleep(0.5)
+        return ws, segments, sent_at_cancel
+
+    ws, segments, sent_at_cancel = asyncio.run(scenario())
+    assert 10 < sent_at_cancel < 20
+    assert _media_count(ws) == sent_at_cancel
+    assert segments.closed
@@ -0,0 +1,35 @@
+# File: tests/test_tts_cache.py
+# TTS cache disk tier: only fixed prompts are persisted, and a failed write never loses the audio
+
+import errno
+import os
+
+from app.tts import cache as tts_cache
+
+
+def _fake_synthesize(text, lang, voice):
+    return b"\xff" * 160
+
+
+def _files(directory) -> list:
+    return [name for _, _, files in os.walk(directory) for name in files]
+
+
+def test_only_fixed_prompts_reach_the_disk(tmp_path):
+    cache = tts_cache.TTSCache(str(tmp_path), use_disk=True, synthesize=_fake_synthesize)
+    cache.get("आपने कहा: मेरा नंबर नौ आठ सात")  # echoed caller speech: memory only
+    assert _files(tmp_path) == []
+    assert cache.warm(["कृपया लाइन पर बने रहें।"]) == 1
+    assert len(_files(tmp_path)) == 1
+    assert tts_cache.TTSCache(str(tmp_path), use_disk=True, synthesize=None).get("कृपया लाइन पर बने रहें।")
+
+
+def test_failed_disk_write_still_returns_audio(tmp_path, monkeypatch):
+    cache = tts_cache.TTSCache(str(tmp_path), use_disk=True, synthesize=_fake_synthesize)
+
+    def disk_full(src, dst):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(tts_cache.os, "replace", disk_full)
+    assert cache.get("नमस्ते", persist=True) == b"\xff" * 160
+    assert _files(tmp_path) == []
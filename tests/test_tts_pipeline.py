@@ -0,0 +1,30 @@
+# File: tests/test_tts_pipeline.py
+# speak(): a multi-sentence reply is one playback task, so one cancel() silences all of it
+
+import asyncio
+
+from app.streaming.sender import FRAME_BYTES, PacedSender
+from app.tts import pipeline
+from app.tts.cache import TTSCache
+from tests.test_sender import FakeWebSocket, _media_count
+
+
+def test_cancel_stops_every_sentence_of_a_reply(monkeypatch):
+    cache = TTSCache(max_memory_bytes=0, use_disk=False,
+                     synthesize=lambda text, lang, voice: b"\xff" * FRAME_BYTES * 10)  # 200 ms per sentence
+    monkeypatch.setattr(pipeline, "get_tts_cache", lambda: cache)
+
+    async def scenario():
+        ws = FakeWebSocket()
+        sender = PacedSender(ws, "MZ1", lead_ms=0)
+        first_audio = await pipeline.speak(sender, "पहला वाक्य। दूसरा वाक्य। तीसरा वाक्य।")
+        await asyncio.sleep(0.25)
+        await sender.cancel()
+        sent_at_cancel = _media_count(ws)
+        await asyncio.sleep(0.5)
+        return ws, first_audio, sent_at_cancel
+
+    ws, first_audio, sent_at_cancel = asyncio.run(scenario())
+    assert first_audio >= 0
+    assert 0 < sent_at_cancel < 30
+    assert _media_count(ws) == sent_at_cancel
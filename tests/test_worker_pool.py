@@ -0,0 +1,32 @@
+# File: tests/test_worker_pool.py
+# RecognitionSession: a decoder error must reach the producer instead of blocking it forever
+
+import asyncio
+
+import pytest
+
+from app.asr.worker_pool import RecognitionPool
+
+
+class FailingStream:
+    def feed(self, pcm16: bytes) -> list:
+        raise RuntimeError("decoder crashed")
+
+    def flush(self) -> dict:
+        return {}
+
+
+def test_put_raises_when_the_worker_failed():
+    async def scenario():
+        pool = RecognitionPool(workers=1)
+        session = pool.open_session(FailingStream(), max_frames=1, policy="block")
+        with pytest.raises(RuntimeError, match="decoder crashed"):
+            async with asyncio.timeout(2):
+                for _ in range(10):  # the queue fills while the first batch fails
+                    await session.put(b"\x00" * 320)
+        assert pool.active_calls() == [0]  # the recognizer slot was released
+        with pytest.raises(RuntimeError):
+            await session.close()
+        pool.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,381 @@
+# File: websocket/fake_realtime_server.py
+# Local stand-in for the OpenAI realtime API: the subset of events the voice bridge uses, with
+# tunable timing, so the bridge's own overhead can be benchmarked and profiled offline
+#
+#   python -m websocket.fake_realtime_server --port 9700 --first-token-ms 300 --tokens-per-s 40
+#   OPENAI_REALTIME_URL=ws://127.0.0.1:9700/v1/realtime OPENAI_API_KEY=fake python websocket/ws_server.py
+#
+# Client events: session.update, input_audio_buffer.append / commit / clear, response.create,
+# response.cancel, conversation.item.truncate. Server events: session.created / updated,
+# input_audio_buffer.speech_started / speech_stopped / committed, conversation.item.created,
+# conversation.item.input_audio_transcription.completed, response.created,
+# response.audio.delta, response.audio_transcript.delta (response.text.delta for text-only),
+# response.audio.done, response.done, error.
+#
+# Turn detection runs on the audio clock (bytes received), like the real server: speech starts
+# after `vad_start_ms` above `vad_threshold` RMS and stops after the session's
+# silence_duration_ms (or `silence_ms`) below it. Replies are `reply_tokens` tokens generated
+# at `tokens_per_s` after `first_token_ms`, each token carrying `audio_ms_per_token` of audio
+# sent in `delta_ms` chunks.
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+
+import aiohttp
+import numpy as np
+from aiohttp import web
+
+from app.audio import codec
+from app.audio.vad import EnergyEndpointer
+
+FRAME_MS = 20
+BYTES_PER_MS = {"g711_ulaw": 8, "g711_alaw": 8, "pcm16": 48}  # pcm16 is 24 kHz mono
+
+
+def _tone(audio_format: str, ms: int = 1000) -> bytes:
+    """One second of a quiet 220 Hz tone in the session's output format (looped for replies)"""
+    rate = 24000 if audio_format == "pcm16" else 8000
+    t = np.arange(rate * ms // 1000) / rate
+    pcm = (np.sin(2 * np.pi * 220 * t) * 3000).astype(np.int16)
+    return pcm.tobytes() if audio_format == "pcm16" else codec.ulaw_encode(pcm).tobytes()
+
+
+class FakeRealtimeServer:
+    """aiohttp app serving /v1/realtime; one `_FakeSession` per connection"""
+
+    def __init__(self, first_token_ms: float = 300, tokens_per_s: float = 40, reply_tokens: int = 30,
+                 audio_ms_per_token: float = 80, delta_ms: int = 100, vad_threshold: float = 500.0,
+                 vad_start_ms: int = 100, silence_ms: int = None, transcript: str = "नमस्ते",
+                 transcript_ms: float = 150, handshake_ms: float = 0, config_ms: float = 0, log=None):
+        self.first_token_ms = first_token_ms
+        self.tokens_per_s = tokens_per_s
+        self.reply_tokens = reply_tokens
+        self.audio_ms_per_token = audio_ms_per_token
+        self.delta_ms = delta_ms
+        self.vad_threshold = vad_threshold
+        self.vad_start_ms = vad_start_ms
+        self.silence_ms = silence_ms          # None: follow session turn_detection.silence_duration_ms
+        self.transcript = transcript
+        self.transcript_ms = transcript_ms
+        self.handshake_ms = handshake_ms      # delay before the WebSocket upgrade (TLS + WAN)
+        self.config_ms = config_ms            # delay before session.updated
+        self.log = log
+        self._ids = itertools.count(1)
+        self._runner = None
+
+        self.connections = 0
+        self.appends = 0
+        self.responses = 0
+        self.cancelled = 0
+
+    def next_id(self, prefix: str) -> str:
+        return f"{prefix}_{next(self._ids):06d}"
+
+    def stats(self) -> dict:
+        return {"connections": self.connections, "appends": self.appends,
+                "responses": self.responses, "cancelled": self.cancelled}
+
+    # ----------------- SERVING -----------------
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v1/realtime", self._handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve in the running loop; returns the ws:// URL to point OPENAI_REALTIME_URL at"""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"ws://{host}:{port}/v1/realtime"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        session = _FakeSession(self, ws)
+        try:
+            if self.handshake_ms:
+                await asyncio.sleep(self.handshake_ms / 1000)
+            await ws.prepare(request)
+            self.connections += 1
+            await session.send({"type": "session.created", "session": session.config})
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    await session.handle(json.loads(msg.data))
+        except ConnectionResetError:
+            pass  # client went away mid-handshake or mid-send
+        finally:
+            session.close()
+        return ws
+
+
+class _FakeSession:
+    """One realtime conversation: input buffer, server VAD and at most one in-flight response"""
+
+    def __init__(self, server: FakeRealtimeServer, ws):
+        self.server = server
+        self.ws = ws
+        self.id = server.next_id("sess")
+        self.config = {
+            "id": self.id,
+            "modalities": ["text", "audio"],
+            "input_audio_format": "pcm16",
+            "output_audio_format": "pcm16",
+            "turn_detection": {"type": "server_vad", "threshold": 0.5,
+                               "prefix_padding_ms": 300, "silence_duration_ms": 500},
+            "input_audio_transcription": None,
+            "max_response_output_tokens": "inf",
+        }
+        self.audio_ms = 0.0           # input audio clock
+        self.buffer_bytes = 0
+        self.item_id = None           # user item being spoken / committed
+        self.last_item_id = None
+        self._frame = bytearray()
+        self._endpointer = None
+        self._response = None         # (response_id, task)
+        self._tasks = set()
+
+    async def send(self, event: dict):
+        if not self.ws.closed:
+            await self.ws.send_str(json.dumps(event, ensure_ascii=False))
+
+    def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # ----------------- CLIENT EVENTS -----------------
+    async def handle(self, event: dict):
+        handler = getattr(self, "_on_" + event.get("type", "").replace(".", "_"), None)
+        if handler is None:
+            await self.send({"type": "error", "error": {
+                "type": "invalid_request_error", "code": "unknown_event",
+                "message": f"Unsupported event type: {event.get('type')!r}", "event_id": event.get("event_id")}})
+            return
+        await handler(event)
+
+    async def _on_session_update(self, event: dict):
+        self.config.update(event.get("session") or {})
+        self._endpointer = None  # rebuilt for the new format / turn detection
+        if self.server.config_ms:
+            await asyncio.sleep(self.server.config_ms / 1000)
+        await self.send({"type": "session.updated", "session": self.config})
+
+    async def _on_input_audio_buffer_append(self, event: dict):
+        self.server.appends += 1
+        audio = base64.b64decode(event.get("audio", ""))
+        audio_format = self.config.get("input_audio_format") or "pcm16"
+        self.buffer_bytes += len(audio)
+        if not self.config.get("turn_detection"):
+            self.audio_ms += len(audio) / BYTES_PER_MS.get(audio_format, 8)
+            return
+
+        if audio_format == "pcm16":
+            audio = codec.lin2ulaw(audio[:len(audio) // 2 * 2])  # VAD only needs the energy
+        frame_bytes = FRAME_MS * (24 if audio_format == "pcm16" else 8)
+        self._frame += audio
+        while len(self._frame) >= frame_bytes:
+            frame = bytes(self._frame[:frame_bytes])
+            del self._frame[:frame_bytes]
+            self.audio_ms += FRAME_MS
+            await self._vad(frame)
+
+    async def _vad(self, frame: bytes):
+        if self._endpointer is None:
+            turn_detection = self.config["turn_detection"]
+            silence_ms = self.server.silence_ms or turn_detection.get("silence_duration_ms", 500)
+            self._endpointer = EnergyEndpointer(self.server.vad_threshold, self.server.vad_start_ms, silence_ms)
+        vad_event = self._endpointer.process(frame)
+        if vad_event == "speech_started":
+            self.item_id = self.server.next_id("item")
+            if self._response is not None and self.config["turn_detection"].get("interrupt_response", True):
+                await self._cancel_response()
+            await self.send({"type": "input_audio_buffer.speech_started", "item_id": self.item_id,
+                             "audio_start_ms": round(self.audio_ms - self.server.vad_start_ms)})
+        elif vad_event == "speech_stopped":
+            await self.send({"type": "input_audio_buffer.speech_stopped", "item_id": self.item_id,
+                             "audio_end_ms": round(self.audio_ms)})
+            await self._commit()
+            if self.config["turn_detection"].get("create_response", True):
+                await self._start_response({})
+
+    async def _on_input_audio_buffer_commit(self, event: dict):
+        if not self.buffer_bytes:
+            await self.send({"type": "error", "error": {
+                "type": "invalid_request_error", "code": "input_audio_buffer_commit_empty",
+                "message": "Error committing input audio buffer: buffer is empty.", "event_id": event.get("event_id")}})
+            return
+        await self._commit()
+
+    async def _on_input_audio_buffer_clear(self, event: dict):
+        self.buffer_bytes = 0
+        self._frame.clear()
+        await self.send({"type": "input_audio_buffer.cleared"})
+
+    async def _on_response_create(self, event: dict):
+        await self._start_response(event.get("response") or {})
+
+    async def _on_response_cancel(self, event: dict):
+        if self._response is None:
+            await self.send({"type": "error", "error": {
+                "type": "invalid_request_error", "code": "response_cancel_not_active",
+                "message": "Cancellation failed: no active response found", "event_id": event.get("event_id")}})
+            return
+        await self._cancel_response()
+
+    async def _on_conversation_item_truncate(self, event: dict):
+        await self.send({"type": "conversation.item.truncated", "item_id": event.get("item_id"),
+                         "content_index": event.get("content_index", 0),
+                         "audio_end_ms": event.get("audio_end_ms", 0)})
+
+    async def _on_conversation_item_create(self, event: dict):
+        item = dict(event.get("item") or {})
+        item.setdefault("id", self.server.next_id("item"))
+        item["status"] = "completed"
+        await self.send({"type": "conversation.item.created", "previous_item_id": self.last_item_id, "item": item})
+        self.last_item_id = item["id"]
+
+    # ----------------- TURNS -----------------
+    async def _commit(self):
+        item_id = self.item_id or self.server.next_id("item")
+        await self.send({"type": "input_audio_buffer.committed", "item_id": item_id,
+                         "previous_item_id": self.last_item_id})
+        await self.send({"type": "conversation.item.created", "previous_item_id": self.last_item_id,
+                         "item": {"id": item_id, "type": "message", "role": "user", "status": "completed",
+                                  "content": [{"type": "input_audio", "transcript": None}]}})
+        self.last_item_id, self.item_id, self.buffer_bytes = item_id, None, 0
+        if self.config.get("input_audio_transcription"):
+            self._spawn(self._transcribe(item_id))
+
+    async def _transcribe(self, item_id: str):
+        await asyncio.sleep(self.server.transcript_ms / 1000)
+        await self.send({"type": "conversation.item.input_audio_transcription.completed",
+                         "item_id": item_id, "content_index": 0, "transcript": self.server.transcript})
+
+    async def _start_response(self, options: dict):
+        if self._response is not None:
+            await self.send({"type": "error", "error": {
+                "type": "invalid_request_error", "code": "conversation_already_has_active_response",
+                "message": "Conversation already has an active response"}})
+            return
+        response_id = self.server.next_id("resp")
+        self.server.responses += 1
+        self._response = (response_id, self._spawn(self._generate(response_id, options)))
+
+    async def _cancel_response(self):
+        response_id, task = self._response
+        task.cancel()  # _generate sends the cancelled response.done itself
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def _token_budget(self, options: dict) -> int:
+        budget = self.server.reply_tokens
+        for limit in (self.config.get("max_response_output_tokens"), options.get("max_output_tokens")):
+            if isinstance(limit, int):
+                budget = min(budget, limit)
+        return budget
+
+    async def _generate(self, response_id: str, options: dict):
+        loop = asyncio.get_running_loop()
+        server = self.server
+        modalities = options.get("modalities") or self.config.get("modalities") or ["text"]
+        audio_format = self.config.get("output_audio_format") or "pcm16"
+        with_audio = "audio" in modalities
+        item_id = server.next_id("item")
+        tone = _tone(audio_format)
+        bytes_per_ms = BYTES_PER_MS.get(audio_format, 8)
+        delta_bytes = max(int(server.delta_ms * bytes_per_ms), 1)
+        bytes_per_token = int(server.audio_ms_per_token * bytes_per_ms)
+        base = {"response_id": response_id, "item_id": item_id, "output_index": 0, "content_index": 0}
+
+        tokens = 0
+        audio_pos = 0      # bytes of the reply generated so far
+        audio_sent = 0
+        status = "completed"
+        try:
+            await self.send({"type": "response.created", "response": {"id": response_id, "status": "in_progress"}})
+            start = loop.time() + server.first_token_ms / 1000
+            for tokens in range(1, self._token_budget(options) + 1):
+                delay = start + (tokens - 1) / server.tokens_per_s - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                text_type = "response.audio_transcript.delta" if with_audio else "response.text.delta"
+                await self.send({"type": text_type, **base, "delta": f"tok{tokens} "})
+                if not with_audio:
+                    continue
+                audio_pos += bytes_per_token
+                while audio_pos - audio_sent >= delta_bytes:
+                    await self._send_audio(base, tone, audio_sent, delta_bytes)
+                    audio_sent += delta_bytes
+            if with_audio and audio_pos > audio_sent:
+                await self._send_audio(base, tone, audio_sent, audio_pos - audio_sent)
+            if with_audio:
+                await self.send({"type": "response.audio.done", **base})
+        except asyncio.CancelledError:
+            status = "cancelled"
+            server.cancelled += 1
+        finally:
+            self._response = None
+            if not self.ws.closed:
+                await self.send({"type": "response.done", "response": {
+                    "id": response_id, "status": status,
+                    "usage": {"output_tokens": tokens, "input_tokens": 0, "total_tokens": tokens}}})
+
+    async def _send_audio(self, base: dict, tone: bytes, offset: int, length: int):
+        offset %= len(tone)
+        chunk = (tone[offset:] + tone)[:length]
+        await self.send({"type": "response.audio.delta", **base, "delta": base64.b64encode(chunk).decode("ascii")})
+
+
+async def main(args):
+    server = FakeRealtimeServer(
+        first_token_ms=args.first_token_ms, tokens_per_s=args.tokens_per_s, reply_tokens=args.reply_tokens,
+        audio_ms_per_token=args.audio_ms_per_token, delta_ms=args.delta_ms, vad_threshold=args.vad_threshold,
+        vad_start_ms=args.vad_start_ms, silence_ms=args.silence_ms, transcript=args.transcript,
+        transcript_ms=args.transcript_ms, handshake_ms=args.handshake_ms, config_ms=args.config_ms,
+    )
+    url = await server.start(args.host, args.port)
+    print(f"Fake realtime server on {url} (set OPENAI_REALTIME_URL={url})")
+    try:
+        await asyncio.Future()
+    finally:
+        print(f"stats: {server.stats()}")
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI realtime API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9700)
+    parser.add_argument("--first-token-ms", type=float, default=300, help="response.create → first delta")
+    parser.add_argument("--tokens-per-s", type=float, default=40, help="generation rate")
+    parser.add_argument("--reply-tokens", type=int, default=30, help="tokens per reply (capped by max tokens)")
+    parser.add_argument("--audio-ms-per-token", type=float, default=80, help="reply audio per token")
+    parser.add_argument("--delta-ms", type=int, default=100, help="audio per response.audio.delta")
+    parser.add_argument("--vad-threshold", type=float, default=500.0, help="speech RMS threshold (PCM16)")
+    parser.add_argument("--vad-start-ms", type=int, default=100, help="loud audio before speech_started")
+    parser.add_argument("--silence-ms", type=int, default=None,
+                        help="quiet audio before speech_stopped (default: session silence_duration_ms)")
+    parser.add_argument("--transcript", default="नमस्ते", help="input_audio_transcription result")
+    parser.add_argument("--transcript-ms", type=float, default=150, help="commit → transcription.completed")
+    parser.add_argument("--handshake-ms", type=float, default=0, help="simulated TLS + WebSocket upgrade time")
+    parser.add_argument("--config-ms", type=float, default=0, help="simulated session.update round trip")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,266 @@
+# File: websocket/load_test.py
+# Concurrent-call load generator for ws_server.py: N Twilio-protocol streams replaying real audio
+#
+#   python -m websocket.load_test --url ws://localhost:9500/twilio-stream --stages 5x60,10x60,20x60
+#
+# Every call sends connected/start, then the fixture as 20 ms μ-law media frames paced at real
+# time, followed by silence (Twilio keeps streaming while the caller listens), `--turns` times,
+# then stop. Marks are echoed once the simulated playout buffer reaches them, like Twilio does.
+# Each stage holds its concurrency for its duration; the report gives reply latency, returned
+# audio jitter and error rate per stage, and the highest concurrency that met the SLOs.
+
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import os
+import time
+import uuid
+
+import websockets
+
+from app.audio.wav import read_ulaw
+from app.streaming.protocol import parse_event
+from app.streaming.sender import FRAME_BYTES, FRAME_MS
+
+ULAW_SILENCE = b"\xff" * FRAME_BYTES
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_fixtures(paths: list) -> list:
+    """μ-law clips to replay; defaults to twilio_base64.txt and assets/*.wav"""
+    paths = paths or [os.path.join(REPO_ROOT, "twilio_base64.txt")] + sorted(
+        glob.glob(os.path.join(REPO_ROOT, "assets", "*.wav")))
+    clips = []
+    for path in paths:
+        try:
+            clips.append(read_ulaw(path))
+        except (OSError, ValueError) as e:
+            print(f"skipping {path}: {e}")
+    if not clips:
+        raise SystemExit("no usable μ-law fixtures")
+    return clips
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for no samples"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+class CallResult:
+    def __init__(self):
+        self.latencies_ms = []    # end of caller speech → first reply audio, per turn
+        self.jitter_ms = []       # reply frame arrived later than the previous frame's audio ran out
+        self.reply_frames = 0
+        self.turns_without_reply = 0
+        self.error = None
+
+
+class SimulatedCall:
+    """One Twilio media stream: paced media out, reply audio in, marks echoed at playout time"""
+
+    def __init__(self, url: str, clip: bytes, turns: int, gap_s: float):
+        self.url = url
+        self.clip = clip
+        self.turns = turns
+        self.gap_s = gap_s
+        self.stream_sid = "MZ" + uuid.uuid4().hex
+        self.call_sid = "CA" + uuid.uuid4().hex
+        self.result = CallResult()
+        self._speech_ended_at = None
+        self._replied = True
+        self._last_reply_at = None
+        self._last_reply_ms = 0.0
+        self._playout_end = 0.0
+
+    def _media(self, frame: bytes, n: int) -> str:
+        return json.dumps({
+            "event": "media",
+            "sequenceNumber": str(n + 2),
+            "media": {"track": "inbound", "chunk": str(n + 1), "timestamp": str(n * FRAME_MS),
+                      "payload": base64.b64encode(frame).decode("ascii")},
+            "streamSid": self.stream_sid,
+        }, separators=(",", ":"))
+
+    def _frames(self):
+        """(frame, is_speech) for the whole call: clip, trailing silence, repeated per turn"""
+        silence = int(self.gap_s * 1000 / FRAME_MS)
+        for _ in range(self.turns):
+            for i in range(0, len(self.clip), FRAME_BYTES):
+                yield self.clip[i:i + FRAME_BYTES].ljust(FRAME_BYTES, b"\xff"), True
+            for _ in range(silence):
+                yield ULAW_SILENCE, False
+
+    async def run(self) -> CallResult:
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                receiver = asyncio.create_task(self._receive(ws))
+                try:
+                    await self._send(ws)
+                finally:
+                    receiver.cancel()
+        except (OSError, websockets.exceptions.WebSocketException, asyncio.TimeoutError) as e:
+            self.result.error = f"{type(e).__name__}: {e}"
+        if not self._replied:
+            self.result.turns_without_reply += 1
+        return self.result
+
+    async def _send(self, ws):
+        loop = asyncio.get_running_loop()
+        await ws.send(json.dumps({"event": "connected", "protocol": "Call", "version": "1.0.0"}))
+        await ws.send(json.dumps({
+            "event": "start",
+            "sequenceNumber": "1",
+            "start": {"streamSid": self.stream_sid, "callSid": self.call_sid, "tracks": ["inbound"],
+                      "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": 8000, "channels": 1}},
+            "streamSid": self.stream_sid,
+        }))
+        start = loop.time()
+        speaking = False
+        for n, (frame, is_speech) in enumerate(self._frames()):
+            delay = start + n * FRAME_MS / 1000 - loop.time()  # absolute schedule: no drift
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if is_speech and not speaking:
+                if not self._replied:
+                    self.result.turns_without_reply += 1
+                speaking = True
+            elif not is_speech and speaking:
+                speaking = False
+                self._speech_ended_at = time.perf_counter()
+                self._replied = False
+            await ws.send(self._media(frame, n))
+        await ws.send(json.dumps({"event": "stop", "streamSid": self.stream_sid}))
+
+    async def _receive(self, ws):
+        loop = asyncio.get_running_loop()
+        async for message in ws:
+            event = parse_event(message)
+            if event is None:
+                continue
+            if event.event == "media":
+                now = time.perf_counter()
+                audio_ms = len(event.audio) / 8
+                if not self._replied and self._speech_ended_at is not None:
+                    self.result.latencies_ms.append((now - self._speech_ended_at) * 1000)
+                    self._replied = True
+                    self._last_reply_at = None  # new reply: jitter restarts
+                if self._last_reply_at is not None:
+                    gap_ms = (now - self._last_reply_at) * 1000
+                    self.result.jitter_ms.append(max(0.0, gap_ms - self._last_reply_ms))
+                self._last_reply_at, self._last_reply_ms = now, audio_ms
+                self.result.reply_frames += 1
+                self._playout_end = max(self._playout_end, loop.time()) + audio_ms / 1000
+            elif event.event == "mark":
+                loop.call_at(max(self._playout_end, loop.time()), self._echo_mark, ws, event.name)
+            elif event.event == "clear":
+                self._playout_end = loop.time()
+
+    def _echo_mark(self, ws, name: str):
+        if ws.state is not websockets.protocol.State.OPEN:
+            return  # played out after the call ended
+        task = asyncio.ensure_future(ws.send(json.dumps({
+            "event": "mark", "streamSid": self.stream_sid, "mark": {"name": name}})))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())  # closed mid-send: the call records it
+
+
+async def run_stage(url: str, clips: list, concurrency: int, duration_s: float, turns: int, gap_s: float,
+                    ramp_s: float) -> list:
+    """Keep `concurrency` calls in flight for `duration_s` (started over `ramp_s`); returns all results"""
+    results = []
+    deadline = asyncio.get_running_loop().time() + duration_s
+
+    async def worker(index: int):
+        await asyncio.sleep(ramp_s * index / max(concurrency, 1))
+        n = index
+        while asyncio.get_running_loop().time() < deadline:
+            call = SimulatedCall(url, clips[n % len(clips)], turns, gap_s)
+            results.append(await call.run())
+            n += concurrency
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return results
+
+
+def summarize(concurrency: int, results: list, slo_p95_ms: float, slo_error_rate: float) -> dict:
+    latencies = [ms for r in results for ms in r.latencies_ms]
+    jitter = [ms for r in results for ms in r.jitter_ms]
+    turns = len(latencies) + sum(r.turns_without_reply for r in results)
+    errors = sum(1 for r in results if r.error)
+    failures = errors + sum(r.turns_without_reply for r in results)
+    error_rate = failures / max(turns + errors, 1)
+    p95 = percentile(latencies, 95)
+    return {
+        "concurrency": concurrency,
+        "calls": len(results),
+        "turns": turns,
+        "errors": errors,
+        "no_reply": sum(r.turns_without_reply for r in results),
+        "error_rate": error_rate,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": p95,
+        "latency_p99_ms": percentile(latencies, 99),
+        "jitter_p50_ms": percentile(jitter, 50),
+        "jitter_p95_ms": percentile(jitter, 95),
+        "jitter_p99_ms": percentile(jitter, 99),
+        "slo_ok": bool(latencies) and p95 <= slo_p95_ms and error_rate <= slo_error_rate,
+        "sample_errors": sorted({r.error for r in results if r.error})[:3],
+    }
+
+
+def parse_stages(spec: str) -> list:
+    """'5x60,10x60' → [(5, 60.0), (10, 60.0)]"""
+    stages = []
+    for part in spec.split(","):
+        calls, _, seconds = part.strip().partition("x")
+        stages.append((int(calls), float(seconds or 60)))
+    return stages
+
+
+async def main(args):
+    clips = load_fixtures(args.audio)
+    call_s = args.turns * (max(len(c) for c in clips) / 8000 + args.gap_s)
+    print(f"{len(clips)} fixture(s), ~{call_s:.1f} s per call, SLO: reply p95 <= {args.slo_p95_ms:.0f} ms, "
+          f"errors <= {args.slo_error_rate:.1%}")
+    print(f"{'calls':>6}{'done':>6}{'turns':>7}{'err%':>7}{'lat p50':>9}{'p95':>8}{'p99':>8}"
+          f"{'jit p50':>9}{'p95':>7}{'p99':>7}  SLO")
+
+    summaries = []
+    for concurrency, duration_s in parse_stages(args.stages):
+        results = await run_stage(args.url, clips, concurrency, duration_s, args.turns, args.gap_s, args.ramp_s)
+        s = summarize(concurrency, results, args.slo_p95_ms, args.slo_error_rate)
+        summaries.append(s)
+        print(f"{concurrency:>6}{s['calls']:>6}{s['turns']:>7}{s['error_rate'] * 100:>6.1f}%"
+              f"{s['latency_p50_ms']:>9.0f}{s['latency_p95_ms']:>8.0f}{s['latency_p99_ms']:>8.0f}"
+              f"{s['jitter_p50_ms']:>9.1f}{s['jitter_p95_ms']:>7.1f}{s['jitter_p99_ms']:>7.1f}  "
+              f"{'ok' if s['slo_ok'] else 'BREACH'}")
+        for error in s["sample_errors"]:
+            print(f"        e.g. {error}")
+        if not s["slo_ok"] and args.stop_on_breach:
+            break
+
+    passing = [s["concurrency"] for s in summaries if s["slo_ok"]]
+    print(f"max concurrency within SLO: {max(passing) if passing else 'none'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent Twilio-stream load generator")
+    parser.add_argument("--url", default="ws://localhost:9500/twilio-stream")
+    parser.add_argument("--stages", default="1x30,5x60,10x60,20x60",
+                        help="comma-separated <concurrent calls>x<seconds>")
+    parser.add_argument("--ramp-s", type=float, default=5.0, help="spread call starts within a stage")
+    parser.add_argument("--turns", type=int, default=3, help="utterances per call")
+    parser.add_argument("--gap-s", type=float, default=4.0, help="silence after each utterance (reply window)")
+    parser.add_argument("--audio", nargs="*", help="μ-law fixtures (.wav or base64 WAV text)")
+    parser.add_argument("--slo-p95-ms", type=float, default=1500.0, help="reply latency p95 budget")
+    parser.add_argument("--slo-error-rate", type=float, default=0.01)
+    parser.add_argument("--stop-on-breach", action="store_true", help="skip higher stages once an SLO breaks")
+    parser.add_argument("--json", help="also write per-stage summaries to this file")
+    asyncio.run(main(parser.parse_args()))
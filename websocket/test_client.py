@@ -2,7 +2,7 @@ import asyncio
 import websockets
 import json
 import base64
-import audioop
+from app.audio import codec
 
 async def test():
     uri = "wss://voice-bot.v4edu.in/twilio-stream"
@@ -19,7 +19,7 @@ async def test():
 
         # 2. Create FAKE μ-law audio (a simple beep at 8kHz)
         pcm = (b"\x00\x10" * 1000)  # fake PCM
-        mulaw = audioop.lin2ulaw(pcm, 2)
+        mulaw = codec.lin2ulaw(pcm)
         payload = base64.b64encode(mulaw).decode()
 
         # 3. Send a fake "media" event
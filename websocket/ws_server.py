@@ -1,17 +1,255 @@
+# File: websocket/ws_server.py
+# Twilio media-stream server: one process, or a supervisor forking WS_WORKERS processes that all
+# accept on the same port through SO_REUSEPORT (one GIL and one event loop per core)
+#
+#   WS_WORKERS=4 VOSK_PRELOAD=1 python websocket/ws_server.py
+#
+# Models are preloaded in the supervisor before forking so workers share them copy-on-write.
+# Crashed workers are restarted with backoff. SIGTERM drains: each worker closes its listening
+# socket (new connections go to other workers, or are refused once all are draining), lets
+# active calls finish for up to WS_DRAIN_TIMEOUT_S, then exits. Active calls per worker are
+# published as the voicebot_active_calls gauge on /metrics.
+#
+# Each worker runs admission control (app/services/admission.py): past MAX_CALLS_PER_WORKER,
+# MAX_UPSTREAM_SESSIONS or the loop-lag / CPU limits, a new stream only hears the pre-rendered
+# call-back message and is closed, so calls already in progress keep their CPU budget.
+
 import asyncio
+import os
+import signal
+import socket
+import time
+import traceback
+
 import websockets
-from app.services.ws_voice_stream import handle_ws_service
+from app.services.ws_voice_stream import handle_ws_service, realtime_pool
+from app.realtime.session_pool import close_realtime_pool
+from app.services.admission import get_admission, load_fallback_audio, fallback_payload
+from app.services.call_metrics import get_registry, prune_snapshots
+from app.services import intent
+from app.streaming import protocol
+from app.services.voice_logger import shutdown_voice_logger
+
+# ==================== CONFIG ====================
+WS_HOST = os.getenv("WS_HOST", "0.0.0.0")
+WS_PORT = int(os.getenv("WS_PORT", "9500"))
+WS_WORKERS = int(os.getenv("WS_WORKERS", "1"))                      # >1: supervisor + forked workers
+WS_DRAIN_TIMEOUT_S = float(os.getenv("WS_DRAIN_TIMEOUT_S", "300"))  # longest a call may hold up shutdown
+WS_BACKLOG = int(os.getenv("WS_BACKLOG", "1024"))
+RESTART_BACKOFF_MAX_S = 30.0
+STABLE_AFTER_S = 10.0  # a worker that lived this long is restarted immediately if it dies
+
+METRICS_HANDLER = "ws_server"
+FALLBACK_START_TIMEOUT_S = 5.0
+FALLBACK_MARK = "admission_fallback"
+
+
+def _publish_active():
+    admission = get_admission()
+    registry = get_registry()
+    registry.set_gauge("active_calls", METRICS_HANDLER, admission.active_calls)
+    registry.set_gauge("accepting_calls", METRICS_HANDLER, int(admission.accepting))
+    registry.write_snapshot_soon()  # a burst of admits/releases coalesces into one write
+
+
+async def _reject(websocket, reason: str):
+    """Overflow call: play the pre-rendered call-back message (if any), then hang up"""
+    get_registry().inc("calls_rejected", METRICS_HANDLER)
+    _publish_active()
+    print(f"[worker {os.getpid()}] call refused ({reason})")
+    payload = fallback_payload()
+    try:
+        if payload:
+            async with asyncio.timeout(FALLBACK_START_TIMEOUT_S + len(payload) * 3 / 4 / 8000 + 2):
+                async for message in websocket:
+                    event = protocol.parse_event(message)
+                    if event is None:
+                        continue
+                    if event.event == "start":
+                        messages = protocol.StreamMessages(event.stream_sid)
+                        await websocket.send(messages.media(payload))  # one message: no per-frame work
+                        await websocket.send(messages.mark(FALLBACK_MARK))
+                    elif event.event in ("stop", "mark"):
+                        break  # played out (Twilio echoes the mark) or caller hung up
+    except (TimeoutError, websockets.exceptions.ConnectionClosed):
+        pass
+    await websocket.close(1013, "over capacity")
 
 
 async def handle_ws(websocket):
-    return await handle_ws_service(websocket)
+    admission = get_admission()
+    reason = admission.admit()
+    if reason:
+        return await _reject(websocket, reason)
+    _publish_active()
+    try:
+        return await handle_ws_service(websocket)
+    finally:
+        admission.release()
+        _publish_active()
+
+
+def _listen_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)  # kernel spreads accepts over workers
+    sock.bind((host, port))
+    sock.listen(WS_BACKLOG)
+    sock.setblocking(False)
+    return sock
+
+
+def _preload():
+    from app.asr.model_registry import VOSK_PRELOAD, preload_models
+    if VOSK_PRELOAD:
+        preload_models()  # load once at startup instead of on the first call
+
+
+# ----------------- WORKER -----------------
+async def serve_worker(sock: socket.socket, drain_timeout: float = WS_DRAIN_TIMEOUT_S):
+    """Serve until SIGTERM/SIGINT, then stop accepting and let active calls finish"""
+    loop = asyncio.get_running_loop()
+    admission = get_admission()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    realtime_pool().start()  # connect + configure realtime sockets before the first call arrives
+    fallback = loop.run_in_executor(None, load_fallback_audio)  # TTS cache hit after the first run
+    answers = loop.run_in_executor(None, intent.prewarm)  # rank answers play from cache
+    monitor = asyncio.create_task(admission.monitor(on_change=_publish_active))
+    _publish_active()
+    pid = os.getpid()
+    try:
+        async with websockets.serve(handle_ws, sock=sock, backlog=WS_BACKLOG) as server:
+            await stop.wait()
+            admission.draining = True
+            _publish_active()
+            server.close(close_connections=False)  # listener closed, existing calls untouched
+            print(f"[worker {pid}] draining, {admission.active_calls} active call(s)")
+            deadline = loop.time() + drain_timeout
+            while admission.active_calls and loop.time() < deadline:
+                await asyncio.sleep(0.5)
+            if admission.active_calls:
+                print(f"[worker {pid}] drain timeout, closing {admission.active_calls} call(s)")
+            # leaving the context closes whatever is still open with 1001 going away
+    finally:
+        monitor.cancel()
+        await asyncio.gather(fallback, answers, return_exceptions=True)
+        print(f"[worker {pid}] {admission.summary()}")
+        await close_realtime_pool()
+        shutdown_voice_logger()  # flush queued log rows
+        await get_registry().snapshots_written()  # a late write would bring the removed file back
+        get_registry().remove_snapshot()  # an exited worker's totals and gauges leave /metrics
+        print(f"[worker {pid}] stopped")
+
+
+def _run_worker(index: int, host: str, port: int, reuse_port: bool) -> int:
+    try:
+        sock = _listen_socket(host, port, reuse_port)
+        print(f"[worker {os.getpid()}] #{index} accepting on ws://{host}:{port}/twilio-stream")
+        asyncio.run(serve_worker(sock))
+        return 0
+    except Exception:
+        traceback.print_exc()
+        return 1
+
+
+# ----------------- SUPERVISOR -----------------
+class Supervisor:
+    """Forks `workers` processes, restarts the ones that die and drains them all on SIGTERM"""
+
+    def __init__(self, workers: int, host: str = WS_HOST, port: int = WS_PORT,
+                 drain_timeout: float = WS_DRAIN_TIMEOUT_S):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.drain_timeout = drain_timeout
+        self.children = {}      # pid → slot
+        self.started_at = {}    # slot → monotonic start time
+        self.backoff = {}       # slot → next restart delay
+        self.pending = {}       # slot → monotonic time to (re)start at
+        self.stopping = False
+        self.restarts = 0
+
+    def _spawn(self, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, signal.SIG_DFL)  # the worker's event loop installs its own
+            os._exit(_run_worker(slot, self.host, self.port, reuse_port=True))
+        self.children[pid] = slot
+        self.started_at[slot] = time.monotonic()
+
+    def _on_signal(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        self.pending.clear()
+        print(f"[supervisor] {signal.Signals(signum).name}: draining {len(self.children)} worker(s)")
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            slot = self.children.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+            lived = time.monotonic() - self.started_at[slot]
+            delay = 0.0 if lived >= STABLE_AFTER_S else min(self.backoff.get(slot, 0.5) * 2, RESTART_BACKOFF_MAX_S)
+            self.backoff[slot] = delay or 0.5
+            self.pending[slot] = time.monotonic() + delay
+            self.restarts += 1
+            print(f"[supervisor] worker {pid} (#{slot}) exited with status {os.waitstatus_to_exitcode(status)} "
+                  f"after {lived:.1f} s, restarting in {delay:.1f} s")
+
+    def run(self):
+        prune_snapshots()  # metrics files left by earlier runs
+        _preload()  # before fork: workers share the model pages copy-on-write
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        print(f"[supervisor {os.getpid()}] starting {self.workers} workers on ws://{self.host}:{self.port}/twilio-stream")
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        kill_at = None
+        while self.children or self.pending:
+            self._reap()
+            now = time.monotonic()
+            for slot, due in list(self.pending.items()):
+                if due <= now:
+                    del self.pending[slot]
+                    self._spawn(slot)
+            if self.stopping:
+                kill_at = kill_at or now + self.drain_timeout + 10
+                if now >= kill_at:
+                    for pid in self.children:
+                        os.kill(pid, signal.SIGKILL)
+            time.sleep(0.1)
+        print(f"[supervisor] all workers stopped ({self.restarts} restart(s))")
 
 
-async def main():
-    print("Twilio WebSocket Server running on ws://0.0.0.0:9500/twilio-stream")
-    async with websockets.serve(handle_ws, "0.0.0.0", 9500):
-        await asyncio.Future()  # keep alive
+def main():
+    if WS_WORKERS > 1:
+        Supervisor(WS_WORKERS).run()
+        return
+    prune_snapshots()
+    _preload()
+    sock = _listen_socket(WS_HOST, WS_PORT, reuse_port=False)
+    print(f"Twilio WebSocket Server running on ws://{WS_HOST}:{WS_PORT}/twilio-stream")
+    asyncio.run(serve_worker(sock))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()